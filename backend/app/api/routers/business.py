@@ -11,7 +11,7 @@ from app.db.crud import business_crud
 from app.db.schemas.business_schema import BusinessCreate, BusinessRead, BusinessUpdate
 from app.api.routers.auth import get_current_user
 from app.db.models.user import User
-from app.core.websocket_manager import broadcast_event
+from app.core.websocket_manager import ADMIN_TOPIC, SCREENS_TOPIC, broadcast_event
 
 router = APIRouter()
 
@@ -49,7 +49,7 @@ async def create_business_info(
 
     business_create = BusinessCreate(name=name, logo=logo_bytes)
     business = business_crud.create_business(db, business_create)
-    background_tasks.add_task(broadcast_event, "business_created", {"id": business.id})
+    background_tasks.add_task(broadcast_event, "business_created", {"id": business.id}, [ADMIN_TOPIC, SCREENS_TOPIC])
     return business
 
 
@@ -89,7 +89,7 @@ def update_business_info(
         )
         business = business_crud.create_business(db, business_create)
     
-    background_tasks.add_task(broadcast_event, "business_updated", {"id": business.id})
+    background_tasks.add_task(broadcast_event, "business_updated", {"id": business.id}, [ADMIN_TOPIC, SCREENS_TOPIC])
     return business
 
 
@@ -120,5 +120,5 @@ def delete_business(
     success = business_crud.delete_business(db, business_id=1)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Business not found")
-    background_tasks.add_task(broadcast_event, "business_deleted", {"id": 1})
+    background_tasks.add_task(broadcast_event, "business_deleted", {"id": 1}, [ADMIN_TOPIC, SCREENS_TOPIC])
     return None
@@ -1,24 +1,80 @@
 """
 Media router for file upload and management
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Callable, List, Optional
 import os
-from pathlib import Path
 
 from app.db import get_db
 from app.db.crud import media_crud
-from app.db.schemas.media_schema import MediaCreate, MediaRead, MediaUpdate, MediaType
+from app.db.schemas.media_schema import (
+    MediaCreate, MediaRead, MediaUpdate, MediaType, ResumableUploadInit, ResumableUploadStatus
+)
 from app.api.routers.auth import get_current_user
 from app.db.models.user import User
-from app.utils import ffmpeg
-from app.core.websocket_manager import broadcast_event
+from app.db.models.media import Media, MediaStatus
+from app.db.crud import media_job_crud
+from app.db.schemas.media_job_schema import MediaJobRead
+from app.core.job_queue import job_queue
+from app.utils import resumable_uploads
+from app.utils.uploads import StoredUpload, UploadRejected, discard_staged
+from app.core.websocket_manager import broadcast_event, media_topics
 from app.config import settings
 
 router = APIRouter()
 
 
+def _register_uploaded_media(
+    db: Session,
+    filename: str,
+    media_type: MediaType,
+    duration: int,
+    stored: StoredUpload,
+    background_tasks: BackgroundTasks,
+    on_created: Optional[Callable[[], None]] = None
+) -> Media:
+    """
+    Create the media record for a stored upload and queue video processing.
+    `on_created` runs as soon as the media row is committed.
+    """
+    # Los videos quedan en estado "processing": ffprobe y el thumbnail corren en el job queue
+    is_video = media_type == MediaType.video
+    media_data = MediaCreate(
+        filename=filename,
+        media_type=media_type,
+        duration=duration
+    )
+    db_media = media_crud.create_media(
+        db=db,
+        media_in=media_data,
+        file=None,
+        status=MediaStatus.processing if is_video else MediaStatus.ready,
+        stored=stored
+    )
+    if on_created:
+        on_created()
+    if is_video:
+        # Un archivo idéntico ya procesado comparte blob (y derivados): se reutiliza su resultado
+        twin = media_crud.get_processed_media_for_blob(db, db_media.blob_id, exclude_id=db_media.id)
+        if twin:
+            db_media = media_crud.update_media_processing(
+                db, db_media.id, MediaStatus.ready,
+                duration=twin.duration,
+                derivatives=twin.derivatives,
+                hls_path=twin.hls_path,
+                renditions=twin.renditions
+            )
+        else:
+            job_queue.enqueue(db, db_media.id)
+        if settings.HLS_ENABLED and not (twin and twin.hls_path):
+            job_queue.enqueue(db, db_media.id, job_type="hls")
+    background_tasks.add_task(broadcast_event, "media_created", {"id": db_media.id, "status": db_media.status},
+                              media_topics(db_media.id))
+    return db_media
+
+
 @router.post("/", response_model=MediaRead)
 async def create_media(
     filename: str = Form(...),
@@ -29,56 +85,198 @@ async def create_media(
     current_user: User = Depends(get_current_user),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
-    """Upload new media file (image or video). Obtiene metadata real y genera thumbnail si es video."""
+    """Upload new media file (image or video). La metadata real y el thumbnail de videos se generan en segundo plano; un archivo ya subido se reutiliza por su hash."""
+    stored = None
     try:
-        # 1. Guardar archivo subido y separar ruta URL de ruta de disco
-        url_filepath = media_crud.save_upload_file(file)
-        # Construir ruta de disco real basada en UPLOAD_DIR y nombre de archivo
-        filename_only = os.path.basename(url_filepath)
-        disk_path = Path(settings.UPLOAD_DIR) / filename_only
-        # Usar disk_path para operaciones con ffmpeg y url_filepath para DB y respuestas
-        saved_filepath = url_filepath
-        saved_path = disk_path
-
-        # 2. Obtener metadata real
-        real_duration = duration
-        extra_metadata = {}
-        if media_type == MediaType.video:
-            info = ffmpeg.get_media_info(saved_path)
-            real_duration = int(info.get('duration', duration))
-            extra_metadata = {
-                'format': info.get('format'),
-                'size': info.get('size'),
-                'streams': info.get('streams')
-            }
-            # 3. Generar thumbnail para video
-            thumb_path = disk_path.parent / f"{disk_path.stem}_thumb.jpg"
-            ffmpeg.generate_thumbnail(disk_path, thumb_path, time_offset=1.0)
-        else:
-            # Si es imagen, solo obtener tamaño de archivo
-            extra_metadata = {'size': saved_path.stat().st_size}
-
-        # 4. Crear registro en base de datos con metadata real
-        media_data = MediaCreate(
-            filename=filename,
-            media_type=media_type,
-            duration=real_duration
+        # 1. Guardar archivo subido en staging (hash para el almacenamiento por contenido)
+        stored = await run_in_threadpool(media_crud.save_upload_file, file)
+        # Las escrituras en la base tampoco bloquean el event loop
+        return await run_in_threadpool(
+            _register_uploaded_media, db, filename, media_type, duration, stored, background_tasks
         )
-        db_media = media_crud.create_media(db=db, media_in=media_data, file=None, filepath_override=url_filepath)
-        background_tasks.add_task(broadcast_event, "media_created", {"id": db_media.id})
-
-        # 5. (Opcional) Guardar metadata extra en un campo adicional si lo deseas
-        # Por ahora solo se retorna en la respuesta
-        response = db_media.__dict__.copy()
-        response.update(extra_metadata)
-        if media_type == MediaType.video:
-            response['thumbnail'] = str(thumb_path)
-        return response
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error uploading file: {str(e)}"
         )
+    finally:
+        # El archivo definitivo ya está enlazado bajo su hash (o la subida falló)
+        discard_staged(stored)
+
+
+# =============================================================================
+# RESUMABLE UPLOADS (init -> PUT chunk por offset -> status -> complete)
+# =============================================================================
+
+@router.post("/uploads", response_model=ResumableUploadStatus, status_code=status.HTTP_201_CREATED)
+def init_resumable_upload(
+    upload_in: ResumableUploadInit,
+    current_user: User = Depends(get_current_user)
+):
+    """Open a resumable upload session for a large media file"""
+    try:
+        return resumable_uploads.init_upload(
+            filename=upload_in.filename,
+            media_type=upload_in.media_type.value,
+            size=upload_in.size,
+            duration=upload_in.duration,
+            sha256=upload_in.sha256
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.get("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+def get_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get received ranges and the next missing offset of an upload session"""
+    try:
+        return resumable_uploads.get_upload_status(upload_id)
+    except resumable_uploads.UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+
+
+@router.put("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def put_resumable_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Write one chunk (raw request body) at the given byte offset"""
+    # El tamaño del bloque está acotado por RESUMABLE_CHUNK_MAX_SIZE
+    body = bytearray()
+    async for piece in request.stream():
+        body.extend(piece)
+        if len(body) > settings.RESUMABLE_CHUNK_MAX_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Chunk exceeds maximum size of {settings.RESUMABLE_CHUNK_MAX_SIZE} bytes"
+            )
+    try:
+        return await run_in_threadpool(
+            resumable_uploads.write_chunk, upload_id, offset, bytes(body), x_chunk_sha256
+        )
+    except resumable_uploads.UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=MediaRead)
+def complete_resumable_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks = BackgroundTasks()
+):
+    """Finalize a fully received upload and register it as media"""
+    try:
+        stored, session = resumable_uploads.finalize_upload(upload_id)
+    except resumable_uploads.UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    # La sesión se elimina solo cuando el media está confirmado en la base
+    created = []
+
+    def close_session():
+        created.append(True)
+        resumable_uploads.close_upload(upload_id)
+
+    try:
+        return _register_uploaded_media(
+            db,
+            session["filename"],
+            MediaType(session["media_type"]),
+            session["duration"],
+            stored,
+            background_tasks,
+            on_created=close_session
+        )
+    except Exception as e:
+        if not created:
+            # El .part sigue intacto: el cliente puede repetir /complete sin volver a subir
+            resumable_uploads.release_upload(upload_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing uploaded file: {str(e)}"
+        )
+
+
+@router.delete("/uploads/{upload_id}")
+def abort_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Discard an upload session and its partial data"""
+    try:
+        resumable_uploads.abort_upload(upload_id)
+    except resumable_uploads.UploadSessionNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return {"message": "Upload session discarded"}
+
+
+# =============================================================================
+# PROCESSING JOBS
+# =============================================================================
+
+@router.get("/jobs", response_model=List[MediaJobRead])
+def list_media_jobs(
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List background processing jobs, optionally filtered by status"""
+    return media_job_crud.list_jobs(db, status=status, skip=skip, limit=limit)
+
+
+@router.get("/jobs/{job_id}", response_model=MediaJobRead)
+def get_media_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a background processing job"""
+    job = media_job_crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/{media_id}/jobs", response_model=List[MediaJobRead])
+def list_jobs_for_media(
+    media_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List the processing jobs of a media file"""
+    if not media_crud.get_media(db, media_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    return media_job_crud.list_jobs_for_media(db, media_id)
+
+
+@router.post("/{media_id}/hls", response_model=MediaJobRead, status_code=status.HTTP_202_ACCEPTED)
+def package_media_hls(
+    media_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Queue (re)generation of the adaptive HLS ladder of a video"""
+    media = media_crud.get_media(db, media_id)
+    if not media:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    if media.media_type != MediaType.video:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="HLS is only available for videos")
+    return job_queue.enqueue(db, media_id, job_type="hls")
 
 
 @router.get("/", response_model=List[MediaRead])
@@ -140,7 +338,8 @@ def update_media(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Media not found"
         )
-    background_tasks.add_task(broadcast_event, "media_updated", {"id": media.id})
+    background_tasks.add_task(broadcast_event, "media_updated", {"id": media.id},
+                              media_topics(media.id, media_crud.get_media_playlist_ids(db, media.id)))
     return media
 
 
@@ -161,6 +360,9 @@ def delete_media(
                 detail="Media not found"
             )
         
+        # Las playlists que lo contenían se calculan antes de borrar las relaciones
+        topics = media_topics(media_id, media_crud.get_media_playlist_ids(db, media_id))
+
         # Eliminar el media (esto incluye el archivo físico y las relaciones)
         success = media_crud.delete_media(db, media_id=media_id)
         if not success:
@@ -177,7 +379,8 @@ def delete_media(
                 "id": media_id,
                 "filename": media_info.filename,
                 "message": f"Media '{media_info.filename}' has been deleted successfully"
-            }
+            },
+            topics
         )
         
         return {
@@ -4,63 +4,118 @@ Endpoints públicos para el reproductor digital sin autenticación requerida
 """
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
+import os
 
-from ...db.database import get_db
-from ...db.crud import playlist_crud, media_crud
+from ...db.database import get_read_db
+from ...db.async_db import AsyncDB, get_async_read_db
+from ...db.crud import playlist_crud, media_crud, async_reads
 from ...db.schemas.playlist_schema import PlaylistRead
 from ...db.schemas.media_schema import MediaRead
 from ...db.schemas.playlist_media_schema import PlaylistMediaRead
+from ...core.schedule_index import schedule_index
+from ...core.response_cache import MEDIA, PLAYLISTS, playlist_scope, response_cache
 
 router = APIRouter(prefix="/player", tags=["player"])
 
 @router.get("/playlists", response_model=List[PlaylistRead])
 async def get_public_playlists(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    adb: AsyncDB = Depends(get_async_read_db)
 ):
     """
     Obtener todas las playlists (público para reproductor) con conteos correctos
     """
-    playlists = playlist_crud.list_playlists(db, skip=skip, limit=limit)
-    
-    # Calcular media_count y total_duration para cada playlist
-    playlists_with_counts = []
-    for playlist in playlists:
-        # Obtener elementos de la playlist
-        playlist_items = playlist_crud.get_playlist_media(db, playlist_id=playlist.id)
-        
-        # Calcular duración total
-        total_duration = 0
-        for item in playlist_items:
-            media = media_crud.get_media(db, media_id=item.media_id)
-            if media and media.duration:
-                total_duration += media.duration
-        
-        # Crear diccionario con los datos correctos
-        playlist_dict = {
-            "id": playlist.id,
-            "name": playlist.name,
-            "description": playlist.description,
-            "created_at": playlist.created_at,
-            "updated_at": playlist.updated_at,
-            "media_count": len(playlist_items),
-            "total_duration": total_duration
+    # Una sola consulta agrupada: sin cargar elementos ni media por playlist.
+    # Con If-None-Match vigente responde 304 sin consultar la base
+    async def build():
+        rows = await async_reads.get_playlist_summaries(adb, skip=skip, limit=limit)
+        return [PlaylistRead(**row) for row in rows]
+    
+    return await response_cache.respond_async(request, ("player_playlists", skip, limit), [PLAYLISTS, MEDIA], build)
+
+@router.get("/now-playing")
+def get_now_playing(
+    request: Request,
+    playlist_id: Optional[int] = None,
+    at: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Resolver en el servidor qué debe reproducir una pantalla en un instante.
+    
+    playlist_id es la playlist por defecto de la pantalla (se devuelve si no hay
+    ningún schedule activo); at es opcional (por defecto, ahora en hora local).
+    ends_at indica hasta cuándo es válida la respuesta.
+    """
+    if at is None:
+        at = datetime.now()
+    elif at.tzinfo is not None:
+        # Los horarios de los schedules están en hora local del servidor
+        at = at.astimezone().replace(tzinfo=None)
+    
+    schedule_index.ensure_loaded(db)
+    resolution = schedule_index.resolve(at)
+    rule = resolution.schedule
+    
+    result = {
+        "at": resolution.at.isoformat(),
+        "starts_at": resolution.starts_at.isoformat(),
+        "ends_at": resolution.ends_at.isoformat(),
+        "source": "schedule" if rule else ("playlist" if playlist_id else "none"),
+        "schedule": None,
+        "content": None,
+    }
+    if rule:
+        result["schedule"] = {
+            "id": rule.id,
+            "schedule_type": rule.schedule_type,
+            "priority": rule.priority,
+            "media_id": rule.content_id if rule.content_type == "media" else None,
+            "playlist_id": rule.content_id if rule.content_type == "playlist" else None,
         }
-        playlists_with_counts.append(playlist_dict)
+        result["content"] = {"type": rule.content_type, "id": rule.content_id}
+    elif playlist_id:
+        result["content"] = {"type": "playlist", "id": playlist_id}
     
-    return playlists_with_counts
+    # Datos del contenido para que el player no necesite otra petición
+    content = result["content"]
+    if content and content["type"] == "media":
+        media = media_crud.get_media(db, media_id=content["id"])
+        if media:
+            served_filename = os.path.basename(media.filepath)
+            base_url = f"{request.url.scheme}://{request.url.netloc}"
+            content.update({
+                "filename": media.filename,
+                "media_type": media.media_type,
+                "duration": media.duration,
+                "file_url": f"{base_url}/uploads/{served_filename}",
+                "served_filename": served_filename,
+                "hls_url": f"{base_url}{media.hls_path}" if media.hls_path else None,
+            })
+    elif content:
+        summary = playlist_crud.get_playlist_summary(db, playlist_id=content["id"])
+        if summary:
+            content.update({
+                "name": summary["name"],
+                "media_count": summary["media_count"],
+                "total_duration": summary["total_duration"],
+            })
+    
+    return result
 
 @router.get("/playlists/{playlist_id}", response_model=PlaylistRead)
 async def get_public_playlist(
     playlist_id: int,
-    db: Session = Depends(get_db)
+    adb: AsyncDB = Depends(get_async_read_db)
 ):
     """
     Obtener una playlist específica (público para reproductor)
     """
-    playlist = playlist_crud.get_playlist(db, playlist_id=playlist_id)
+    playlist = await async_reads.get_playlist_summary(adb, playlist_id=playlist_id)
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
     return playlist
@@ -68,30 +123,30 @@ async def get_public_playlist(
 @router.get("/playlists/{playlist_id}/items", response_model=List[PlaylistMediaRead])
 async def get_public_playlist_items(
     playlist_id: int,
-    db: Session = Depends(get_db)
+    adb: AsyncDB = Depends(get_async_read_db)
 ):
     """
     Obtener elementos de una playlist (público para reproductor)
     """
     # Verificar que la playlist existe
-    playlist = playlist_crud.get_playlist(db, playlist_id=playlist_id)
+    playlist = await async_reads.get_playlist(adb, playlist_id=playlist_id)
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
     # Obtener elementos de la playlist
-    items = playlist_crud.get_playlist_media(db, playlist_id=playlist_id)
+    items = await async_reads.get_playlist_media(adb, playlist_id=playlist_id)
     return items
 
 @router.get("/media", response_model=List[MediaRead])
 async def get_public_media(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    adb: AsyncDB = Depends(get_async_read_db)
 ):
     """
     Obtener archivos multimedia (público para reproductor)
     """
-    media_files = media_crud.list_media(db, skip=skip, limit=limit)
+    media_files = await async_reads.list_media(adb, skip=skip, limit=limit)
     
     # Usar la misma lógica que media.py para agregar URLs
     for media in media_files:
@@ -105,12 +160,12 @@ async def get_public_media(
 @router.get("/media/{media_id}", response_model=MediaRead)
 async def get_public_media_item(
     media_id: int,
-    db: Session = Depends(get_db)
+    adb: AsyncDB = Depends(get_async_read_db)
 ):
     """
     Obtener un archivo multimedia específico (público para reproductor)
     """
-    media = media_crud.get_media(db, media_id=media_id)
+    media = await async_reads.get_media(adb, media_id=media_id)
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
     
@@ -122,49 +177,98 @@ async def get_public_media_item(
     
     return media
 
+def _player_item(item, base_url: str) -> dict:
+    """Full player entry for a playlist element (same shape in full and delta responses)"""
+    media = item.media
+    # Usar la misma lógica que media.py para construir URLs
+    served_filename = os.path.basename(media.filepath)
+    file_url = f"{base_url}/uploads/{served_filename}"  # URL completa
+    return {
+        "id": media.id,
+        "filename": media.filename,
+        "filepath": media.filepath,
+        "media_type": media.media_type,
+        "duration": media.duration,
+        # Duración específica en esta playlist (None = usar la del media)
+        "playlist_duration": item.duration,
+        "effective_duration": item.duration if item.duration is not None else media.duration,
+        "created_at": media.created_at,
+        "file_url": file_url,
+        "served_filename": served_filename,
+        # HLS adaptativo si existe; el player cae a file_url si es None
+        "hls_url": f"{base_url}{media.hls_path}" if media.hls_path else None,
+        "renditions": media.renditions,
+        "order_index": item.order_index,
+        "playlist_media_id": item.id
+    }
+
+
+def _playlist_delta(db: Session, playlist_id: int, since_version: int, base_url: str) -> Optional[dict]:
+    """Changes after `since_version`, with the full entry of added items; None = reload everything"""
+    changes = playlist_crud.get_changes_since(db, playlist_id, since_version)
+    if changes is None:
+        return None
+    added_ids = {entry["media_id"] for change in changes if change.action == "media_added"
+                 for entry in change.diff.get("items", [])}
+    current = {}
+    if added_ids:
+        # Estado actual de los añadidos: los cambios posteriores del log son idempotentes sobre él
+        current = {
+            item.media_id: item for item in playlist_crud.get_playlist_media(db, playlist_id)
+            if item.media_id in added_ids and item.media
+        }
+    deltas = []
+    for change in changes:
+        delta = playlist_crud.change_payload(change)
+        if change.action == "media_added":
+            delta["items"] = [_player_item(current[e["media_id"]], base_url)
+                              for e in delta["items"] if e["media_id"] in current]
+        deltas.append(delta)
+    return {
+        "id": playlist_id,
+        "version": changes[-1].version if changes else since_version,
+        "since_version": since_version,
+        "full": False,
+        "changes": deltas
+    }
+
+
 @router.get("/playlists/{playlist_id}/complete")
 async def get_public_playlist_complete(
     playlist_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    since_version: Optional[int] = None,
+    adb: AsyncDB = Depends(get_async_read_db)
 ):
     """
-    Obtener playlist completa con todos los medios para el reproductor
+    Obtener playlist completa con todos los medios para el reproductor.
+    Con ?since_version=N devuelve solo los cambios posteriores a esa versión
+    ("full": false); si el historial ya no la cubre, la playlist completa.
     """
-    # Verificar que la playlist existe
+    # Construir base URL del servidor actual (forma parte de las URLs, y por eso de la clave)
+    base_url = f"{request.url.scheme}://{request.url.netloc}"
+    
+    # Las consultas y la construcción corren en el threadpool (ver app.db.async_db)
+    return await response_cache.respond_async(
+        request, ("player_playlist", playlist_id, base_url, since_version),
+        [playlist_scope(playlist_id), MEDIA],
+        lambda: adb.run(_playlist_complete, playlist_id, base_url, since_version)
+    )
+
+
+def _playlist_complete(db: Session, playlist_id: int, base_url: str, since_version: Optional[int]) -> dict:
+    if since_version is not None:
+        delta = _playlist_delta(db, playlist_id, since_version, base_url)
+        if delta is not None:
+            return delta
+    
+    # Verificar que la playlist existe (get_playlist ya carga playlist_media.media ordenados)
     playlist = playlist_crud.get_playlist(db, playlist_id=playlist_id)
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
-    # Obtener elementos de la playlist
-    playlist_items = playlist_crud.get_playlist_media(db, playlist_id=playlist_id)
-    
-    # Construir base URL del servidor actual
-    base_url = f"{request.url.scheme}://{request.url.netloc}"
-    
     # Obtener información completa de cada media
-    media_list = []
-    for item in playlist_items:
-        media = media_crud.get_media(db, media_id=item.media_id)
-        if media:
-            # Usar la misma lógica que media.py para construir URLs
-            import os
-            served_filename = os.path.basename(media.filepath)
-            file_url = f"{base_url}/uploads/{served_filename}"  # URL completa
-            
-            media_dict = {
-                "id": media.id,
-                "filename": media.filename,
-                "filepath": media.filepath,
-                "media_type": media.media_type,
-                "duration": media.duration,
-                "created_at": media.created_at,
-                "file_url": file_url,
-                "served_filename": served_filename,
-                "order_index": item.order_index,
-                "playlist_media_id": item.id
-            }
-            media_list.append(media_dict)
+    media_list = [_player_item(item, base_url) for item in playlist.playlist_media if item.media]
     
     # Ordenar por order_index
     media_list.sort(key=lambda x: x["order_index"])
@@ -176,7 +280,9 @@ async def get_public_playlist_complete(
         "description": playlist.description,
         "created_at": playlist.created_at,
         "updated_at": playlist.updated_at,
+        "version": playlist.version,
+        "full": True,
         "media_count": len(media_list),
-        "total_duration": sum(m["duration"] or 0 for m in media_list),
+        "total_duration": sum(m["effective_duration"] or 0 for m in media_list),
         "medias": media_list  # Cambiar de "media" a "medias" para coincidir con el frontend
     }
@@ -1,14 +1,18 @@
 """
 Playlist router for playlist management
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.db import get_db
+from app.db import get_db, get_read_db
+from app.db.async_db import AsyncDB, get_async_db
+from app.db.schemas.playlist_media_schema import PlaylistAddMediaRequest, PlaylistBulkAddResponse
 from app.api.routers.auth import get_current_user
 from app.db.models.user import User
-from app.core.websocket_manager import broadcast_event
+from app.core.websocket_manager import ADMIN_TOPIC, broadcast_event, playlist_topic
+from app.core.response_cache import MEDIA, SCHEDULES, playlist_scope, response_cache
+from app.core.playlist_snapshots import playlist_snapshots
 
 router = APIRouter()
 
@@ -31,23 +35,15 @@ def list_playlists(
 ):
     """List all playlists"""
     crud = get_playlist_crud()
-    playlists = crud.list_playlists(db, skip=skip, limit=limit)
+    # media_count y total_duration (duraciones efectivas) salen de una consulta agrupada
+    playlists = crud.get_playlist_summaries(db, skip=skip, limit=limit)
     
     # Convertir a dict para evitar problemas de serialización
     return [
         {
-            "id": p.id,
-            "name": p.name,
-            "description": p.description,
-            "created_at": p.created_at.isoformat() if p.created_at else None,
-            "updated_at": p.updated_at.isoformat() if p.updated_at else None,
-            # contar medios asociados a la playlist
-            "media_count": len(p.playlist_media) if hasattr(p, 'playlist_media') else 0,
-            # duración total de la playlist (suma de duraciones efectivas)
-            "total_duration": sum(
-                (pm.duration if pm.duration is not None else pm.media.duration)
-                for pm in getattr(p, 'playlist_media', [])
-            )
+            **p,
+            "created_at": p["created_at"].isoformat() if p["created_at"] else None,
+            "updated_at": p["updated_at"].isoformat() if p["updated_at"] else None,
         }
         for p in playlists
     ]
@@ -61,23 +57,15 @@ def list_playlists_public(
 ):
     """List all playlists (public endpoint for player)"""
     crud = get_playlist_crud()
-    playlists = crud.list_playlists(db, skip=skip, limit=limit)
+    # media_count y total_duration (duraciones efectivas) salen de una consulta agrupada
+    playlists = crud.get_playlist_summaries(db, skip=skip, limit=limit)
     
     # Convertir a dict para evitar problemas de serialización
     return [
         {
-            "id": p.id,
-            "name": p.name,
-            "description": p.description,
-            "created_at": p.created_at.isoformat() if p.created_at else None,
-            "updated_at": p.updated_at.isoformat() if p.updated_at else None,
-            # contar medios asociados a la playlist
-            "media_count": len(p.playlist_media) if hasattr(p, 'playlist_media') else 0,
-            # duración total de la playlist (suma de duraciones efectivas)
-            "total_duration": sum(
-                (pm.duration if pm.duration is not None else pm.media.duration)
-                for pm in getattr(p, 'playlist_media', [])
-            )
+            **p,
+            "created_at": p["created_at"].isoformat() if p["created_at"] else None,
+            "updated_at": p["updated_at"].isoformat() if p["updated_at"] else None,
         }
         for p in playlists
     ]
@@ -117,7 +105,7 @@ def create_playlist(
         "playlist_id": new_playlist.id,
         "playlist_name": new_playlist.name,
         "action": "created"
-    })
+    }, [ADMIN_TOPIC])
     
     return {
         "id": new_playlist.id,
@@ -247,7 +235,7 @@ def delete_playlist(
         "playlist_id": playlist_id,
         "playlist_name": playlist_name,
         "action": "deleted"
-    })
+    }, [ADMIN_TOPIC, playlist_topic(playlist_id)])
     
     return {"message": "Playlist deleted successfully"}
 
@@ -270,32 +258,77 @@ async def add_media_to_playlist(
     if 'media_id' in media_data:
         # Caso: agregar un solo medio
         request = PlaylistAddSingleMediaRequest(**media_data)
-        success = crud.add_single_media_to_playlist(db, playlist_id, request.media_id, request.duration)
+        change = crud.add_single_media_to_playlist(db, playlist_id, request.media_id, request.duration)
     elif 'media_ids' in media_data:
-        # Caso: agregar múltiples medios
-        request_data = media_data.copy()
-        request_data["playlist_id"] = playlist_id
-        request = PlaylistAddMediaRequest(**request_data)
-        success = crud.add_media_to_playlist(db, request)
+        # Caso: agregar múltiples medios (idempotente: volver a agregarlos no es un error)
+        request = PlaylistAddMediaRequest(**media_data)
+        outcome = crud.bulk_add_media_to_playlist(db, playlist_id, request.media_ids)
+        if outcome is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Playlist not found"
+            )
+        change, results = outcome
+        _broadcast_media_added(background_tasks, crud, playlist_id, change)
+        return {
+            "message": "Media added to playlist successfully",
+            "version": change.version if change else crud.get_playlist_version(db, playlist_id),
+            "results": results
+        }
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Either 'media_id' or 'media_ids' must be provided"
         )
     
-    if not success:
+    if not change:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Could not add media to playlist"
         )
     
-    # Notificar actualización de playlist vía WebSocket
+    _broadcast_media_added(background_tasks, crud, playlist_id, change)
+    return {"message": "Media added to playlist successfully", "version": change.version}
+
+
+def _broadcast_media_added(background_tasks: BackgroundTasks, crud, playlist_id: int, change) -> None:
+    """Notify the playlist update over WebSocket (version + delta); nothing when nothing changed"""
+    if not change:
+        return
     background_tasks.add_task(broadcast_event, "playlist_updated", {
         "playlist_id": playlist_id,
-        "action": "media_added"
-    })
+        "action": change.action,
+        "version": change.version,
+        "change": crud.change_payload(change)
+    }, [ADMIN_TOPIC, playlist_topic(playlist_id)])
+
+
+@router.post("/{playlist_id}/media/bulk", response_model=PlaylistBulkAddResponse)
+async def bulk_add_media_to_playlist(
+    playlist_id: int,
+    request: PlaylistAddMediaRequest,
+    background_tasks: BackgroundTasks,
+    adb: AsyncDB = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Add many media to a playlist, reporting the outcome of each id"""
+    crud = get_playlist_crud()
+    outcome = await adb.run(crud.bulk_add_media_to_playlist, playlist_id, request.media_ids)
+    if outcome is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playlist not found"
+        )
+    change, results = outcome
     
-    return {"message": "Media added to playlist successfully"}
+    # Un solo evento con todos los medios agregados
+    _broadcast_media_added(background_tasks, crud, playlist_id, change)
+    return {
+        "playlist_id": playlist_id,
+        "version": change.version if change else await adb.run(crud.get_playlist_version, playlist_id),
+        "added": sum(1 for result in results if result["status"] == "added"),
+        "results": results
+    }
 
 
 @router.delete("/{playlist_id}/media/{media_id}")
@@ -308,9 +341,9 @@ async def remove_media_from_playlist(
 ):
     """Remove media from playlist"""
     crud = get_playlist_crud()
-    success = crud.remove_media_from_playlist(db, playlist_id, media_id)
+    change = crud.remove_media_from_playlist(db, playlist_id, media_id)
     
-    if not success:
+    if not change:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Media not found in playlist"
@@ -319,11 +352,13 @@ async def remove_media_from_playlist(
     # Notificar actualización de playlist vía WebSocket
     background_tasks.add_task(broadcast_event, "playlist_updated", {
         "playlist_id": playlist_id,
-        "action": "media_removed",
-        "media_id": media_id
-    })
+        "media_id": media_id,
+        "action": change.action,
+        "version": change.version,
+        "change": crud.change_payload(change)
+    }, [ADMIN_TOPIC, playlist_topic(playlist_id)])
     
-    return {"message": "Media removed from playlist successfully"}
+    return {"message": "Media removed from playlist successfully", "version": change.version}
 
 
 @router.put("/{playlist_id}/media/{media_id}")
@@ -369,9 +404,9 @@ async def update_media_in_playlist(
         )
     
     crud = get_playlist_crud()
-    success = crud.update_media_duration_in_playlist(db, playlist_id, media_id, duration)
+    change = crud.update_media_duration_in_playlist(db, playlist_id, media_id, duration)
     
-    if not success:
+    if not change:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Media not found in playlist"
@@ -380,15 +415,60 @@ async def update_media_in_playlist(
     # Notificar actualización de playlist vía WebSocket
     background_tasks.add_task(broadcast_event, "playlist_updated", {
         "playlist_id": playlist_id,
-        "action": "media_duration_updated",
-        "media_id": media_id,
-        "new_duration": duration
-    })
+        "new_duration": duration,
+        "action": change.action,
+        "version": change.version,
+        "change": crud.change_payload(change)
+    }, [ADMIN_TOPIC, playlist_topic(playlist_id)])
     
     return {
         "message": "Media duration updated successfully",
         "media_id": media_id,
-        "new_duration": duration
+        "new_duration": duration,
+        "version": change.version
+    }
+
+
+@router.put("/{playlist_id}/reorder")
+async def reorder_playlist_media(
+    playlist_id: int,
+    order_data: dict,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Reorder media in playlist"""
+    crud = get_playlist_crud()
+    if crud.get_playlist_version(db, playlist_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playlist not found"
+        )
+    
+    # El panel envía 'media_order' y api.js 'media_orders': [{"media_id", "order_index"}, ...]
+    media_orders = order_data.get('media_orders', order_data.get('media_order'))
+    if not isinstance(media_orders, list) or not all(
+        isinstance(o, dict) and isinstance(o.get('media_id'), int) and isinstance(o.get('order_index'), int)
+        for o in media_orders
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'media_orders' must be a list of {media_id, order_index}"
+        )
+    
+    change = crud.reorder_playlist_media(db, playlist_id, media_orders)
+    if change:
+        # Solo viajan las posiciones que cambiaron, no la playlist completa
+        background_tasks.add_task(broadcast_event, "playlist_updated", {
+            "playlist_id": playlist_id,
+            "action": change.action,
+            "version": change.version,
+            "change": crud.change_payload(change)
+        }, [ADMIN_TOPIC, playlist_topic(playlist_id)])
+    
+    return {
+        "message": "Playlist reordered successfully",
+        "version": change.version if change else crud.get_playlist_version(db, playlist_id)
     }
 
 
@@ -481,9 +561,25 @@ def get_playlist_with_schedules(
 @router.get("/{playlist_id}/player")
 def get_playlist_for_player(
     playlist_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_read_db)
 ):
     """Get playlist with media schedules for player (public endpoint)"""
+    # ETag por versión de la playlist, media y schedules: 304 sin consultar la base
+    return response_cache.respond(
+        request, ("playlist_player", playlist_id),
+        [playlist_scope(playlist_id), MEDIA, SCHEDULES],
+        lambda: _playlist_for_player(db, playlist_id)
+    )
+
+
+def _playlist_for_player(db: Session, playlist_id: int) -> dict:
+    # Snapshot en memoria: un acierto no toca SQLite
+    snapshot = playlist_snapshots.get(playlist_id)
+    if snapshot is not None:
+        return snapshot
+    generation = playlist_snapshots.generation()
+
     crud = get_playlist_crud()
     
     # Obtener la playlist
@@ -495,37 +591,32 @@ def get_playlist_for_player(
         )
     
     # Obtener medios con sus schedules
+    import os
     from app.db.models.schedule import Schedule
-    from app.db.models.media import Media
-    from app.db.models.playlist_media import PlaylistMedia
     
-    playlist_medias = (
-        db.query(PlaylistMedia)
-        .filter(PlaylistMedia.playlist_id == playlist_id)
-        .order_by(PlaylistMedia.order_index)
-        .all()
-    )
+    # get_playlist ya trae elementos (ordenados) y medios con selectinload, no una consulta por elemento
+    playlist_medias = playlist.playlist_media
+    media_ids = {pm.media_id for pm in playlist_medias}
+    
+    # Schedule activo de cada media (el primero creado), todos en una consulta
+    schedules = {}
+    if media_ids:
+        for schedule in (
+            db.query(Schedule)
+            .filter(Schedule.media_id.in_(media_ids), Schedule.is_active == True)
+            .order_by(Schedule.id)
+        ):
+            schedules.setdefault(schedule.media_id, schedule)
     
     medias_with_schedules = []
     for pm in playlist_medias:
-        # Obtener el media
-        media = db.query(Media).filter(Media.id == pm.media_id).first()
+        media = pm.media
         if not media:
             continue
-            
-        # Buscar schedule activo para este media
-        schedule = (
-            db.query(Schedule)
-            .filter(
-                Schedule.media_id == media.id,
-                Schedule.is_active == True
-            )
-            .first()
-        )
+        schedule = schedules.get(media.id)
         
         # Construir respuesta
         # Crear URL correcta para servir archivos
-        import os
         served_filename = os.path.basename(media.filepath)
         file_url = f"/uploads/{served_filename}"
             
@@ -535,6 +626,9 @@ def get_playlist_for_player(
             "served_filename": served_filename,
             "file_url": file_url,
             "filepath": media.filepath,
+            # HLS adaptativo si existe; el player cae a file_url si es None
+            "hls_url": media.hls_path,
+            "renditions": media.renditions,
             "media_type": media.media_type,
             "duration": pm.duration if pm.duration is not None else media.duration,
             "order_index": pm.order_index,
@@ -558,7 +652,7 @@ def get_playlist_for_player(
         
         medias_with_schedules.append(media_data)
     
-    return {
+    payload = {
         "id": playlist.id,
         "name": playlist.name,
         "description": playlist.description,
@@ -566,3 +660,6 @@ def get_playlist_for_player(
         "total_medias": len(medias_with_schedules),
         "created_at": playlist.created_at.isoformat() if playlist.created_at else None
     }
+    # No se guarda si hubo una invalidación mientras se leía
+    playlist_snapshots.put(playlist_id, payload, media_ids, generation)
+    return payload
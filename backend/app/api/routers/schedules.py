@@ -1,16 +1,17 @@
 """
 Schedule router for content scheduling
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date, timedelta
 
 from app.db import get_db
-from app.db.crud import schedule_crud
+from app.db.crud import schedule_crud, playout_crud
 from app.db.schemas.schedule_schema import ScheduleCreate, ScheduleRead, ScheduleUpdate
 from app.api.routers.auth import get_current_user
 from app.db.models.user import User
-from app.core.websocket_manager import broadcast_event
+from app.core.websocket_manager import ADMIN_TOPIC, broadcast_event, playlist_topic
 
 router = APIRouter()
 
@@ -97,7 +98,7 @@ def create_playlist(
         playlist_in = PlaylistCreate(**playlist_data)
         new_playlist = playlist_crud.create_playlist(db=db, playlist_in=playlist_in)
         
-        background_tasks.add_task(broadcast_event, "playlist_created", {"id": new_playlist.id})
+        background_tasks.add_task(broadcast_event, "playlist_created", {"id": new_playlist.id}, [ADMIN_TOPIC])
         
         return {
             "id": new_playlist.id,
@@ -177,7 +178,7 @@ def update_playlist(
                 detail="Playlist not found"
             )
         
-        background_tasks.add_task(broadcast_event, "playlist_updated", {"id": playlist.id})
+        background_tasks.add_task(broadcast_event, "playlist_updated", {"id": playlist.id}, [ADMIN_TOPIC, playlist_topic(playlist.id)])
         
         return {
             "id": playlist.id,
@@ -212,7 +213,7 @@ def delete_playlist(
                 detail="Playlist not found"
             )
         
-        background_tasks.add_task(broadcast_event, "playlist_deleted", {"id": playlist_id})
+        background_tasks.add_task(broadcast_event, "playlist_deleted", {"id": playlist_id}, [ADMIN_TOPIC, playlist_topic(playlist_id)])
         return {"message": "Playlist deleted successfully"}
     except ImportError:
         raise HTTPException(
@@ -234,7 +235,7 @@ def create_schedule(
 ):
     """Create new schedule"""
     new_schedule = schedule_crud.create_schedule(db=db, schedule_in=schedule)
-    background_tasks.add_task(broadcast_event, "schedule_created", {"id": new_schedule.id})
+    background_tasks.add_task(broadcast_event, "schedule_created", {"id": new_schedule.id}, [ADMIN_TOPIC])
     return new_schedule
 
 
@@ -292,7 +293,7 @@ def update_schedule(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Schedule not found"
         )
-    background_tasks.add_task(broadcast_event, "schedule_updated", {"id": schedule.id})
+    background_tasks.add_task(broadcast_event, "schedule_updated", {"id": schedule.id}, [ADMIN_TOPIC])
     return schedule
 
 
@@ -310,7 +311,7 @@ def delete_schedule(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Schedule not found"
         )
-    background_tasks.add_task(broadcast_event, "schedule_deleted", {"id": schedule_id})
+    background_tasks.add_task(broadcast_event, "schedule_deleted", {"id": schedule_id}, [ADMIN_TOPIC])
     return {"message": "Schedule deleted successfully"}
 
 
@@ -436,6 +437,63 @@ def get_schedules_for_date(
         )
 
 
+@router.get("/playout/plan", tags=["advanced-scheduling"])
+def get_playout_plan(
+    start_date: Optional[date] = None,
+    days: int = Query(playout_crud.PLAN_DAYS, ge=1, le=playout_crud.MAX_PLAN_DAYS),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Priority-resolved playout plan for `days` days from `start_date` (today by default).
+    
+    Segments are sorted, never overlap and cover every day completely; a segment
+    without schedule means the screen plays its default playlist.
+    """
+    from app.db.models.media import Media
+    from app.db.models.playlist import Playlist
+    
+    start = start_date or date.today()
+    end = start + timedelta(days=days - 1)
+    # Los días que aún no están generados se materializan bajo demanda
+    playout_crud.ensure_days(db, start, end)
+    total, segments = playout_crud.list_segments(db, start, end, skip=skip, limit=limit)
+    
+    # Nombres del contenido de la página en dos consultas
+    media_ids = {s.media_id for s in segments if s.media_id}
+    playlist_ids = {s.playlist_id for s in segments if s.playlist_id}
+    media_names = dict(db.query(Media.id, Media.filename).filter(Media.id.in_(media_ids)).all()) if media_ids else {}
+    playlist_names = dict(db.query(Playlist.id, Playlist.name).filter(Playlist.id.in_(playlist_ids)).all()) if playlist_ids else {}
+    
+    items = []
+    for segment in segments:
+        content = None
+        if segment.content_type == "media":
+            content = {"type": "media", "id": segment.media_id, "name": media_names.get(segment.media_id)}
+        elif segment.content_type == "playlist":
+            content = {"type": "playlist", "id": segment.playlist_id, "name": playlist_names.get(segment.playlist_id)}
+        items.append({
+            "starts_at": segment.starts_at.isoformat(),
+            "ends_at": segment.ends_at.isoformat(),
+            "duration_seconds": int((segment.ends_at - segment.starts_at).total_seconds()),
+            "source": "schedule" if segment.schedule_id else "default",
+            "schedule_id": segment.schedule_id,
+            "priority": segment.priority,
+            "content": content
+        })
+    
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "items": items
+    }
+
+
 @router.get("/media/{media_id}", tags=["advanced-scheduling"])
 def get_schedules_by_media(
     media_id: int,
@@ -531,7 +589,7 @@ def toggle_schedule_status(
     background_tasks.add_task(broadcast_event, "schedule_toggled", {
         "id": schedule.id,
         "is_active": schedule.is_active
-    })
+    }, [ADMIN_TOPIC])
     
     return {
         "id": schedule.id,
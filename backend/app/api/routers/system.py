@@ -0,0 +1,37 @@
+"""
+System router for runtime capabilities
+"""
+from fastapi import APIRouter, Depends
+
+from app.api.routers.auth import get_current_user
+from app.db.models.user import User
+from app.utils import ffmpeg
+from app.core.playlist_snapshots import playlist_snapshots
+from app.core.response_cache import response_cache
+
+router = APIRouter()
+
+
+@router.get("/capabilities")
+def get_capabilities(current_user: User = Depends(get_current_user)):
+    """Get the cached FFmpeg capabilities (binaries, version, encoders, decoders, hwaccels)"""
+    return {"ffmpeg": ffmpeg.probe_capabilities()}
+
+
+@router.post("/capabilities/refresh")
+def refresh_capabilities(current_user: User = Depends(get_current_user)):
+    """Re-run the FFmpeg capability probe (e.g. after installing FFmpeg)"""
+    return {"ffmpeg": ffmpeg.probe_capabilities(refresh=True)}
+
+
+@router.get("/cache-stats")
+def get_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit/miss/eviction counters of the in-process player caches"""
+    return {
+        "playlist_snapshots": playlist_snapshots.stats(),
+        "responses": {
+            "hits": response_cache.hits,
+            "misses": response_cache.misses,
+            "not_modified": response_cache.not_modified,
+        },
+    }
@@ -1,14 +1,29 @@
+import json
+from typing import Optional
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.core.websocket_manager import manager
 
 router = APIRouter()
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, topics: Optional[str] = None):
+    requested = [t.strip() for t in (topics or "").split(",") if t.strip()]
     await manager.connect(websocket)
+    if requested:
+        await manager.handle_message(websocket, {"action": "subscribe", "topics": requested})
     try:
         while True:
-            # Receive and ignore incoming messages; clients may use this as keepalive
-            await websocket.receive_text()
+            # {"action": "subscribe"|"unsubscribe", "topics": [...]}; cualquier otro texto es keepalive
+            text = await websocket.receive_text()
+            manager.touch(websocket, text)
+            try:
+                message = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(message, dict) and "action" in message:
+                await manager.handle_message(websocket, message)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
@@ -9,6 +9,17 @@ from pydantic import BaseSettings
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./signance.db"
+    # Perfil SQLite (app/db/engine_profile.py)
+    DB_WAL: bool = True
+    DB_SYNCHRONOUS: str = "NORMAL"  # NORMAL es seguro con WAL; FULL hace fsync en cada commit
+    DB_BUSY_TIMEOUT: int = 5000  # Milisegundos esperando el lock de escritura antes de fallar
+    DB_CACHE_SIZE_KB: int = 16384  # Caché de páginas por conexión
+    DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_MAX_CONNECTIONS: int = 16  # Total entre todos los workers (por pool)
+    DB_POOL_OVERFLOW: int = 4
+    DB_READ_POOL: bool = True  # Pool de solo lectura para los endpoints del player
+    DB_BACKUP_BEFORE_MIGRATE: bool = True  # Copia <db>.schema-vN.bak antes de aplicar migraciones
+    WEB_CONCURRENCY: int = 1  # Workers de uvicorn (la misma variable que lee uvicorn --workers)
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production-9876543210abcdef"
@@ -34,8 +45,40 @@ class Settings(BaseSettings):
     # Media
     UPLOAD_DIR: str = "media/uploads"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB por lectura al guardar uploads
     ALLOWED_EXTENSIONS: List[str] = [".mp4", ".avi", ".mov", ".jpg", ".jpeg", ".png", ".gif"]
     
+    # Uploads reanudables (por bloques)
+    RESUMABLE_UPLOAD_DIR: str = "media/resumable"  # Fuera de UPLOAD_DIR para no servir archivos parciales
+    RESUMABLE_UPLOAD_MAX_SIZE: int = 4 * 1024 * 1024 * 1024  # 4GB
+    RESUMABLE_CHUNK_MAX_SIZE: int = 16 * 1024 * 1024  # 16MB por bloque
+    RESUMABLE_UPLOAD_TTL_HOURS: int = 24
+    
+    # Procesamiento de media en segundo plano (ffprobe/thumbnail)
+    MEDIA_JOB_WORKERS: int = 2
+    MEDIA_JOB_MAX_ATTEMPTS: int = 3
+    MEDIA_JOB_RETRY_DELAY: float = 5.0  # Segundos, se duplica en cada reintento
+    MEDIA_JOB_LEASE_SECONDS: float = 120.0  # Un trabajo "running" sin latido en este tiempo vuelve a la cola
+    MEDIA_INGEST_PROXY: bool = True  # Proxy de baja resolución para previsualizar en el admin
+    MEDIA_INGEST_MEZZANINE: bool = False  # Mezzanine H.264 normalizado (duplica el espacio por video)
+    
+    # HLS adaptativo (escalera 1080p/720p/480p generada tras subir un video)
+    HLS_ENABLED: bool = True
+    HLS_SEGMENT_TIME: int = 6  # Segundos por segmento
+    
+    # WebSocket: cola de salida por conexión y detección de pantallas caídas
+    WS_OUTBOX_SIZE: int = 256  # Mensajes pendientes por conexión
+    WS_SLOW_CONSUMER_POLICY: str = "drop_oldest"  # drop_oldest | drop_newest | disconnect
+    WS_SEND_TIMEOUT: float = 10.0  # Segundos; un envío más lento desconecta al cliente
+    WS_HEARTBEAT_INTERVAL: float = 20.0
+    WS_HEARTBEAT_TIMEOUT: float = 60.0  # Sin pong en este tiempo se desconecta (clientes que responden)
+    
+    # Bus de eventos entre procesos: "local" (un worker) o "sqlite" (uvicorn --workers N, sin broker)
+    EVENT_BUS_BACKEND: str = "local"
+    EVENT_BUS_PATH: str = "event_bus.db"
+    EVENT_BUS_POLL_INTERVAL: float = 0.1  # Segundos entre lecturas del journal
+    EVENT_BUS_RETENTION: float = 60.0  # Segundos que se conservan los eventos
+    
     class Config:
         env_file = ".env"
 
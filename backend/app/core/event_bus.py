@@ -0,0 +1,191 @@
+"""
+Event bus behind broadcast_event
+
+With several uvicorn workers (``--workers 4``) each process has its own
+WebSocket connections, so an event raised in one worker has to reach the
+others. Backends:
+
+- ``local``: delivers in-process only (single worker, the default).
+- ``sqlite``: every publish is delivered locally and appended to a small
+  SQLite journal (EVENT_BUS_PATH, WAL mode) that the other workers poll every
+  EVENT_BUS_POLL_INTERVAL seconds. No external broker; old rows are pruned
+  after EVENT_BUS_RETENTION seconds.
+
+Each process delivers the events it reads to its own sockets through the
+``deliver`` callback; ``remote listeners`` are also told about events that
+came from another worker (e.g. to reload the schedule index).
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, Dict[str, Any], Optional[List[str]]], Awaitable[None]]
+RemoteListener = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class LocalEventBus:
+    """In-process bus: publish delivers directly to this worker's sockets"""
+
+    def __init__(self) -> None:
+        self._deliver: Optional[Deliver] = None
+        self._remote_listeners: List[RemoteListener] = []
+
+    def set_deliver(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def add_remote_listener(self, callback: RemoteListener) -> None:
+        self._remote_listeners.append(callback)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, event: str, data: Dict[str, Any], topics: Optional[Iterable[str]] = None) -> None:
+        if self._deliver is not None:
+            await self._deliver(event, data, list(topics) if topics is not None else None)
+
+
+class SQLiteEventBus(LocalEventBus):
+    """Multi-process bus over a shared SQLite journal polled by every worker"""
+
+    def __init__(self, path: str, poll_interval: float = 0.1, retention: float = 60.0) -> None:
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        # Identifica a este proceso para no entregar dos veces sus propios eventos
+        self.origin = uuid.uuid4().hex
+        self._last_id = 0
+        self._last_prune = 0.0
+        self._task: Optional[asyncio.Task] = None
+        # Una conexión por proceso, usada desde hilos del pool: se serializa con un lock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+        return self._conn
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _setup(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bus_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " origin TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " payload TEXT NOT NULL)"
+            )
+            # Un worker nuevo no repite eventos anteriores a su arranque
+            self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bus_events").fetchone()[0]
+
+    def _append(self, payload: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO bus_events (origin, created_at, payload) VALUES (?, ?, ?)",
+                (self.origin, time.time(), payload),
+            )
+
+    def _read(self) -> List[Tuple[int, str, str]]:
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT id, origin, payload FROM bus_events WHERE id > ? ORDER BY id", (self._last_id,)
+            ).fetchall()
+            now = time.time()
+            if now - self._last_prune > self.retention:
+                self._last_prune = now
+                conn.execute("DELETE FROM bus_events WHERE created_at < ?", (now - self.retention,))
+        if rows:
+            self._last_id = rows[-1][0]
+        return rows
+
+    async def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        await asyncio.to_thread(self._setup)
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._close)
+
+    async def publish(self, event: str, data: Dict[str, Any], topics: Optional[Iterable[str]] = None) -> None:
+        topics = list(topics) if topics is not None else None
+        # Entrega local inmediata; el resto de los workers lo leen del journal
+        await super().publish(event, data, topics)
+        payload = json.dumps({"event": event, "data": data, "topics": topics}, default=str)
+        try:
+            await asyncio.to_thread(self._append, payload)
+        except sqlite3.Error:
+            logger.exception("No se pudo publicar el evento %s en el bus", event)
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._read)
+                for _, origin, payload in rows:
+                    if origin == self.origin:
+                        continue
+                    message = json.loads(payload)
+                    await self._dispatch_remote(message["event"], message["data"], message.get("topics"))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error leyendo el bus de eventos")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _dispatch_remote(self, event: str, data: Dict[str, Any], topics: Optional[List[str]]) -> None:
+        for listener in self._remote_listeners:
+            try:
+                await listener(event, data)
+            except Exception:
+                logger.exception("Error en listener remoto de %s", event)
+        if self._deliver is not None:
+            await self._deliver(event, data, topics)
+
+
+def create_event_bus(backend: Optional[str] = None) -> LocalEventBus:
+    backend = backend or settings.EVENT_BUS_BACKEND
+    if backend == "local":
+        return LocalEventBus()
+    if backend == "sqlite":
+        return SQLiteEventBus(
+            settings.EVENT_BUS_PATH,
+            poll_interval=settings.EVENT_BUS_POLL_INTERVAL,
+            retention=settings.EVENT_BUS_RETENTION,
+        )
+    raise ValueError(f"EVENT_BUS_BACKEND no soportado: {backend}")
+
+
+event_bus = create_event_bus()
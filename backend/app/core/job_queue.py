@@ -0,0 +1,274 @@
+"""
+Background media-processing job queue
+
+Jobs are persisted in the media_jobs table and executed by a small thread
+pool, so ffprobe/ffmpeg never run on the event loop. Every uvicorn worker
+runs its own queue over the same table: a job is claimed with a conditional
+UPDATE (queued -> running) so exactly one of them executes it. While it runs,
+its worker renews a lease (heartbeat_at); a running job whose lease expired
+(the worker crashed or was restarted) goes back to the queue.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.database import SessionLocal
+from app.db.crud import media_crud, media_job_crud
+from app.db.models.media import Media, MediaStatus
+from app.db.models.media_job import MediaJob
+from app.core.websocket_manager import broadcast_event, media_topics
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[float], None]
+
+# Intervalo mínimo entre actualizaciones de progreso persistidas/emitidas
+PROGRESS_MIN_INTERVAL = 1.0
+
+
+def process_media(db: Session, media: Media, report_progress: ProgressCallback) -> Dict[str, Any]:
+    """
+    Probe a video and produce its thumbnail, poster, preview proxy and
+    (optionally) mezzanine in a single FFmpeg decode pass
+    """
+    from app.utils import ffmpeg
+
+    disk_path = media_crud.get_media_disk_path(media)
+    info = ffmpeg.get_media_info(disk_path)
+    duration = float(info.get("duration") or media.duration or 0)
+
+    base = disk_path.parent / disk_path.stem
+    outputs = ffmpeg.ingest_media(
+        disk_path,
+        duration,
+        thumbnail_path=Path(f"{base}_thumb.jpg"),
+        poster_path=Path(f"{base}_poster.jpg"),
+        proxy_path=Path(f"{base}_proxy.mp4") if settings.MEDIA_INGEST_PROXY else None,
+        mezzanine_path=Path(f"{base}_mezzanine.mp4") if settings.MEDIA_INGEST_MEZZANINE else None,
+        on_progress=report_progress
+    )
+    return {
+        "duration": int(duration) or media.duration,
+        "derivatives": {name: f"/uploads/{path.name}" for name, path in outputs.items()},
+    }
+
+
+def package_hls(db: Session, media: Media, report_progress: ProgressCallback) -> Dict[str, Any]:
+    """Package a video as a multi-rendition HLS ladder with a master playlist"""
+    from app.utils import ffmpeg
+
+    disk_path = media_crud.get_media_disk_path(media)
+    streams = ffmpeg.get_media_info(disk_path).get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    has_audio = any(s.get("codec_type") == "audio" for s in streams)
+
+    output_dir = media_crud.get_media_hls_dir(media)
+    renditions = ffmpeg.transcode_to_hls_ladder(
+        disk_path,
+        output_dir,
+        renditions=ffmpeg.select_hls_ladder(video.get("height")),
+        segment_time=settings.HLS_SEGMENT_TIME,
+        has_audio=has_audio
+    )
+    return {"hls_path": media_crud.get_media_hls_url(media), "renditions": renditions}
+
+
+# job_type -> handler(db, media, report_progress) que devuelve los campos de Media a actualizar
+JOB_HANDLERS: Dict[str, Callable[[Session, Media, ProgressCallback], Dict[str, Any]]] = {
+    "process": process_media,
+    "hls": package_hls,
+}
+
+# Solo estos trabajos determinan Media.status; el resto (p.ej. HLS) es opcional
+STATUS_JOB_TYPES = {"process"}
+
+
+class MediaJobQueue:
+    """Thread-pool worker queue backed by the media_jobs table"""
+
+    def __init__(self, max_workers: int, session_factory: Callable[[], Session] = SessionLocal,
+                 lease_seconds: Optional[float] = None) -> None:
+        self.max_workers = max_workers
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds or settings.MEDIA_JOB_LEASE_SECONDS
+        self.handlers = dict(JOB_HANDLERS)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timers: set = set()
+        self._active: set = set()  # Trabajos que ejecuta este proceso (se renueva su lease)
+        self._stopped = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Start the worker pool and resume queued jobs and those whose lease expired"""
+        if self._executor is not None:
+            return
+        self._loop = loop
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="media-job")
+
+        db = self.session_factory()
+        try:
+            media_job_crud.requeue_stale_jobs(db, self.lease_seconds)
+            pending = media_job_crud.get_pending_job_ids(db)
+        finally:
+            db.close()
+        if pending:
+            logger.info("Reanudando %d trabajos de media pendientes", len(pending))
+        for job_id in pending:
+            self.submit(job_id)
+
+        self._stopped.clear()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="media-job-lease", daemon=True)
+        self._heartbeat_thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker pool; unfinished jobs stay pending in the database"""
+        self._stopped.set()
+        with self._lock:
+            for timer in self._timers:
+                timer.cancel()
+            self._timers.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _heartbeat_loop(self) -> None:
+        """Renew the lease of our running jobs and adopt jobs abandoned by other workers"""
+        while not self._stopped.wait(self.lease_seconds / 3):
+            db = self.session_factory()
+            try:
+                with self._lock:
+                    active = list(self._active)
+                media_job_crud.heartbeat(db, active)
+                requeued = media_job_crud.requeue_stale_jobs(db, self.lease_seconds)
+            except Exception:
+                logger.exception("Error renovando el lease de los trabajos de media")
+                requeued = []
+            finally:
+                db.close()
+            for job_id in requeued:
+                self.submit(job_id)
+
+    def enqueue(self, db: Session, media_id: int, job_type: str = "process") -> MediaJob:
+        """Persist a new job and hand it to the workers"""
+        job = media_job_crud.create_job(db, media_id, job_type, settings.MEDIA_JOB_MAX_ATTEMPTS)
+        self.submit(job.id)
+        return job
+
+    def submit(self, job_id: int, delay: float = 0) -> None:
+        """Schedule a persisted job; without a running pool it waits for the next start()"""
+        with self._lock:
+            if self._executor is None:
+                return
+            if delay > 0:
+                timer = threading.Timer(delay, self._submit_from_timer, args=(job_id,))
+                timer.daemon = True
+                self._timers.add(timer)
+                timer.start()
+            else:
+                self._executor.submit(self._run, job_id)
+
+    def _submit_from_timer(self, job_id: int) -> None:
+        with self._lock:
+            self._timers = {t for t in self._timers if t.is_alive() and t is not threading.current_thread()}
+        self.submit(job_id)
+
+    def _emit(self, event: str, data: Dict[str, Any], topics: Optional[Iterable[str]] = None) -> None:
+        """Broadcast from a worker thread through the application event loop"""
+        if self._loop is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(broadcast_event(event, data, topics), self._loop)
+
+    def _progress_reporter(self, job_id: int, media_id: int, job_type: str) -> ProgressCallback:
+        """Build a throttled callback that persists and broadcasts job progress"""
+        last = {"at": 0.0, "percent": -1.0}
+
+        def report(percent: float) -> None:
+            now = time.monotonic()
+            if percent < 100 and (now - last["at"] < PROGRESS_MIN_INTERVAL or percent - last["percent"] < 1):
+                return
+            last.update(at=now, percent=percent)
+            db = self.session_factory()
+            try:
+                media_job_crud.update_progress(db, job_id, round(percent, 1))
+            finally:
+                db.close()
+            self._emit("media_processing_progress", {
+                "id": media_id,
+                "job_id": job_id,
+                "job_type": job_type,
+                "progress": round(percent, 1)
+            }, media_topics(media_id))
+
+        return report
+
+    def _run(self, job_id: int) -> None:
+        db = self.session_factory()
+        try:
+            # Solo un worker gana el UPDATE condicional; el resto lo descarta
+            job = media_job_crud.claim_job(db, job_id)
+            if not job:
+                return
+            with self._lock:
+                self._active.add(job.id)
+
+            media = media_crud.get_media(db, job.media_id)
+            handler = self.handlers.get(job.job_type)
+            if not media or not handler:
+                reason = "Media no longer exists" if not media else f"Unknown job type '{job.job_type}'"
+                media_job_crud.mark_error(db, job, reason, final=True)
+                return
+
+            try:
+                fields = handler(db, media, self._progress_reporter(job.id, job.media_id, job.job_type)) or {}
+            except Exception as e:
+                db.rollback()
+                final = job.attempts >= job.max_attempts
+                logger.warning("Trabajo %s de media %s falló (intento %d/%d): %s",
+                               job.id, job.media_id, job.attempts, job.max_attempts, e)
+                media_job_crud.mark_error(db, job, str(e), final=final)
+                if final:
+                    if job.job_type in STATUS_JOB_TYPES:
+                        media_crud.update_media_processing(db, job.media_id, MediaStatus.failed)
+                    self._emit("media_processed", {
+                        "id": job.media_id,
+                        "job_id": job.id,
+                        "job_type": job.job_type,
+                        "status": MediaStatus.failed.value,
+                        "error": str(e)
+                    }, media_topics(job.media_id, media_crud.get_media_playlist_ids(db, job.media_id)))
+                else:
+                    self.submit(job.id, delay=settings.MEDIA_JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+                return
+
+            status = MediaStatus.ready if job.job_type in STATUS_JOB_TYPES else None
+            media = media_crud.update_media_processing(db, job.media_id, status, **fields)
+            media_job_crud.mark_done(db, job)
+            self._emit("media_processed", {
+                "id": job.media_id,
+                "job_id": job.id,
+                "job_type": job.job_type,
+                "status": media.status if media else MediaStatus.ready.value,
+                "duration": media.duration if media else None,
+                "hls_path": media.hls_path if media else None
+            }, media_topics(job.media_id, media_crud.get_media_playlist_ids(db, job.media_id)))
+        except Exception:
+            logger.exception("Error inesperado ejecutando el trabajo de media %s", job_id)
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+            db.close()
+
+
+job_queue = MediaJobQueue(settings.MEDIA_JOB_WORKERS)
@@ -0,0 +1,297 @@
+"""
+Media delivery for /uploads
+
+Replacement for the StaticFiles mount tuned for screens that loop the same
+videos all day:
+
+- Strong ETags and Last-Modified, with If-None-Match / If-Modified-Since
+  answered by 304 Not Modified.
+- Single and multiple byte ranges (206, multipart/byteranges) plus If-Range.
+- ``Cache-Control: immutable`` for content-addressed and UUID filenames,
+  whose content never changes; derivatives are revalidated with the ETag.
+- Zero-copy ``sendfile`` through the ASGI ``http.response.zerocopysend``
+  extension when the server offers it, chunked reads off the event loop
+  otherwise.
+"""
+import mimetypes
+import os
+import re
+import stat
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+# Tipos que mimetypes no conoce en todas las plataformas (HLS)
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+mimetypes.add_type("video/mp4", ".m4s")
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# <sha256>.ext (almacenamiento por contenido) o <uuid4>.ext (subidas antiguas)
+_IMMUTABLE_NAME = re.compile(
+    r"^(?:[0-9a-f]{64}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\.[A-Za-z0-9]+$"
+)
+_SHA256_NAME = re.compile(r"^([0-9a-f]{64})\.[A-Za-z0-9]+$")
+
+Range = Tuple[int, int]  # [start, end] inclusivo, como en Content-Range
+
+
+def is_immutable_name(filename: str) -> bool:
+    """True for stored originals, whose name changes whenever the content does"""
+    return bool(_IMMUTABLE_NAME.match(filename))
+
+
+def make_etag(filename: str, st: os.stat_result) -> str:
+    """Strong ETag: the content hash when the name carries it, size+mtime otherwise"""
+    match = _SHA256_NAME.match(filename)
+    if match:
+        return f'"{match.group(1)}"'
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def parse_range_header(value: str, size: int, max_ranges: int = 16) -> Optional[List[Range]]:
+    """
+    Parse a ``Range: bytes=...`` header against a resource of `size` bytes.
+
+    Returns the satisfiable ranges sorted and coalesced, an empty list when
+    none is satisfiable (416), or None when the header must be ignored
+    (malformed, other unit or too many ranges: serve the whole file).
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    parts = [p.strip() for p in spec.split(",") if p.strip()]
+    if not parts or len(parts) > max_ranges:
+        return None
+
+    ranges: List[Range] = []
+    for part in parts:
+        start_text, sep, end_text = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if start_text == "":
+                # Sufijo: los últimos N bytes
+                suffix = int(end_text)
+                if suffix < 0:
+                    return None
+                if suffix == 0 or size == 0:
+                    continue
+                ranges.append((max(size - suffix, 0), size - 1))
+                continue
+            start = int(start_text)
+            end = int(end_text) if end_text else None
+        except ValueError:
+            return None
+        if start < 0 or (end is not None and end < start):
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _etag_matches(header: str, etag: str, weak: bool) -> bool:
+    """Compare an If-None-Match / If-Range list against our ETag"""
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class MediaFiles:
+    """ASGI app serving files from UPLOAD_DIR with caching and range support"""
+
+    def __init__(self, directory: str, chunk_size: int = 256 * 1024, max_ranges: int = 16) -> None:
+        self.directory = os.path.realpath(directory)
+        self.chunk_size = chunk_size
+        self.max_ranges = max_ranges
+
+    def lookup(self, path: str) -> Tuple[Optional[str], Optional[os.stat_result]]:
+        """Resolve a request path inside the directory, refusing traversal"""
+        relative = os.path.normpath(os.path.join(*path.split("/"))) if path.strip("/") else ""
+        full_path = os.path.realpath(os.path.join(self.directory, relative))
+        if os.path.commonpath([full_path, self.directory]) != self.directory:
+            return None, None
+        try:
+            st = os.stat(full_path)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return None, None
+        if not stat.S_ISREG(st.st_mode):
+            return None, None
+        return full_path, st
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await self._send_empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+
+        full_path, st = await anyio.to_thread.run_sync(self.lookup, scope["path"])
+        if full_path is None:
+            await self._send_empty(send, 404, [], body=b"Not Found")
+            return
+
+        filename = os.path.basename(full_path)
+        etag = make_etag(filename, st)
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+        base_headers = [
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", last_modified.encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+            (b"cache-control", (IMMUTABLE_CACHE_CONTROL if is_immutable_name(filename)
+                                else REVALIDATE_CACHE_CONTROL).encode("latin-1")),
+        ]
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if _etag_matches(if_none_match, etag, weak=True):
+                await self._send_empty(send, 304, base_headers)
+                return
+        elif request_headers.get("if-modified-since") and _not_modified_since(
+            request_headers["if-modified-since"], st.st_mtime
+        ):
+            await self._send_empty(send, 304, base_headers)
+            return
+
+        size = st.st_size
+        ranges = None
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_allows(request_headers.get("if-range"), etag, last_modified):
+            ranges = parse_range_header(range_header, size, self.max_ranges)
+
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        if ranges is None:
+            headers = base_headers + [
+                (b"content-type", content_type.encode("latin-1")),
+                (b"content-length", str(size).encode("latin-1")),
+            ]
+            await self._send_file(scope, send, 200, headers, full_path, [(0, size - 1)] if size else [])
+        elif not ranges:
+            await self._send_empty(send, 416, base_headers + [
+                (b"content-range", f"bytes */{size}".encode("latin-1"))
+            ])
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            headers = base_headers + [
+                (b"content-type", content_type.encode("latin-1")),
+                (b"content-range", f"bytes {start}-{end}/{size}".encode("latin-1")),
+                (b"content-length", str(end - start + 1).encode("latin-1")),
+            ]
+            await self._send_file(scope, send, 206, headers, full_path, ranges)
+        else:
+            await self._send_multipart(scope, send, base_headers, full_path, ranges, size, content_type)
+
+    @staticmethod
+    def _if_range_allows(if_range: Optional[str], etag: str, last_modified: str) -> bool:
+        """If-Range: honour the Range only if the validator still matches"""
+        if if_range is None:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            # If-Range exige comparación fuerte
+            return if_range.strip() == etag
+        return if_range.strip() == last_modified
+
+    @staticmethod
+    async def _send_empty(send: Send, status_code: int, headers: list, body: bytes = b"") -> None:
+        if status_code != 304:
+            headers = headers + [(b"content-length", str(len(body)).encode("latin-1"))]
+        if body:
+            headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_file(self, scope: Scope, send: Send, status_code: int, headers: list,
+                         full_path: str, ranges: List[Range]) -> None:
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        if scope["method"] == "HEAD" or not ranges:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_ranges(scope, send, full_path, [(r, b"") for r in ranges], b"")
+
+    async def _send_multipart(self, scope: Scope, send: Send, base_headers: list, full_path: str,
+                              ranges: List[Range], size: int, content_type: str) -> None:
+        boundary = uuid.uuid4().hex
+        parts = []
+        for start, end in ranges:
+            part_header = (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode("latin-1")
+            # Cada parte tras la primera va precedida del CRLF que cierra la anterior
+            parts.append(((start, end), (b"\r\n" if parts else b"") + part_header))
+        trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        length = sum(len(prefix) + end - start + 1 for (start, end), prefix in parts) + len(trailer)
+
+        headers = base_headers + [
+            (b"content-type", f"multipart/byteranges; boundary={boundary}".encode("latin-1")),
+            (b"content-length", str(length).encode("latin-1")),
+        ]
+        await send({"type": "http.response.start", "status": 206, "headers": headers})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_ranges(scope, send, full_path, parts, trailer)
+
+    async def _send_ranges(self, scope: Scope, send: Send, full_path: str,
+                           parts: List[Tuple[Range, bytes]], trailer: bytes) -> None:
+        """Send each (range, prefix) pair and a trailer, with sendfile when available"""
+        zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        async with await anyio.open_file(full_path, mode="rb") as f:
+            for index, ((start, end), prefix) in enumerate(parts):
+                last = index == len(parts) - 1 and not trailer
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                if zerocopy:
+                    await send({
+                        "type": ZEROCOPY_EXTENSION,
+                        "file": f.wrapped,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": not last,
+                    })
+                    continue
+                await f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await f.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": remaining > 0 or not last,
+                    })
+        if trailer:
+            await send({"type": "http.response.body", "body": trailer})
@@ -0,0 +1,128 @@
+"""
+In-process cache of player playlist snapshots
+
+Holds the fully built payload of GET /api/playlists/{id}/player per playlist,
+so a hit does not touch SQLite. Entries are evicted LRU when either the
+number of playlists or the total number of items goes over its limit.
+
+Invalidation is precise and driven by the CRUD layer after each commit:
+playlist_crud drops the playlist it changed, media_crud drops the playlists
+whose snapshot contains the media, and schedule_crud drops the playlists
+containing the media of the schedule that changed (old and new rule). A
+snapshot built while an invalidation was in flight is not stored.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set
+
+MAX_SNAPSHOTS = 256
+MAX_SNAPSHOT_ITEMS = 50000  # Medios distintos por playlist, sumados entre todas las entradas
+
+
+class _Snapshot:
+    __slots__ = ("payload", "media_ids")
+
+    def __init__(self, payload: Dict[str, Any], media_ids: Set[int]) -> None:
+        self.payload = payload
+        self.media_ids = media_ids
+
+
+class PlaylistSnapshotCache:
+    """LRU of player payloads by playlist id, with a media -> playlists reverse index"""
+
+    def __init__(self, max_entries: int = MAX_SNAPSHOTS, max_items: int = MAX_SNAPSHOT_ITEMS) -> None:
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self._entries: "OrderedDict[int, _Snapshot]" = OrderedDict()
+        self._by_media: Dict[int, Set[int]] = {}
+        self._items = 0
+        # Cambia con cada invalidación: un snapshot construido antes no se guarda
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self) -> int:
+        """Token to take before building a snapshot (see put)"""
+        with self._lock:
+            return self._generation
+
+    def get(self, playlist_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            snapshot = self._entries.get(playlist_id)
+            if snapshot is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(playlist_id)
+            self.hits += 1
+            return snapshot.payload
+
+    def put(self, playlist_id: int, payload: Dict[str, Any], media_ids: Iterable[int], generation: int) -> bool:
+        """Store a snapshot built from data read after `generation` was taken"""
+        media_ids = set(media_ids)
+        with self._lock:
+            if generation != self._generation or len(media_ids) > self.max_items:
+                return False
+            self._remove(playlist_id)
+            self._entries[playlist_id] = _Snapshot(payload, media_ids)
+            self._items += len(media_ids)
+            for media_id in media_ids:
+                self._by_media.setdefault(media_id, set()).add(playlist_id)
+            while len(self._entries) > self.max_entries or self._items > self.max_items:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def _remove(self, playlist_id: int) -> bool:
+        snapshot = self._entries.pop(playlist_id, None)
+        if snapshot is None:
+            return False
+        self._items -= len(snapshot.media_ids)
+        for media_id in snapshot.media_ids:
+            playlists = self._by_media.get(media_id)
+            if playlists is not None:
+                playlists.discard(playlist_id)
+                if not playlists:
+                    del self._by_media[media_id]
+        return True
+
+    def invalidate_playlist(self, *playlist_ids: int) -> None:
+        with self._lock:
+            self._generation += 1
+            for playlist_id in playlist_ids:
+                self.invalidations += self._remove(playlist_id)
+
+    def invalidate_media(self, *media_ids: int) -> None:
+        """Drop the snapshots of every playlist containing one of `media_ids`"""
+        with self._lock:
+            self._generation += 1
+            for media_id in media_ids:
+                for playlist_id in list(self._by_media.get(media_id, ())):
+                    self.invalidations += self._remove(playlist_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_media.clear()
+            self._items = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "items": self._items,
+                "max_entries": self.max_entries,
+                "max_items": self.max_items,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+playlist_snapshots = PlaylistSnapshotCache()
@@ -0,0 +1,146 @@
+"""
+Versioned JSON responses for the player endpoints
+
+Screens poll the same few JSON documents (playlists, a playlist's items) far
+more often than they change. The CRUD layer bumps in-memory change counters
+per scope after each commit:
+
+- ``playlists``: any playlist created, renamed or deleted, or items changed.
+- ``playlist:{id}``: items or metadata of one playlist.
+- ``media``: any media created, updated, processed or deleted.
+- ``schedules``: any schedule change.
+
+A response's ETag is derived from the counters of the scopes it depends on
+(plus a per-process epoch, so an ETag from another worker never matches).
+A matching If-None-Match gets a 304 without touching the database, and the
+serialized body is cached per (key, ETag) so unchanged responses are not
+rebuilt or re-serialized.
+"""
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+
+PLAYLISTS = "playlists"
+MEDIA = "media"
+SCHEDULES = "schedules"
+
+# Respuestas serializadas en memoria (pocas variantes: una por playlist/host)
+MAX_CACHED_RESPONSES = 512
+
+
+def playlist_scope(playlist_id: int) -> str:
+    return f"playlist:{playlist_id}"
+
+
+class VersionRegistry:
+    """Change counters per scope, bumped by the CRUD layer after each commit"""
+
+    def __init__(self) -> None:
+        self._epoch = uuid.uuid4().hex[:8]
+        self._generation = 0
+        self._counters: dict = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *scopes: str) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._counters[scope] = self._counters.get(scope, 0) + 1
+
+    def bump_all(self) -> None:
+        """Invalidate every scope (e.g. a change made by another worker)"""
+        with self._lock:
+            self._generation += 1
+
+    def etag(self, scopes: Iterable[str]) -> str:
+        with self._lock:
+            parts = [str(self._counters.get(scope, 0)) for scope in scopes]
+            return f'W/"{self._epoch}.{self._generation}.{".".join(parts)}"'
+
+
+class ResponseCache:
+    """LRU of serialized JSON bodies keyed by (key, ETag)"""
+
+    def __init__(self, registry: VersionRegistry, max_entries: int = MAX_CACHED_RESPONSES) -> None:
+        self.registry = registry
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _get(self, key: Tuple[Hashable, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def _put(self, key: Tuple[Hashable, str], body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, request: Request, key: Hashable, scopes: Iterable[str]) -> Tuple[str, dict, Optional[Response]]:
+        """ETag, headers and the response if it can be served without building"""
+        etag = self.registry.etag(scopes)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in _parse_if_none_match(request.headers.get("if-none-match")):
+            self.not_modified += 1
+            return etag, headers, Response(status_code=304, headers=headers)
+
+        body = self._get((key, etag))
+        if body is None:
+            self.misses += 1
+            return etag, headers, None
+        self.hits += 1
+        return etag, headers, Response(content=body, media_type="application/json", headers=headers)
+
+    def _store(self, key: Hashable, etag: str, headers: dict, data: Any) -> Response:
+        # La etiqueta se leyó antes de construir: si algo cambia mientras tanto el
+        # contenido queda guardado bajo la versión anterior, nunca al revés
+        body = _encode(data)
+        self._put((key, etag), body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def respond(self, request: Request, key: Hashable, scopes: Iterable[str], build: Callable[[], Any]) -> Response:
+        """304 if the client's ETag is current, else the cached or freshly built body"""
+        etag, headers, response = self._lookup(request, key, scopes)
+        if response is not None:
+            return response
+        return self._store(key, etag, headers, build())
+
+    async def respond_async(self, request: Request, key: Hashable, scopes: Iterable[str],
+                            build: Callable[[], Awaitable[Any]]) -> Response:
+        """respond() for async handlers: build is awaited and the body is encoded off the loop"""
+        etag, headers, response = self._lookup(request, key, scopes)
+        if response is not None:
+            return response
+        data = await build()
+        return await run_in_threadpool(self._store, key, etag, headers, data)
+
+
+def _encode(data: Any) -> bytes:
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _parse_if_none_match(value: Optional[str]) -> set:
+    if not value:
+        return set()
+    return {tag.strip() for tag in value.split(",")}
+
+
+response_versions = VersionRegistry()
+response_cache = ResponseCache(response_versions)
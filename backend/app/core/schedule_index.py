@@ -0,0 +1,362 @@
+"""
+Compiled schedule timeline index ("now playing" resolver)
+
+Active Schedule rows are compiled into plain rules bucketed by weekday
+(simple schedules), by date (advanced ``specific_times``) and by date range
+(advanced campaigns). For a given day the candidate rules are flattened into
+a sorted list of non-overlapping segments, each holding the winning rule
+(highest ``priority``, then lowest id, as the player did). Day timelines are
+cached, so resolving "what plays at T" is a bisect over that list.
+
+The index is updated incrementally from schedule_crud: upserting or removing
+a rule only drops the cached days that rule touches, and the replaced rules
+are returned so the stored playout plan can refresh the same days.
+"""
+import heapq
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models.schedule import Schedule, ScheduleType
+
+DAY_SECONDS = 24 * 3600
+# Un specific_time puntual ("time") se considera activo ±30s, como en el player
+SPECIFIC_TIME_TOLERANCE = 30
+# Días compilados que se mantienen en caché
+MAX_CACHED_DAYS = 32
+
+Window = Tuple[int, int]  # [inicio, fin) en segundos desde medianoche
+
+
+def parse_clock(value) -> Optional[int]:
+    """'HH:MM' or 'HH:MM:SS' -> seconds since midnight (None if invalid)"""
+    if not value or not isinstance(value, str):
+        return None
+    parts = value.strip().split(":")
+    try:
+        hours, minutes = int(parts[0]), int(parts[1])
+        seconds = int(parts[2]) if len(parts) > 2 else 0
+    except (ValueError, IndexError):
+        return None
+    if not (0 <= hours <= 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        return None
+    return min(hours * 3600 + minutes * 60 + seconds, DAY_SECONDS)
+
+
+def _point_window(seconds: int) -> Window:
+    return max(seconds - SPECIFIC_TIME_TOLERANCE, 0), min(seconds + SPECIFIC_TIME_TOLERANCE, DAY_SECONDS)
+
+
+def parse_specific_time(entry) -> Optional[Tuple[date, Window]]:
+    """
+    Normalize one ``specific_times`` entry. Accepted forms:
+    "2024-10-31T10:00:00" (punctual), "2024-10-31" (whole day),
+    {"date", "time"} (punctual) and {"date", "start_time", "end_time"}.
+    """
+    try:
+        if isinstance(entry, str):
+            if "T" in entry or " " in entry:
+                moment = datetime.fromisoformat(entry)
+                return moment.date(), _point_window(moment.hour * 3600 + moment.minute * 60 + moment.second)
+            return date.fromisoformat(entry), (0, DAY_SECONDS)
+        if isinstance(entry, dict) and entry.get("date"):
+            day = date.fromisoformat(str(entry["date"])[:10])
+            if entry.get("time"):
+                seconds = parse_clock(entry["time"])
+                return (day, _point_window(seconds)) if seconds is not None else None
+            start, end = parse_clock(entry.get("start_time")), parse_clock(entry.get("end_time"))
+            if start is not None and end is not None and start < end:
+                return day, (start, end)
+    except ValueError:
+        return None
+    return None
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledSchedule:
+    """Plain, session-independent view of an active Schedule"""
+    id: int
+    priority: int
+    schedule_type: str
+    content_type: str           # "media" | "playlist"
+    content_id: int
+    weekdays: Optional[FrozenSet[int]] = None   # None = todos los días
+    daily_windows: Tuple[Window, ...] = ()      # simple: ventanas diarias (inicio > fin = cruza medianoche)
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    specific: Dict[date, Tuple[Window, ...]] = field(default_factory=dict)
+
+    @property
+    def sort_key(self) -> Tuple[int, int]:
+        """Mayor prioridad primero; a igual prioridad gana el schedule más antiguo"""
+        return -self.priority, self.id
+
+    def _runs_on(self, weekday: int) -> bool:
+        return self.weekdays is None or weekday in self.weekdays
+
+    def windows_on(self, day: date) -> List[Window]:
+        """Windows (seconds since midnight) during which this schedule applies on `day`"""
+        if self.schedule_type == ScheduleType.simple.value:
+            weekday = day.weekday()
+            windows = []
+            for start, end in self.daily_windows:
+                if start < end:
+                    if self._runs_on(weekday):
+                        windows.append((start, end))
+                else:
+                    # Ventana nocturna: empieza el día programado y termina al siguiente
+                    if self._runs_on(weekday):
+                        windows.append((start, DAY_SECONDS))
+                    if end > 0 and self._runs_on((weekday - 1) % 7):
+                        windows.append((0, end))
+            return windows
+
+        if self.start_date and day < self.start_date:
+            return []
+        if self.end_date and day > self.end_date:
+            return []
+        if self.specific:
+            return list(self.specific.get(day, ()))
+        return [(0, DAY_SECONDS)]
+
+
+def compile_schedule(schedule: Schedule) -> Optional[CompiledSchedule]:
+    """Compile a Schedule row; None if it is inactive or can never play"""
+    if not schedule.is_active:
+        return None
+    if schedule.media_id:
+        content_type, content_id = "media", schedule.media_id
+    elif schedule.playlist_id:
+        content_type, content_id = "playlist", schedule.playlist_id
+    else:
+        return None
+
+    schedule_type = schedule.schedule_type or ScheduleType.simple.value
+    if schedule_type == ScheduleType.simple.value:
+        if schedule.is_all_day:
+            windows = ((0, DAY_SECONDS),)
+        else:
+            start, end = parse_clock(schedule.daily_start), parse_clock(schedule.daily_end)
+            if start is None or end is None or start == end:
+                return None
+            windows = ((start, end),)
+        weekdays = frozenset(schedule.weekdays) if schedule.weekdays else None
+        return CompiledSchedule(
+            id=schedule.id, priority=schedule.priority or 1, schedule_type=schedule_type,
+            content_type=content_type, content_id=content_id,
+            weekdays=weekdays, daily_windows=windows
+        )
+
+    specific: Dict[date, List[Window]] = {}
+    for entry in schedule.specific_times or []:
+        parsed = parse_specific_time(entry)
+        if parsed:
+            specific.setdefault(parsed[0], []).append(parsed[1])
+    if schedule.specific_times and not specific:
+        return None
+    return CompiledSchedule(
+        id=schedule.id, priority=schedule.priority or 1, schedule_type=schedule_type,
+        content_type=content_type, content_id=content_id,
+        start_date=schedule.start_date, end_date=schedule.end_date,
+        specific={day: tuple(sorted(windows)) for day, windows in specific.items()}
+    )
+
+
+@dataclass
+class DayTimeline:
+    """Non-overlapping segments of one day with the winning rule of each"""
+    day: date
+    starts: List[int]
+    winners: List[Optional[CompiledSchedule]]
+
+    def lookup(self, seconds: int) -> Tuple[Optional[CompiledSchedule], int, int]:
+        """Winner at `seconds` plus the [start, end) of its segment"""
+        i = bisect_right(self.starts, seconds) - 1
+        end = self.starts[i + 1] if i + 1 < len(self.starts) else DAY_SECONDS
+        return self.winners[i], self.starts[i], end
+
+
+def build_timeline(day: date, rules: Iterable[CompiledSchedule]) -> DayTimeline:
+    """Sweep the windows of `rules` on `day` into priority-resolved segments"""
+    intervals = sorted(
+        ((start, end, rule)
+         for rule in rules
+         for start, end in rule.windows_on(day)
+         if start < end),
+        key=lambda interval: interval[:2]
+    )
+    boundaries = sorted({0} | {s for s, _, _ in intervals} | {e for _, e, _ in intervals if e < DAY_SECONDS})
+
+    starts: List[int] = []
+    winners: List[Optional[CompiledSchedule]] = []
+    heap: list = []
+    i = 0
+    for boundary in boundaries:
+        while i < len(intervals) and intervals[i][0] <= boundary:
+            start, end, rule = intervals[i]
+            # i desempata entradas de la misma regla sin comparar objetos
+            heapq.heappush(heap, (rule.sort_key, end, i, rule))
+            i += 1
+        # Eliminación perezosa: las ventanas terminadas se descartan al llegar a la cima
+        while heap and heap[0][1] <= boundary:
+            heapq.heappop(heap)
+        winner = heap[0][3] if heap else None
+        if winners and winners[-1] is winner:
+            continue
+        starts.append(boundary)
+        winners.append(winner)
+    return DayTimeline(day=day, starts=starts, winners=winners)
+
+
+@dataclass
+class NowPlaying:
+    """Resolution of the schedule index at a given instant"""
+    at: datetime
+    schedule: Optional[CompiledSchedule]
+    starts_at: datetime
+    ends_at: datetime  # Próximo instante en que la resolución puede cambiar
+
+
+class ScheduleIndex:
+    """In-memory index of active schedules with cached per-day timelines"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._rules: Dict[int, CompiledSchedule] = {}
+        self._by_weekday: Dict[int, Set[int]] = {weekday: set() for weekday in range(7)}
+        self._by_date: Dict[date, Set[int]] = {}
+        self._ranged: Set[int] = set()
+        self._timelines: "OrderedDict[date, DayTimeline]" = OrderedDict()
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, db: Session) -> None:
+        """(Re)build the whole index from the database"""
+        schedules = db.query(Schedule).filter(Schedule.is_active == True).all()
+        with self._lock:
+            self._rules.clear()
+            for bucket in self._by_weekday.values():
+                bucket.clear()
+            self._by_date.clear()
+            self._ranged.clear()
+            self._timelines.clear()
+            for schedule in schedules:
+                rule = compile_schedule(schedule)
+                if rule:
+                    self._add(rule)
+            self._loaded = True
+        self._notify()
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Call `callback` (from the thread that made the change) whenever the rules change"""
+        self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        for callback in list(self._listeners):
+            callback()
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def _add(self, rule: CompiledSchedule) -> None:
+        self._rules[rule.id] = rule
+        if rule.schedule_type == ScheduleType.simple.value:
+            weekdays = rule.weekdays if rule.weekdays is not None else range(7)
+            overnight = any(start >= end for start, end in rule.daily_windows)
+            for weekday in weekdays:
+                self._by_weekday[weekday].add(rule.id)
+                if overnight:
+                    self._by_weekday[(weekday + 1) % 7].add(rule.id)
+        elif rule.specific:
+            for day in rule.specific:
+                self._by_date.setdefault(day, set()).add(rule.id)
+        else:
+            self._ranged.add(rule.id)
+
+    def _discard(self, schedule_id: int) -> Optional[CompiledSchedule]:
+        rule = self._rules.pop(schedule_id, None)
+        if rule is None:
+            return None
+        for bucket in self._by_weekday.values():
+            bucket.discard(schedule_id)
+        for day in list(rule.specific):
+            ids = self._by_date.get(day)
+            if ids is not None:
+                ids.discard(schedule_id)
+                if not ids:
+                    del self._by_date[day]
+        self._ranged.discard(schedule_id)
+        return rule
+
+    def _invalidate(self, *rules: Optional[CompiledSchedule]) -> None:
+        """Drop cached days on which any of `rules` applies"""
+        for day in list(self._timelines):
+            if any(rule and rule.windows_on(day) for rule in rules):
+                del self._timelines[day]
+
+    def upsert(self, schedule: Schedule) -> Tuple[Optional[CompiledSchedule], Optional[CompiledSchedule]]:
+        """Apply a created/updated/toggled schedule to a loaded index; returns (old, new) rules"""
+        with self._lock:
+            if not self._loaded:
+                return None, None
+            old = self._discard(schedule.id)
+            new = compile_schedule(schedule)
+            if new:
+                self._add(new)
+            self._invalidate(old, new)
+        self._notify()
+        return old, new
+
+    def remove(self, schedule_id: int) -> Optional[CompiledSchedule]:
+        """Forget a deleted schedule; returns the rule it had"""
+        with self._lock:
+            if not self._loaded:
+                return None
+            old = self._discard(schedule_id)
+            self._invalidate(old)
+        self._notify()
+        return old
+
+    def candidates(self, day: date) -> List[CompiledSchedule]:
+        """Rules that may apply on `day` (before evaluating their windows)"""
+        with self._lock:
+            ids = self._by_weekday[day.weekday()] | self._by_date.get(day, set()) | self._ranged
+            return [self._rules[i] for i in ids]
+
+    def timeline(self, day: date) -> DayTimeline:
+        """Compiled timeline of a day, from cache when possible"""
+        with self._lock:
+            cached = self._timelines.get(day)
+            if cached is not None:
+                self._timelines.move_to_end(day)
+                return cached
+            timeline = build_timeline(day, self.candidates(day))
+            self._timelines[day] = timeline
+            while len(self._timelines) > MAX_CACHED_DAYS:
+                self._timelines.popitem(last=False)
+            return timeline
+
+    def resolve(self, at: datetime) -> NowPlaying:
+        """What should play at `at` (naive local time), with the segment bounds"""
+        midnight = datetime.combine(at.date(), time())
+        seconds = at.hour * 3600 + at.minute * 60 + at.second
+        winner, start, end = self.timeline(at.date()).lookup(seconds)
+        return NowPlaying(
+            at=at,
+            schedule=winner,
+            starts_at=midnight + timedelta(seconds=start),
+            ends_at=midnight + timedelta(seconds=end)
+        )
+
+
+schedule_index = ScheduleIndex()
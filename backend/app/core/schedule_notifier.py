@@ -0,0 +1,185 @@
+"""
+Push-based schedule transitions
+
+A single asyncio task, started from the application lifespan, keeps the set
+of schedules whose window is open right now. It sleeps until the next window
+boundary of any active schedule (from the compiled schedule index) and
+broadcasts ``schedule_started`` / ``schedule_ended`` over WebSocket when the
+set changes, so screens no longer poll for windows opening or closing.
+Schedule changes wake it up immediately.
+"""
+import asyncio
+import logging
+from datetime import datetime, time, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.schedule_index import DAY_SECONDS, CompiledSchedule, ScheduleIndex, schedule_index
+from app.core.websocket_manager import ADMIN_TOPIC, SCREENS_TOPIC, broadcast_local_event
+
+logger = logging.getLogger(__name__)
+
+# Tope de espera: protege de saltos del reloj del sistema (NTP, cambio de hora)
+MAX_SLEEP = 300.0
+
+Emitter = Callable[[str, Dict[str, Any], Optional[Iterable[str]]], Awaitable[None]]
+
+# Las transiciones interesan a todas las pantallas y al panel de administración.
+# Cada worker tiene su propio notificador: se emite solo a sus conexiones, sin pasar por el bus
+TOPICS = [ADMIN_TOPIC, SCREENS_TOPIC]
+
+
+def _seconds(moment: datetime) -> int:
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+def window_at(rule: CompiledSchedule, moment: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """Open window of `rule` containing `moment`, joined across midnight; None if closed"""
+    day, seconds = moment.date(), _seconds(moment)
+    for start, end in rule.windows_on(day):
+        if start <= seconds < end:
+            midnight = datetime.combine(day, time())
+            starts_at, ends_at = midnight + timedelta(seconds=start), midnight + timedelta(seconds=end)
+            # Una ventana que llega a medianoche puede seguir al día siguiente (nocturna, varios días)
+            for _ in range(366):
+                if end < DAY_SECONDS:
+                    break
+                day += timedelta(days=1)
+                end = next((e for s, e in rule.windows_on(day) if s == 0), 0)
+                ends_at = datetime.combine(day, time()) + timedelta(seconds=end)
+            return starts_at, ends_at
+    return None
+
+
+def next_boundary(rules: List[CompiledSchedule], moment: datetime) -> datetime:
+    """First window start or end after `moment` among `rules` (today or tomorrow)"""
+    seconds = _seconds(moment)
+    today = moment.date()
+    tomorrow = datetime.combine(today + timedelta(days=1), time())
+    boundaries = [
+        edge for rule in rules for start, end in rule.windows_on(today)
+        for edge in (start, end) if edge > seconds
+    ]
+    if boundaries:
+        return datetime.combine(today, time()) + timedelta(seconds=min(boundaries))
+    # Sin cambios hoy: se reevalúa a medianoche con los candidatos del día siguiente
+    return tomorrow
+
+
+def schedule_payload(rule: CompiledSchedule, at: datetime) -> Dict[str, Any]:
+    return {
+        "id": rule.id,
+        "schedule_type": rule.schedule_type,
+        "priority": rule.priority,
+        "content_type": rule.content_type,
+        "media_id": rule.content_id if rule.content_type == "media" else None,
+        "playlist_id": rule.content_id if rule.content_type == "playlist" else None,
+        "at": at.isoformat(),
+    }
+
+
+class ScheduleNotifier:
+    """Asyncio task broadcasting schedule window transitions"""
+
+    def __init__(
+        self,
+        index: ScheduleIndex = schedule_index,
+        emit: Emitter = broadcast_local_event,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        self.index = index
+        self.emit = emit
+        self.clock = clock
+        self._active: Dict[int, CompiledSchedule] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._listening = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the timer task on the running event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        if not self._listening:
+            self.index.add_listener(self.wake)
+            self._listening = True
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def wake(self) -> None:
+        """Re-evaluate now (thread-safe; called by the index when rules change)"""
+        loop, event = self._loop, self._wake
+        if loop is not None and event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+
+    def step(self, now: datetime) -> Tuple[List[Tuple[str, Dict[str, Any]]], datetime]:
+        """Events due at `now` (diff against the previous state) and the next boundary"""
+        candidates = self.index.candidates(now.date())
+        windows = {}
+        for rule in candidates:
+            window = window_at(rule, now)
+            if window:
+                windows[rule.id] = (rule, window)
+
+        events = []
+        winner = self.index.resolve(now).schedule
+        common = {"active_schedule_id": winner.id if winner else None}
+        for schedule_id, rule in sorted(self._active.items()):
+            if schedule_id not in windows:
+                events.append(("schedule_ended", {**schedule_payload(rule, now), **common}))
+        for schedule_id, (rule, (starts_at, ends_at)) in sorted(windows.items()):
+            previous = self._active.get(schedule_id)
+            if previous is not None:
+                if previous is rule:
+                    continue
+                # Regla editada: solo cuenta como fin + inicio si cambió su ventana o su contenido
+                if (window_at(previous, now) == (starts_at, ends_at)
+                        and schedule_payload(previous, now) == schedule_payload(rule, now)):
+                    continue
+                events.append(("schedule_ended", {**schedule_payload(previous, now), **common}))
+            events.append(("schedule_started", {
+                **schedule_payload(rule, now),
+                "starts_at": starts_at.isoformat(),
+                "ends_at": ends_at.isoformat(),
+                **common,
+            }))
+        self._active = {schedule_id: rule for schedule_id, (rule, _) in windows.items()}
+        return events, next_boundary(candidates, now)
+
+    async def _run(self) -> None:
+        # Estado inicial sin emitir: los clientes que conectan piden /player/now-playing
+        self.step(self.clock())
+        while True:
+            try:
+                # Se limpia antes de evaluar: un cambio durante step() vuelve a despertar
+                self._wake.clear()
+                events, boundary = self.step(self.clock())
+                for event, data in events:
+                    await self.emit(event, data, TOPICS)
+                delay = min(max((boundary - self.clock()).total_seconds(), 0.0), MAX_SLEEP)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error evaluando transiciones de schedules")
+                await asyncio.sleep(1)
+
+
+schedule_notifier = ScheduleNotifier()
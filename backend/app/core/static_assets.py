@@ -0,0 +1,169 @@
+"""
+Static serving for the built Vue frontend
+
+- PrecompressedStaticFiles: StaticFiles that sends the ``.br``/``.gz``
+  variant generated at build time when the client accepts it, and marks
+  fingerprinted filenames (``app.3e9580c5.js``) as immutable.
+- SpaIndex: index.html held in memory with its compressed variants and a
+  content ETag, so SPA navigations never touch the filesystem.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.utils.precompress import ENCODING_SUFFIXES
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Nombres con hash de contenido generados por vue-cli/webpack: name.<8+ hex>.ext
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+
+def is_fingerprinted(filename: str) -> bool:
+    return bool(_FINGERPRINTED.search(filename))
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """Encodings listed in Accept-Encoding with a non-zero q value"""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name)
+    if "*" in accepted:
+        accepted.update(ENCODING_SUFFIXES)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving build-time .br/.gz variants chosen by Accept-Encoding"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # ruta original -> {encoding: (ruta variante, stat)}; los assets no cambian tras el deploy
+        self._variants: Dict[str, Dict[str, Tuple[str, os.stat_result]]] = {}
+        self._variants_lock = threading.Lock()
+
+    def _find_variants(self, full_path: str) -> Dict[str, Tuple[str, os.stat_result]]:
+        with self._variants_lock:
+            cached = self._variants.get(full_path)
+        if cached is not None:
+            return cached
+        variants = {}
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            try:
+                variants[encoding] = (full_path + suffix, os.stat(full_path + suffix))
+            except OSError:
+                continue
+        with self._variants_lock:
+            self._variants[full_path] = variants
+        return variants
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        filename = os.path.basename(full_path)
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+        encoding = None
+        variants = self._find_variants(full_path)
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        for candidate in ENCODING_SUFFIXES:  # br antes que gzip
+            if candidate in variants and candidate in accepted:
+                encoding = candidate
+                full_path, stat_result = variants[candidate]
+                break
+
+        # Cada variante tiene su propio tamaño/mtime, y por tanto su propio ETag
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result,
+            method=scope["method"], media_type=media_type
+        )
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        if variants:
+            response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = (
+            IMMUTABLE_CACHE_CONTROL if is_fingerprinted(filename) else REVALIDATE_CACHE_CONTROL
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class SpaIndex:
+    """index.html of the SPA cached in memory, with compressed variants and an ETag"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.bodies: Dict[Optional[str], bytes] = {}
+        self.etags: Dict[Optional[str], str] = {}
+
+    @property
+    def available(self) -> bool:
+        return None in self.bodies
+
+    def load(self) -> bool:
+        """(Re)load index.html and its .br/.gz variants; False if the frontend is not built"""
+        bodies: Dict[Optional[str], bytes] = {}
+        try:
+            with open(self.path, "rb") as f:
+                bodies[None] = f.read()
+        except FileNotFoundError:
+            self.bodies, self.etags = {}, {}
+            return False
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            try:
+                with open(self.path + suffix, "rb") as f:
+                    bodies[encoding] = f.read()
+            except FileNotFoundError:
+                continue
+        digest = hashlib.sha256(bodies[None]).hexdigest()[:16]
+        self.etags = {encoding: f'"{digest}-{encoding or "identity"}"' for encoding in bodies}
+        self.bodies = bodies
+        return True
+
+    def response(self, request: Request) -> Response:
+        """index.html for a navigation request (304 when the client copy is current)"""
+        accepted = accepted_encodings(request.headers.get("accept-encoding"))
+        encoding = next((e for e in ENCODING_SUFFIXES if e in self.bodies and e in accepted), None)
+        headers = {
+            "etag": self.etags[encoding],
+            # index.html referencia los assets con hash: siempre se revalida
+            "cache-control": REVALIDATE_CACHE_CONTROL,
+        }
+        if len(self.bodies) > 1:
+            headers["vary"] = "Accept-Encoding"
+        if_none_match = request.headers.get("if-none-match", "")
+        if self.etags[encoding] in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["content-encoding"] = encoding
+        return Response(self.bodies[encoding], media_type="text/html", headers=headers)
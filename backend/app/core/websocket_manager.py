@@ -1,28 +1,371 @@
-from typing import List, Dict, Any
+"""
+WebSocket connection manager with topic subscriptions
+
+Clients subscribe to topics on /ws (``?topics=a,b`` when connecting, or
+``{"action": "subscribe", "topics": [...]}`` messages) and events are only
+fanned out to the sockets subscribed to one of the event's topics:
+
+- ``admin``: every CRUD event, for the management UI.
+- ``screens``: events every screen needs (schedule transitions, business).
+- ``playlist:{id}``: changes to a playlist and to the media it contains.
+- ``screen:{id}``: messages for a single screen.
+- ``media:{id}``: processing of one media file.
+
+Clients that never subscribe keep receiving everything (topic ``*``), so
+older players keep working.
+
+Each message is serialized once per broadcast and pushed to a bounded outbox
+per connection, drained by its own writer task: a slow screen only delays
+itself. When an outbox is full the slow-consumer policy drops the oldest or
+the newest message (or disconnects the client), and progress events for the
+same job replace each other while queued. A heartbeat task sends ``ping``
+events; clients that answer ``pong`` are evicted when they stop answering, and
+any send that takes longer than WS_SEND_TIMEOUT evicts the connection.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Optional, Set
 from fastapi import WebSocket, WebSocketDisconnect
 
+from app.config import settings
+from app.core.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+ALL_TOPICS = "*"
+ADMIN_TOPIC = "admin"
+SCREENS_TOPIC = "screens"
+MAX_TOPICS_PER_CONNECTION = 64
+PONG = "pong"
+
+# Eventos donde solo importa el último valor: se reemplazan en la cola en lugar de acumularse
+COALESCED_EVENTS = {"media_processing_progress"}
+
+
+class SlowConsumerPolicy(str, Enum):
+    drop_oldest = "drop_oldest"
+    drop_newest = "drop_newest"
+    disconnect = "disconnect"
+
+_TOPIC = re.compile(r"^(\*|admin|screens|(playlist|screen|media):\d+)$")
+
+
+def is_valid_topic(topic: str) -> bool:
+    return isinstance(topic, str) and bool(_TOPIC.match(topic))
+
+
+def playlist_topic(playlist_id: int) -> str:
+    return f"playlist:{playlist_id}"
+
+
+def screen_topic(screen_id: int) -> str:
+    return f"screen:{screen_id}"
+
+
+def media_topic(media_id: int) -> str:
+    return f"media:{media_id}"
+
+
+def media_topics(media_id: int, playlist_ids: Iterable[int] = ()) -> List[str]:
+    """Topics for a media event: admin, the media and the playlists that contain it"""
+    return [ADMIN_TOPIC, media_topic(media_id)] + [playlist_topic(p) for p in playlist_ids]
+
+
+def serialize(message: Dict[str, Any]) -> str:
+    # Mismo formato que WebSocket.send_json
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def coalesce_key(event: str, data: Dict[str, Any]) -> Optional[Hashable]:
+    if event in COALESCED_EVENTS:
+        return (event, data.get("id"), data.get("job_id"))
+    return None
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class Peer:
+    """Outbound queue of one connection, drained by its writer task"""
+
+    def __init__(self, websocket: WebSocket, size: int, policy: SlowConsumerPolicy) -> None:
+        self.websocket = websocket
+        self.size = size
+        self.policy = policy
+        # Entradas [clave, texto]: una clave repetida reemplaza el texto sin cambiar el orden
+        self.outbox: Deque[list] = deque()
+        self._keyed: Dict[Hashable, list] = {}
+        self.ready = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.writer: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+        self.answers_heartbeat = False
+        self.dropped = 0
+        self.coalesced = 0
+
+    def push(self, text: str, key: Optional[Hashable] = None) -> bool:
+        """Queue a message; False when the policy says the peer must be disconnected"""
+        if key is not None and key in self._keyed:
+            self._keyed[key][1] = text
+            self.coalesced += 1
+            return True
+        if len(self.outbox) >= self.size:
+            if self.policy == SlowConsumerPolicy.disconnect:
+                return False
+            self.dropped += 1
+            if self.policy == SlowConsumerPolicy.drop_newest:
+                return True
+            self._forget(self.outbox.popleft())
+        entry = [key, text]
+        self.outbox.append(entry)
+        if key is not None:
+            self._keyed[key] = entry
+        self.idle.clear()
+        self.ready.set()
+        return True
+
+    def _forget(self, entry: list) -> None:
+        if entry[0] is not None and self._keyed.get(entry[0]) is entry:
+            del self._keyed[entry[0]]
+
+    async def run(self, send_timeout: float) -> None:
+        while True:
+            if not self.outbox:
+                self.ready.clear()
+                self.idle.set()
+                await self.ready.wait()
+                continue
+            entry = self.outbox.popleft()
+            self._forget(entry)
+            await asyncio.wait_for(self.websocket.send_text(entry[1]), timeout=send_timeout)
+
+
 class ConnectionManager:
-    """Simple connection manager for WebSocket clients."""
-    def __init__(self) -> None:
+    """Connection manager for WebSocket clients with a topic -> connections index."""
+    def __init__(
+        self,
+        outbox_size: Optional[int] = None,
+        policy: Optional[str] = None,
+        send_timeout: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        heartbeat_timeout: Optional[float] = None,
+    ) -> None:
+        self.outbox_size = outbox_size or settings.WS_OUTBOX_SIZE
+        self.policy = SlowConsumerPolicy(policy or settings.WS_SLOW_CONSUMER_POLICY)
+        self.send_timeout = send_timeout or settings.WS_SEND_TIMEOUT
+        self.heartbeat_interval = heartbeat_interval or settings.WS_HEARTBEAT_INTERVAL
+        self.heartbeat_timeout = heartbeat_timeout or settings.WS_HEARTBEAT_TIMEOUT
         self.active_connections: List[WebSocket] = []
+        self._peers: Dict[WebSocket, Peer] = {}
+        self._topics: Dict[str, Set[WebSocket]] = {}
+        self._subscriptions: Dict[WebSocket, Set[str]] = {}
+        # Conexiones que aún no eligieron temas (reciben todo)
+        self._implicit: Set[WebSocket] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.evicted = 0
 
-    async def connect(self, websocket: WebSocket) -> None:
+    def start(self) -> None:
+        """Start the heartbeat task on the running event loop"""
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.get_running_loop().create_task(self._run_heartbeat())
+
+    async def stop(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+
+    async def connect(self, websocket: WebSocket, topics: Optional[Iterable[str]] = None) -> None:
         await websocket.accept()
+        peer = Peer(websocket, self.outbox_size, self.policy)
+        peer.writer = asyncio.get_running_loop().create_task(self._write(peer))
+        self._peers[websocket] = peer
         self.active_connections.append(websocket)
+        self._subscriptions[websocket] = set()
+        topics = list(topics or [])
+        if topics:
+            self.subscribe(websocket, topics)
+        else:
+            self._implicit.add(websocket)
+            self._add(websocket, ALL_TOPICS)
 
     def disconnect(self, websocket: WebSocket) -> None:
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        for topic in self._subscriptions.pop(websocket, set()):
+            self._remove_from_index(websocket, topic)
+        self._implicit.discard(websocket)
+        peer = self._peers.pop(websocket, None)
+        if peer is not None and peer.writer is not None and not peer.writer.done():
+            # El propio writer se desconecta a sí mismo al fallar un envío
+            if peer.writer is not _current_task():
+                peer.writer.cancel()
 
-    async def broadcast(self, message: Dict[str, Any]) -> None:
-        for connection in list(self.active_connections):
-            try:
-                await connection.send_json(message)
-            except Exception:
-                self.disconnect(connection)
+    async def _write(self, peer: Peer) -> None:
+        try:
+            await peer.run(self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Envío fallido o más lento que WS_SEND_TIMEOUT: se da por caída
+            logger.info("Cliente WebSocket desconectado al enviar: %r", e)
+            await self._evict(peer)
+
+    async def _evict(self, peer: Peer) -> None:
+        if self._peers.get(peer.websocket) is not peer:
+            return
+        self.evicted += 1
+        self.disconnect(peer.websocket)
+        try:
+            await asyncio.wait_for(peer.websocket.close(code=1011), timeout=1.0)
+        except Exception:
+            pass
+
+    def touch(self, websocket: WebSocket, text: Optional[str] = None) -> None:
+        """Record activity from a client (any message; 'pong' answers the heartbeat)"""
+        peer = self._peers.get(websocket)
+        if peer is not None:
+            peer.last_seen = time.monotonic()
+            if text == PONG:
+                peer.answers_heartbeat = True
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            ping = serialize({"event": "ping", "data": {}})
+            for peer in list(self._peers.values()):
+                # Solo se exige pong a los clientes que alguna vez lo enviaron (los anteriores no lo hacen)
+                if peer.answers_heartbeat and now - peer.last_seen > self.heartbeat_timeout:
+                    logger.info("Cliente WebSocket sin heartbeat, desconectando")
+                    await self._evict(peer)
+                elif not peer.push(ping):
+                    await self._evict(peer)
+
+    def _add(self, websocket: WebSocket, topic: str) -> None:
+        self._subscriptions[websocket].add(topic)
+        self._topics.setdefault(topic, set()).add(websocket)
+
+    def _remove_from_index(self, websocket: WebSocket, topic: str) -> None:
+        sockets = self._topics.get(topic)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._topics[topic]
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]) -> Set[str]:
+        """Add topics to a connection; the first explicit subscription drops the implicit '*'"""
+        topics = list(topics)
+        invalid = [t for t in topics if not is_valid_topic(t)]
+        if invalid:
+            raise ValueError(f"Temas no válidos: {', '.join(map(str, invalid))}")
+        current = self._subscriptions.get(websocket)
+        if current is None:
+            raise ValueError("Conexión no registrada")
+        explicit = current - {ALL_TOPICS} if websocket in self._implicit else current
+        if len(explicit | set(topics)) > MAX_TOPICS_PER_CONNECTION:
+            raise ValueError(f"Máximo {MAX_TOPICS_PER_CONNECTION} temas por conexión")
+        if websocket in self._implicit:
+            self._implicit.discard(websocket)
+            current.discard(ALL_TOPICS)
+            self._remove_from_index(websocket, ALL_TOPICS)
+        for topic in topics:
+            self._add(websocket, topic)
+        return set(current)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]) -> Set[str]:
+        current = self._subscriptions.get(websocket, set())
+        for topic in topics:
+            if topic in current:
+                current.discard(topic)
+                self._remove_from_index(websocket, topic)
+        return set(current)
+
+    def subscriptions(self, websocket: WebSocket) -> Set[str]:
+        return set(self._subscriptions.get(websocket, set()))
+
+    def recipients(self, topics: Optional[Iterable[str]] = None) -> List[WebSocket]:
+        """Sockets interested in any of `topics` (all sockets when None)"""
+        if topics is None:
+            return list(self.active_connections)
+        selected: Set[WebSocket] = set(self._topics.get(ALL_TOPICS, ()))
+        for topic in topics:
+            selected |= self._topics.get(topic, set())
+        # Orden de conexión, para que el envío sea determinista
+        return [ws for ws in self.active_connections if ws in selected]
+
+    async def broadcast(self, message: Dict[str, Any], topics: Optional[Iterable[str]] = None,
+                        key: Optional[Hashable] = None) -> None:
+        """Serialize once and queue for every recipient; never waits for a client"""
+        recipients = self.recipients(topics)
+        if not recipients:
+            return
+        text = serialize(message)
+        for websocket in recipients:
+            peer = self._peers.get(websocket)
+            if peer is not None and not peer.push(text, key):
+                logger.info("Cliente WebSocket lento (cola llena), desconectando")
+                await self._evict(peer)
+
+    async def flush(self) -> None:
+        """Wait until every outbox has been written"""
+        await asyncio.gather(*(peer.idle.wait() for peer in list(self._peers.values())))
+
+    def stats(self) -> Dict[str, int]:
+        peers = list(self._peers.values())
+        return {
+            "connections": len(peers),
+            "queued": sum(len(p.outbox) for p in peers),
+            "dropped": sum(p.dropped for p in peers),
+            "coalesced": sum(p.coalesced for p in peers),
+            "evicted": self.evicted,
+        }
+
+    async def _reply(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
+        # Por la cola, para mantener el orden con los broadcasts
+        peer = self._peers.get(websocket)
+        if peer is not None and not peer.push(serialize(message)):
+            await self._evict(peer)
+
+    async def handle_message(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
+        """Apply a subscribe/unsubscribe request and acknowledge it"""
+        action = message.get("action")
+        topics = message.get("topics") or []
+        if isinstance(topics, str):
+            topics = [topics]
+        try:
+            if action == "subscribe":
+                current = self.subscribe(websocket, topics)
+            elif action == "unsubscribe":
+                current = self.unsubscribe(websocket, topics)
+            else:
+                raise ValueError(f"Acción no soportada: {action}")
+        except ValueError as e:
+            await self._reply(websocket, {"event": "error", "data": {"detail": str(e)}})
+            return
+        await self._reply(websocket, {"event": "subscribed", "data": {"topics": sorted(current)}})
 
 manager = ConnectionManager()
 
-async def broadcast_event(event: str, data: Dict[str, Any]) -> None:
-    """Broadcast an event with associated data to all clients."""
-    await manager.broadcast({"event": event, "data": data})
+async def broadcast_local_event(event: str, data: Dict[str, Any], topics: Optional[Iterable[str]] = None) -> None:
+    """Broadcast only to the clients connected to this process"""
+    await manager.broadcast({"event": event, "data": data}, topics, coalesce_key(event, data))
+
+event_bus.set_deliver(broadcast_local_event)
+
+async def broadcast_event(event: str, data: Dict[str, Any], topics: Optional[Iterable[str]] = None) -> None:
+    """Broadcast an event to the clients subscribed to `topics` (all clients when None), in every worker."""
+    await event_bus.publish(event, data, topics)
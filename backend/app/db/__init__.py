@@ -1,5 +1,5 @@
 # DB package
 
-from .database import init_db, get_db, Base
+from .database import init_db, get_db, get_read_db, Base
 
-__all__ = ["init_db", "get_db", "Base"]
+__all__ = ["init_db", "get_db", "get_read_db", "Base"]
@@ -0,0 +1,47 @@
+"""
+Async access to the database for ``async def`` route handlers
+
+SQLAlchemy 1.4 with the pysqlite driver is synchronous: a query called
+directly from an ``async def`` handler blocks the event loop (and with it
+every WebSocket) for the whole round trip. ``AsyncDB`` wraps a Session and
+runs each call in Starlette's threadpool, one at a time, so the loop keeps
+serving other requests while SQLite works.
+
+Async variants of the CRUD read paths used by the player live in
+``app.db.crud.async_reads``; any other sync function can be offloaded with
+``await adb.run(fn, *args)`` (it receives the session as first argument).
+"""
+import asyncio
+from typing import Any, Callable, TypeVar
+
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db, get_read_db
+
+T = TypeVar("T")
+
+
+class AsyncDB:
+    """A Session whose calls run in the threadpool"""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        # La Session no es thread-safe: una sola llamada a la vez
+        self._lock = asyncio.Lock()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call fn(session, *args, **kwargs) in a worker thread"""
+        async with self._lock:
+            return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+def get_async_db(db: Session = Depends(get_db)) -> AsyncDB:
+    """Dependency: read-write session for async handlers"""
+    return AsyncDB(db)
+
+
+def get_async_read_db(db: Session = Depends(get_read_db)) -> AsyncDB:
+    """Dependency: read-only session (player pool) for async handlers"""
+    return AsyncDB(db)
@@ -5,5 +5,8 @@ from . import media_crud
 from . import schedule_crud
 from . import business_crud
 from . import playlist_crud
+from . import media_job_crud
+from . import media_blob_crud
+from . import playout_crud
 
-__all__ = ["user_crud", "media_crud", "schedule_crud", "business_crud", "playlist_crud"]
+__all__ = ["user_crud", "media_crud", "schedule_crud", "business_crud", "playlist_crud", "media_job_crud", "media_blob_crud", "playout_crud"]
@@ -0,0 +1,83 @@
+"""
+Async variants of the CRUD read paths (for async route handlers)
+
+Each function runs the sync CRUD function of the same name through
+``AsyncDB.run``, so the query happens in a worker thread instead of on the
+event loop.
+"""
+from datetime import date
+from typing import List, Optional
+
+from app.db.async_db import AsyncDB
+from app.db.crud import media_crud, playlist_crud, schedule_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.models.playlist_change import PlaylistChange
+from app.db.models.playlist_media import PlaylistMedia
+from app.db.models.schedule import Schedule
+
+
+# Playlists
+
+async def get_playlist(adb: AsyncDB, playlist_id: int) -> Optional[Playlist]:
+    return await adb.run(playlist_crud.get_playlist, playlist_id)
+
+
+async def list_playlists(adb: AsyncDB, skip: int = 0, limit: int = 100) -> List[Playlist]:
+    return await adb.run(playlist_crud.list_playlists, skip=skip, limit=limit)
+
+
+async def get_playlist_summaries(adb: AsyncDB, skip: int = 0, limit: int = 100) -> List[dict]:
+    return await adb.run(playlist_crud.get_playlist_summaries, skip=skip, limit=limit)
+
+
+async def get_playlist_summary(adb: AsyncDB, playlist_id: int) -> Optional[dict]:
+    return await adb.run(playlist_crud.get_playlist_summary, playlist_id)
+
+
+async def get_playlist_media(adb: AsyncDB, playlist_id: int) -> List[PlaylistMedia]:
+    return await adb.run(playlist_crud.get_playlist_media, playlist_id)
+
+
+async def get_playlist_version(adb: AsyncDB, playlist_id: int) -> Optional[int]:
+    return await adb.run(playlist_crud.get_playlist_version, playlist_id)
+
+
+async def get_changes_since(adb: AsyncDB, playlist_id: int, since_version: int) -> Optional[List[PlaylistChange]]:
+    return await adb.run(playlist_crud.get_changes_since, playlist_id, since_version)
+
+
+# Media
+
+async def get_media(adb: AsyncDB, media_id: int) -> Optional[Media]:
+    return await adb.run(media_crud.get_media, media_id)
+
+
+async def list_media(adb: AsyncDB, skip: int = 0, limit: int = 100) -> List[Media]:
+    return await adb.run(media_crud.list_media, skip=skip, limit=limit)
+
+
+async def get_media_playlist_ids(adb: AsyncDB, media_id: int) -> List[int]:
+    return await adb.run(media_crud.get_media_playlist_ids, media_id)
+
+
+# Schedules
+
+async def get_schedule(adb: AsyncDB, schedule_id: int) -> Optional[Schedule]:
+    return await adb.run(schedule_crud.get_schedule, schedule_id)
+
+
+async def list_schedules(adb: AsyncDB, skip: int = 0, limit: int = 100) -> List[Schedule]:
+    return await adb.run(schedule_crud.list_schedules, skip=skip, limit=limit)
+
+
+async def get_schedules_by_media(adb: AsyncDB, media_id: int) -> List[Schedule]:
+    return await adb.run(schedule_crud.get_schedules_by_media, media_id)
+
+
+async def get_active_schedules(adb: AsyncDB, schedule_type: Optional[str] = None) -> List[Schedule]:
+    return await adb.run(schedule_crud.get_active_schedules, schedule_type)
+
+
+async def get_schedules_for_date(adb: AsyncDB, target_date: date, weekday: int) -> List[Schedule]:
+    return await adb.run(schedule_crud.get_schedules_for_date, target_date, weekday)
@@ -0,0 +1,58 @@
+"""
+CRUD operations for MediaBlob (content-addressed storage with reference counting)
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Optional
+
+from app.db.models.media_blob import MediaBlob
+from app.utils.uploads import StoredUpload, place_blob
+
+
+def get_blob_by_hash(db: Session, sha256: str) -> Optional[MediaBlob]:
+    """Get blob by content hash"""
+    return db.query(MediaBlob).filter(MediaBlob.sha256 == sha256).first()
+
+
+def acquire_blob(db: Session, stored: StoredUpload, upload_dir: Optional[str] = None) -> MediaBlob:
+    """
+    Take one more reference to the blob of a staged upload and make sure its
+    file is in place. The blob is keyed by content only: a hit keeps the file
+    name of the first upload, whatever the extension of this one. Does not
+    commit: the caller commits together with the Media row.
+    """
+    # Primero la referencia (upsert): desde aquí la transacción tiene el lock de
+    # escritura y un delete_media concurrente ya no puede liberar el blob ni
+    # borrar su archivo hasta el commit
+    db.execute(
+        sqlite_insert(MediaBlob)
+        .values(sha256=stored.sha256, filename=stored.filename, size=stored.size, ref_count=1)
+        .on_conflict_do_update(index_elements=["sha256"], set_={"ref_count": MediaBlob.ref_count + 1})
+    )
+    blob = get_blob_by_hash(db, stored.sha256)
+    db.refresh(blob)
+    
+    # Después el archivo: se enlaza si falta (blob nuevo, o liberado justo antes),
+    # siempre con el nombre del blob para no dejar una copia por extensión
+    place_blob(stored._replace(filename=blob.filename), upload_dir)
+    return blob
+
+
+def release_blob(db: Session, blob_id: int) -> Optional[MediaBlob]:
+    """
+    Drop one reference to a blob. Returns the blob if that was its last
+    reference (the row is deleted and the caller should unlink the file),
+    None otherwise. Does not commit.
+    """
+    db.query(MediaBlob).filter(MediaBlob.id == blob_id).update(
+        {MediaBlob.ref_count: MediaBlob.ref_count - 1}, synchronize_session=False
+    )
+    db.flush()
+    blob = db.query(MediaBlob).filter(MediaBlob.id == blob_id).first()
+    if blob is None:
+        return None
+    db.refresh(blob)
+    if blob.ref_count > 0:
+        return None
+    db.delete(blob)
+    return blob
@@ -4,50 +4,93 @@ CRUD operations for Media
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import List, Optional
+from pathlib import Path
 import os
-import uuid
+import shutil
 from fastapi import UploadFile
 
-from app.db.models.media import Media
+from app.db.models.media import Media, MediaStatus
+from app.db.models.media_blob import MediaBlob
 from app.db.schemas.media_schema import MediaCreate, MediaUpdate
 from app.config import settings
+from app.db.crud import media_blob_crud, playlist_crud, schedule_crud
+from app.utils.uploads import StoredUpload, discard_staged, stream_to_blob_store
+from app.core.response_cache import MEDIA, response_versions
+from app.core.playlist_snapshots import playlist_snapshots
 
 
-def save_upload_file(file: UploadFile) -> str:
-    """Save uploaded file and return filepath"""
-    # Generar nombre único
-    file_extension = file.filename.split('.')[-1] if '.' in file.filename else ''
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    
-    # Asegurar que el directorio existe
-    upload_dir = settings.UPLOAD_DIR
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Guardar archivo
-    filepath = os.path.join(upload_dir, unique_filename)
-    with open(filepath, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
-    
-    # Devolver filepath relativo para servir archivos (sin el "media" inicial)
-    return f"/uploads/{unique_filename}"
-
-
-def create_media(db: Session, media_in: MediaCreate, file: UploadFile = None, filepath_override: str = None) -> Media:
-    """Create new media record. Si se pasa filepath_override, no guarda el archivo de nuevo."""
-    if filepath_override:
-        filepath = filepath_override
-    else:
-        filepath = save_upload_file(file)
-    db_media = Media(
-        filename=media_in.filename,
-        filepath=filepath,
-        media_type=media_in.media_type,
-        duration=media_in.duration
-    )
-    
-    db.add(db_media)
-    db.commit()
+def save_upload_file(file: UploadFile) -> StoredUpload:
+    """Stream uploaded file to a staging file in chunks, hashed with SHA-256"""
+    # Copia por bloques con límites de tamaño/extensión, hash incremental y rename atómico
+    return stream_to_blob_store(file.file, file.filename)
+
+
+def get_blob_url(blob: MediaBlob) -> str:
+    """Served URL of a stored blob (filepath relativo, sin el "media" inicial)"""
+    return f"/uploads/{blob.filename}"
+
+
+def get_media_disk_path(media: Media) -> Path:
+    """Filesystem path of a media file (db filepath is the served '/uploads/...' URL)"""
+    return Path(settings.UPLOAD_DIR) / os.path.basename(media.filepath)
+
+
+def get_media_hls_dir(media: Media) -> Path:
+    """Directory holding the HLS ladder of a media file"""
+    return Path(settings.UPLOAD_DIR) / "hls" / Path(media.filepath).stem
+
+
+def get_media_hls_url(media: Media) -> str:
+    """Served URL of the HLS master playlist of a media file"""
+    return f"/uploads/hls/{Path(media.filepath).stem}/master.m3u8"
+
+
+def create_media(
+    db: Session,
+    media_in: MediaCreate,
+    file: UploadFile = None,
+    filepath_override: str = None,
+    status: MediaStatus = MediaStatus.ready,
+    stored: StoredUpload = None
+) -> Media:
+    """
+    Create new media record. Si se pasa filepath_override o stored, no guarda
+    el archivo de nuevo; con stored el media queda enlazado a su blob (el
+    staging de stored lo descarta quien lo creó, con discard_staged).
+    """
+    staged_here = stored is None and not filepath_override
+    if staged_here:
+        stored = save_upload_file(file)
+    new_blob = None
+    try:
+        blob = media_blob_crud.acquire_blob(db, stored) if stored else None
+        # Con un blob existente el media apunta a su archivo, no a uno nuevo por extensión
+        filepath = filepath_override or get_blob_url(blob)
+        new_blob = blob.filename if blob is not None and blob.ref_count == 1 else None
+        db_media = Media(
+            filename=media_in.filename,
+            filepath=filepath,
+            media_type=media_in.media_type,
+            duration=media_in.duration,
+            status=status.value,
+            blob_id=blob.id if blob else None
+        )
+        
+        db.add(db_media)
+        db.commit()
+    except Exception:
+        if new_blob:
+            # Blob creado por esta subida: su archivo se borra antes del rollback,
+            # todavía con el lock de escritura (nadie más pudo referenciarlo)
+            final_path = os.path.join(settings.UPLOAD_DIR, new_blob)
+            if os.path.exists(final_path):
+                os.remove(final_path)
+        db.rollback()
+        raise
+    finally:
+        if staged_here:
+            discard_staged(stored)
+    response_versions.bump(MEDIA)
     db.refresh(db_media)
     return db_media
 
@@ -57,6 +100,14 @@ def get_media(db: Session, media_id: int) -> Optional[Media]:
     return db.query(Media).filter(Media.id == media_id).first()
 
 
+def get_processed_media_for_blob(db: Session, blob_id: int, exclude_id: int = None) -> Optional[Media]:
+    """Another ready media sharing the same blob, whose probe results can be reused"""
+    query = db.query(Media).filter(Media.blob_id == blob_id, Media.status == MediaStatus.ready.value)
+    if exclude_id is not None:
+        query = query.filter(Media.id != exclude_id)
+    return query.order_by(Media.id).first()
+
+
 def list_media(db: Session, skip: int = 0, limit: int = 100) -> List[Media]:
     """List media with pagination"""
     return db.query(Media).offset(skip).limit(limit).all()
@@ -74,6 +125,27 @@ def update_media(db: Session, media_id: int, media_update: MediaUpdate) -> Optio
     
     db.add(db_media)
     db.commit()
+    response_versions.bump(MEDIA)
+    playlist_snapshots.invalidate_media(media_id)
+    db.refresh(db_media)
+    return db_media
+
+
+def update_media_processing(db: Session, media_id: int, status: Optional[MediaStatus], **fields) -> Optional[Media]:
+    """Store the outcome of background processing (status plus probed fields like duration)"""
+    db_media = get_media(db, media_id)
+    if not db_media:
+        return None
+    
+    if status is not None:
+        db_media.status = status.value
+    for field, value in fields.items():
+        if value is not None:
+            setattr(db_media, field, value)
+    
+    db.commit()
+    response_versions.bump(MEDIA)
+    playlist_snapshots.invalidate_media(media_id)
     db.refresh(db_media)
     return db_media
 
@@ -87,6 +159,7 @@ def delete_media(db: Session, media_id: int) -> bool:
     # Primero eliminar o actualizar las referencias en schedules
     from app.db.models.schedule import Schedule
     schedules_with_media = db.query(Schedule).filter(Schedule.media_id == media_id).all()
+    deleted_schedule_ids = [schedule.id for schedule in schedules_with_media]
     
     for schedule in schedules_with_media:
         # Eliminar el schedule completo ya que el media asociado será eliminado
@@ -97,13 +170,26 @@ def delete_media(db: Session, media_id: int) -> bool:
     playlist_media_relations = db.query(PlaylistMedia).filter(PlaylistMedia.media_id == media_id).all()
     for relation in playlist_media_relations:
         db.delete(relation)
+        # Los players de esas playlists lo reciben como delta (?since_version=)
+        playlist_crud.record_change(db, relation.playlist_id, "media_removed", {"media_ids": [media_id]})
+    
+    # Con almacenamiento por contenido el archivo (y sus derivados) solo se
+    # elimina cuando desaparece la última referencia al blob
+    remove_files = True
+    released_blob = None
+    if db_media.blob_id is not None:
+        released_blob = media_blob_crud.release_blob(db, db_media.blob_id)
+        remove_files = released_blob is not None
+        if not remove_files:
+            print(f"ℹ️  Archivo compartido con otros media, se conserva: {db_media.filepath}")
     
     # Construir la ruta completa del archivo para eliminarlo
     # db_media.filepath es algo como "/uploads/filename.ext"
     # Necesitamos construir la ruta completa del sistema de archivos
-    if db_media.filepath:
-        # Extraer solo el nombre del archivo de la ruta
-        filename_only = os.path.basename(db_media.filepath)
+    if db_media.filepath and remove_files:
+        # Extraer solo el nombre del archivo de la ruta; con blob, el archivo es
+        # el del blob (puede no coincidir con el filepath de este media)
+        filename_only = released_blob.filename if released_blob else os.path.basename(db_media.filepath)
         # Construir la ruta completa usando UPLOAD_DIR
         full_file_path = os.path.join(settings.UPLOAD_DIR, filename_only)
         
@@ -132,10 +218,25 @@ def delete_media(db: Session, media_id: int) -> bool:
                     print(f"⚠️  Error eliminando thumbnail {thumbnail_path}: {e}")
             else:
                 print(f"⚠️  Thumbnail no encontrado: {thumbnail_path}")
+        
+        # Eliminar derivados de la ingesta (poster, proxy, mezzanine)
+        for derivative_url in (db_media.derivatives or {}).values():
+            derivative_path = os.path.join(settings.UPLOAD_DIR, os.path.basename(derivative_url))
+            if os.path.exists(derivative_path):
+                os.remove(derivative_path)
+        
+        # Eliminar la escalera HLS si se generó
+        hls_dir = get_media_hls_dir(db_media)
+        if hls_dir.exists():
+            shutil.rmtree(hls_dir, ignore_errors=True)
+            print(f"✅ HLS eliminado: {hls_dir}")
     
     # Finalmente eliminar el registro de media
     db.delete(db_media)
     db.commit()
+    response_versions.bump(MEDIA)
+    playlist_snapshots.invalidate_media(media_id)
+    schedule_crud.forget_schedules(db, deleted_schedule_ids)
     return True
 
 
@@ -168,3 +269,13 @@ def get_media_playlists(db: Session, media_id: int):
         })
     
     return playlists
+
+
+def get_media_playlist_ids(db: Session, media_id: int) -> List[int]:
+    """Ids of the playlists that contain a media (to route its WebSocket events)"""
+    from app.db.models.playlist_media import PlaylistMedia
+
+    rows = db.execute(
+        select(PlaylistMedia.playlist_id).where(PlaylistMedia.media_id == media_id).distinct()
+    )
+    return [playlist_id for (playlist_id,) in rows]
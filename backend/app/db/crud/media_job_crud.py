@@ -0,0 +1,129 @@
+"""
+CRUD operations for MediaJob
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import Iterable, List, Optional
+
+from app.db.models.media_job import MediaJob, MediaJobStatus
+
+
+def create_job(db: Session, media_id: int, job_type: str = "process", max_attempts: int = 3) -> MediaJob:
+    """Create a queued job for a media file"""
+    db_job = MediaJob(
+        media_id=media_id,
+        job_type=job_type,
+        status=MediaJobStatus.queued.value,
+        max_attempts=max_attempts
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def get_job(db: Session, job_id: int) -> Optional[MediaJob]:
+    """Get job by ID"""
+    return db.query(MediaJob).filter(MediaJob.id == job_id).first()
+
+
+def list_jobs(db: Session, status: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[MediaJob]:
+    """List jobs, newest first, optionally filtered by status"""
+    query = db.query(MediaJob)
+    if status:
+        query = query.filter(MediaJob.status == status)
+    return query.order_by(MediaJob.id.desc()).offset(skip).limit(limit).all()
+
+
+def list_jobs_for_media(db: Session, media_id: int) -> List[MediaJob]:
+    """List all jobs of a media file"""
+    return db.query(MediaJob).filter(MediaJob.media_id == media_id).order_by(MediaJob.id).all()
+
+
+def get_pending_job_ids(db: Session) -> List[int]:
+    """IDs of jobs waiting in the queue"""
+    rows = db.query(MediaJob.id)\
+        .filter(MediaJob.status == MediaJobStatus.queued.value)\
+        .order_by(MediaJob.id).all()
+    return [row.id for row in rows]
+
+
+def claim_job(db: Session, job_id: int) -> Optional[MediaJob]:
+    """
+    Atomically move a queued job to running and count the attempt.
+    Returns None if another worker (or process) claimed it first.
+    """
+    now = datetime.utcnow()
+    claimed = db.query(MediaJob)\
+        .filter(MediaJob.id == job_id, MediaJob.status == MediaJobStatus.queued.value)\
+        .update({
+            "status": MediaJobStatus.running.value,
+            "attempts": MediaJob.attempts + 1,
+            "progress": 0,
+            "started_at": now,
+            "heartbeat_at": now
+        }, synchronize_session=False)
+    db.commit()
+    return get_job(db, job_id) if claimed == 1 else None
+
+
+def heartbeat(db: Session, job_ids: Iterable[int]) -> None:
+    """Renew the lease of jobs running in this process"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return
+    db.query(MediaJob)\
+        .filter(MediaJob.id.in_(job_ids), MediaJob.status == MediaJobStatus.running.value)\
+        .update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session, lease_seconds: float) -> List[int]:
+    """
+    Put back in the queue running jobs whose worker stopped renewing the
+    lease (crash, restart). Returns the IDs re-queued by this call.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    stale = or_(MediaJob.heartbeat_at.is_(None), MediaJob.heartbeat_at < cutoff)
+    candidates = [row.id for row in db.query(MediaJob.id)
+                  .filter(MediaJob.status == MediaJobStatus.running.value, stale)]
+    requeued = []
+    for job_id in candidates:
+        # Condicional: si otro proceso lo reclamó o renovó entretanto no se toca
+        updated = db.query(MediaJob)\
+            .filter(MediaJob.id == job_id, MediaJob.status == MediaJobStatus.running.value, stale)\
+            .update({"status": MediaJobStatus.queued.value}, synchronize_session=False)
+        if updated == 1:
+            requeued.append(job_id)
+    db.commit()
+    return requeued
+
+
+def update_progress(db: Session, job_id: int, progress: float) -> None:
+    """Store the progress percentage of a running job"""
+    db.query(MediaJob).filter(MediaJob.id == job_id).update({"progress": progress})
+    db.commit()
+
+
+def mark_done(db: Session, job: MediaJob) -> MediaJob:
+    """Mark a job as successfully finished"""
+    job.status = MediaJobStatus.done.value
+    job.progress = 100
+    job.last_error = None
+    job.finished_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def mark_error(db: Session, job: MediaJob, error: str, final: bool) -> MediaJob:
+    """Record a failed attempt; the job goes back to the queue unless `final`"""
+    job.status = MediaJobStatus.failed.value if final else MediaJobStatus.queued.value
+    job.last_error = error
+    if final:
+        job.finished_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return job
@@ -3,14 +3,77 @@ CRUD operations for Playlist
 """
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
 
 from app.db.models.playlist import Playlist
 from app.db.models.playlist_media import PlaylistMedia
+from app.db.models.playlist_change import PlaylistChange
 from app.db.models.media import Media
 from app.db.models.schedule import Schedule
 from app.db.schemas.playlist_schema import PlaylistCreate, PlaylistUpdate, PlaylistStats
-from app.db.schemas.playlist_media_schema import PlaylistAddMediaRequest, PlaylistReorderRequest
+from app.db.schemas.playlist_media_schema import PlaylistAddMediaRequest
+from app.db.crud import schedule_crud
+from app.core.response_cache import PLAYLISTS, playlist_scope, response_versions
+from app.core.playlist_snapshots import playlist_snapshots
+
+# Cambios que se conservan por playlist; un cliente más atrasado recarga la playlist completa
+MAX_CHANGES_PER_PLAYLIST = 500
+
+
+def _invalidate(playlist_id: Optional[int] = None) -> None:
+    """Invalidate the cached player responses after a commit"""
+    response_versions.bump(PLAYLISTS, *([playlist_scope(playlist_id)] if playlist_id else []))
+    if playlist_id:
+        playlist_snapshots.invalidate_playlist(playlist_id)
+
+
+def record_change(db: Session, playlist_id: int, action: str, diff: dict) -> PlaylistChange:
+    """
+    Bump the playlist version and log the change in the current transaction
+    (committed by the caller). Diff formats by action:
+
+    - media_added: {"items": [{"media_id", "order_index", "duration"}]}
+    - media_removed: {"media_ids": [...]}
+    - media_reordered: {"order": [{"media_id", "order_index"}]} (only the items that moved)
+    - media_duration_updated: {"media_id", "duration"}
+    - playlist_modified: the changed fields ({"name", "description"})
+    """
+    # Incremento atómico: dos cambios concurrentes no pueden obtener la misma versión
+    db.query(Playlist).filter(Playlist.id == playlist_id)\
+        .update({Playlist.version: Playlist.version + 1}, synchronize_session=False)
+    version = db.query(Playlist.version).filter(Playlist.id == playlist_id).scalar()
+    change = PlaylistChange(playlist_id=playlist_id, version=version, action=action, diff=diff)
+    db.add(change)
+    db.query(PlaylistChange).filter(
+        PlaylistChange.playlist_id == playlist_id,
+        PlaylistChange.version <= version - MAX_CHANGES_PER_PLAYLIST
+    ).delete(synchronize_session=False)
+    return change
+
+
+def change_payload(change: PlaylistChange) -> dict:
+    """Delta sent to players (WebSocket event and ?since_version=)"""
+    return {"version": change.version, "action": change.action, **change.diff}
+
+
+def get_playlist_version(db: Session, playlist_id: int) -> Optional[int]:
+    return db.query(Playlist.version).filter(Playlist.id == playlist_id).scalar()
+
+
+def get_changes_since(db: Session, playlist_id: int, since_version: int) -> Optional[List[PlaylistChange]]:
+    """Changes after `since_version`; None when the log no longer covers it (reload everything)"""
+    version = get_playlist_version(db, playlist_id)
+    if version is None or since_version < 0 or since_version > version:
+        return None
+    changes = db.query(PlaylistChange).filter(
+        PlaylistChange.playlist_id == playlist_id,
+        PlaylistChange.version > since_version
+    ).order_by(PlaylistChange.version).all()
+    if len(changes) != version - since_version:
+        return None
+    return changes
 
 
 def create_playlist(db: Session, playlist_in: PlaylistCreate) -> Playlist:
@@ -18,6 +81,7 @@ def create_playlist(db: Session, playlist_in: PlaylistCreate) -> Playlist:
     db_playlist = Playlist(**playlist_in.dict())
     db.add(db_playlist)
     db.commit()
+    _invalidate()
     db.refresh(db_playlist)
     return db_playlist
 
@@ -36,6 +100,38 @@ def list_playlists(db: Session, skip: int = 0, limit: int = 100) -> List[Playlis
         .offset(skip).limit(limit).all()
 
 
+def _summary_query(db: Session):
+    """
+    Playlists with media_count and total_duration computed in one grouped query.
+    total_duration respeta la duración específica de PlaylistMedia (None = duración del media).
+    """
+    effective_duration = func.coalesce(PlaylistMedia.duration, Media.duration, 0)
+    return db.query(
+        Playlist.id,
+        Playlist.name,
+        Playlist.description,
+        Playlist.created_at,
+        Playlist.updated_at,
+        func.count(PlaylistMedia.id).label("media_count"),
+        func.coalesce(func.sum(effective_duration), 0).label("total_duration")
+    )\
+        .outerjoin(PlaylistMedia, PlaylistMedia.playlist_id == Playlist.id)\
+        .outerjoin(Media, Media.id == PlaylistMedia.media_id)\
+        .group_by(Playlist.id)
+
+
+def get_playlist_summaries(db: Session, skip: int = 0, limit: int = 100) -> List[dict]:
+    """List playlists with media_count and total_duration without loading their items"""
+    rows = _summary_query(db).order_by(Playlist.id).offset(skip).limit(limit).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def get_playlist_summary(db: Session, playlist_id: int) -> Optional[dict]:
+    """Summary (media_count, total_duration) of a single playlist"""
+    row = _summary_query(db).filter(Playlist.id == playlist_id).first()
+    return dict(row._mapping) if row else None
+
+
 def update_playlist(db: Session, playlist_id: int, playlist_update: PlaylistUpdate) -> Optional[Playlist]:
     """Update playlist record"""
     db_playlist = db.query(Playlist).filter(Playlist.id == playlist_id).first()
@@ -46,7 +142,11 @@ def update_playlist(db: Session, playlist_id: int, playlist_update: PlaylistUpda
     for field, value in update_data.items():
         setattr(db_playlist, field, value)
     
+    modified = {f: update_data[f] for f in ("name", "description") if f in update_data}
+    if modified:
+        record_change(db, playlist_id, "playlist_modified", modified)
     db.commit()
+    _invalidate(playlist_id)
     db.refresh(db_playlist)
     return db_playlist
 
@@ -57,8 +157,12 @@ def delete_playlist(db: Session, playlist_id: int) -> bool:
     if not db_playlist:
         return False
     
+    # Los schedules de la playlist se eliminan en cascada
+    schedule_ids = [schedule.id for schedule in db_playlist.schedules]
     db.delete(db_playlist)
     db.commit()
+    _invalidate(playlist_id)
+    schedule_crud.forget_schedules(db, schedule_ids)
     return True
 
 
@@ -84,33 +188,26 @@ def get_playlist_stats(db: Session) -> PlaylistStats:
         )
 
 
-def add_single_media_to_playlist(db: Session, playlist_id: int, media_id: int, duration: Optional[int] = None) -> bool:
+def add_single_media_to_playlist(db: Session, playlist_id: int, media_id: int, duration: Optional[int] = None) -> Optional[PlaylistChange]:
     """Add a single media to playlist with optional custom duration"""
     try:
         # Verificar que la playlist existe
         playlist = db.query(Playlist).filter(Playlist.id == playlist_id).first()
         if not playlist:
-            return False
+            return None
         
         # Verificar que el media existe
         media = db.query(Media).filter(Media.id == media_id).first()
         if not media:
-            return False
-        
-        # Verificar que no existe ya la relación
-        existing = db.query(PlaylistMedia).filter(
-            PlaylistMedia.playlist_id == playlist_id,
-            PlaylistMedia.media_id == media_id
-        ).first()
-        if existing:
-            return False
+            return None
         
         # Obtener el siguiente order_index
         max_order = db.query(func.max(PlaylistMedia.order_index))\
             .filter(PlaylistMedia.playlist_id == playlist_id).scalar()
         order_index = (max_order + 1) if max_order is not None else 0
         
-        # Crear la relación
+        # Crear la relación; si ya existe la rechaza el índice único (playlist_id, media_id),
+        # también cuando dos peticiones la añaden a la vez
         playlist_media = PlaylistMedia(
             playlist_id=playlist_id,
             media_id=media_id,
@@ -118,60 +215,108 @@ def add_single_media_to_playlist(db: Session, playlist_id: int, media_id: int, d
             duration=duration
         )
         db.add(playlist_media)
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            return None
+        change = record_change(db, playlist_id, "media_added", {
+            "items": [{"media_id": media_id, "order_index": order_index, "duration": duration}]
+        })
         db.commit()
-        return True
+        _invalidate(playlist_id)
+        return change
     except Exception as e:
         print(f"Error adding single media to playlist: {e}")
         db.rollback()
-        return False
+        return None
 
 
-def add_media_to_playlist(db: Session, request: PlaylistAddMediaRequest) -> bool:
-    """Add multiple media to playlist"""
+def bulk_add_media_to_playlist(db: Session, playlist_id: int, media_ids: List[int]) -> Optional[Tuple[Optional[PlaylistChange], List[dict]]]:
+    """
+    Append many media to a playlist with a constant number of statements.
+    Returns (change, results): one media_added change for everything added
+    (None if nothing was) and a {media_id, status, order_index} per requested
+    id, status being added, already_in_playlist, not_found or duplicate.
+    None if the playlist does not exist.
+    """
+    if not db.query(Playlist.id).filter(Playlist.id == playlist_id).first():
+        return None
+    
+    # Ids únicos en el orden pedido; las repeticiones se informan como duplicate
+    requested = list(dict.fromkeys(media_ids))
+    # Una consulta IN para validar los medios y otra para los ya enlazados
+    found = {media_id for (media_id,) in db.query(Media.id).filter(Media.id.in_(requested))} if requested else set()
+    linked = {
+        media_id for (media_id,) in db.query(PlaylistMedia.media_id).filter(
+            PlaylistMedia.playlist_id == playlist_id, PlaylistMedia.media_id.in_(requested)
+        )
+    } if requested else set()
+    
+    max_order = db.query(func.max(PlaylistMedia.order_index))\
+        .filter(PlaylistMedia.playlist_id == playlist_id).scalar()
+    next_order = (max_order + 1) if max_order is not None else 0
+    rows = []
+    for media_id in requested:
+        if media_id in found and media_id not in linked:
+            rows.append({"playlist_id": playlist_id, "media_id": media_id, "order_index": next_order + len(rows)})
+    
+    added = set()
     try:
-        # Verificar que la playlist existe
-        playlist = db.query(Playlist).filter(Playlist.id == request.playlist_id).first()
-        if not playlist:
-            return False
-        
-        # Obtener el order_index inicial
-        max_order = db.query(func.max(PlaylistMedia.order_index))\
-            .filter(PlaylistMedia.playlist_id == request.playlist_id).scalar()
-        next_order = (max_order + 1) if max_order is not None else 0
-        
-        # Agregar cada medio
-        for media_id in request.media_ids:
-            # Verificar que el media existe
-            media = db.query(Media).filter(Media.id == media_id).first()
-            if not media:
-                continue
-            
-            # Verificar que no existe ya la relación
-            existing = db.query(PlaylistMedia).filter(
-                PlaylistMedia.playlist_id == request.playlist_id,
-                PlaylistMedia.media_id == media_id
-            ).first()
-            if existing:
-                continue
-            
-            # Crear la relación
-            playlist_media = PlaylistMedia(
-                playlist_id=request.playlist_id,
-                media_id=media_id,
-                order_index=next_order
+        if rows:
+            # executemany; el índice único descarta lo que otra petición haya enlazado entretanto
+            result = db.execute(
+                sqlite_insert(PlaylistMedia).on_conflict_do_nothing(index_elements=["playlist_id", "media_id"]),
+                rows
             )
-            db.add(playlist_media)
-            next_order += 1
+            added = {row["media_id"] for row in rows}
+            if result.rowcount != len(rows):
+                orders = {row["media_id"]: row["order_index"] for row in rows}
+                added = {
+                    media_id for media_id, order_index in db.query(PlaylistMedia.media_id, PlaylistMedia.order_index)
+                    .filter(PlaylistMedia.playlist_id == playlist_id, PlaylistMedia.media_id.in_(orders))
+                    if orders[media_id] == order_index
+                }
+                linked.update(set(orders) - added)
         
+        items = [{"media_id": row["media_id"], "order_index": row["order_index"], "duration": None}
+                 for row in rows if row["media_id"] in added]
+        change = record_change(db, playlist_id, "media_added", {"items": items}) if items else None
         db.commit()
-        return True
     except Exception as e:
         print(f"Error adding media to playlist: {e}")
         db.rollback()
-        return False
+        raise
+    if change:
+        _invalidate(playlist_id)
+    
+    orders = {item["media_id"]: item["order_index"] for item in items}
+    results, seen = [], set()
+    for media_id in media_ids:
+        if media_id in seen:
+            status = "duplicate"
+        elif media_id in orders:
+            status = "added"
+        elif media_id in linked:
+            status = "already_in_playlist"
+        else:
+            status = "not_found"
+        seen.add(media_id)
+        results.append({"media_id": media_id, "status": status,
+                        "order_index": orders.get(media_id) if status == "added" else None})
+    return change, results
 
 
-def remove_media_from_playlist(db: Session, playlist_id: int, media_id: int) -> bool:
+def add_media_to_playlist(db: Session, playlist_id: int, request: PlaylistAddMediaRequest) -> Optional[PlaylistChange]:
+    """Add multiple media to playlist"""
+    try:
+        outcome = bulk_add_media_to_playlist(db, playlist_id, request.media_ids)
+    except Exception:
+        return None
+    return outcome[0] if outcome else None
+
+
+def remove_media_from_playlist(db: Session, playlist_id: int, media_id: int) -> Optional[PlaylistChange]:
     """Remove media from playlist"""
     try:
         playlist_media = db.query(PlaylistMedia).filter(
@@ -180,33 +325,44 @@ def remove_media_from_playlist(db: Session, playlist_id: int, media_id: int) ->
         ).first()
         
         if not playlist_media:
-            return False
+            return None
         
         db.delete(playlist_media)
+        change = record_change(db, playlist_id, "media_removed", {"media_ids": [media_id]})
         db.commit()
-        return True
+        _invalidate(playlist_id)
+        return change
     except Exception as e:
         print(f"Error removing media from playlist: {e}")
         db.rollback()
-        return False
+        return None
 
 
-def reorder_playlist_media(db: Session, request: PlaylistReorderRequest) -> bool:
-    """Reorder media in playlist"""
+def reorder_playlist_media(db: Session, playlist_id: int, media_orders: List[dict]) -> Optional[PlaylistChange]:
+    """Reorder media in playlist ([{"media_id", "order_index"}, ...]); None if nothing moved"""
     try:
-        # Actualizar el order_index de cada media en la playlist
-        for media_order in request.media_order:
-            db.query(PlaylistMedia).filter(
-                PlaylistMedia.playlist_id == request.playlist_id,
-                PlaylistMedia.media_id == media_order.media_id
-            ).update({"order_index": media_order.order_index})
+        current = {
+            pm.media_id: pm for pm in
+            db.query(PlaylistMedia).filter(PlaylistMedia.playlist_id == playlist_id).all()
+        }
+        # Solo los elementos que cambian de posición entran en el diff
+        moved = []
+        for media_order in media_orders:
+            playlist_media = current.get(media_order["media_id"])
+            if playlist_media and playlist_media.order_index != media_order["order_index"]:
+                playlist_media.order_index = media_order["order_index"]
+                moved.append({"media_id": playlist_media.media_id, "order_index": playlist_media.order_index})
         
+        if not moved:
+            return None
+        change = record_change(db, playlist_id, "media_reordered", {"order": moved})
         db.commit()
-        return True
+        _invalidate(playlist_id)
+        return change
     except Exception as e:
         print(f"Error reordering playlist media: {e}")
         db.rollback()
-        return False
+        return None
 
 
 def get_playlist_media(db: Session, playlist_id: int) -> List[PlaylistMedia]:
@@ -226,7 +382,7 @@ def get_playlist_media_relation(db: Session, playlist_id: int, media_id: int) ->
         ).first()
 
 
-def update_media_duration_in_playlist(db: Session, playlist_id: int, media_id: int, duration: int) -> bool:
+def update_media_duration_in_playlist(db: Session, playlist_id: int, media_id: int, duration: int) -> Optional[PlaylistChange]:
     """Update the duration of a specific media in a playlist"""
     playlist_media = db.query(PlaylistMedia)\
         .filter(
@@ -235,8 +391,10 @@ def update_media_duration_in_playlist(db: Session, playlist_id: int, media_id: i
         ).first()
     
     if not playlist_media:
-        return False
+        return None
     
     playlist_media.duration = duration
+    change = record_change(db, playlist_id, "media_duration_updated", {"media_id": media_id, "duration": duration})
     db.commit()
-    return True
+    _invalidate(playlist_id)
+    return change
@@ -0,0 +1,157 @@
+"""
+CRUD operations for the materialized playout plan
+
+Each materialized day is stored as the complete list of segments of its
+compiled timeline (app/core/schedule_index.py), gaps included, so a day with
+rows is a day that has been generated. Segments never cross midnight.
+"""
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models.playout_segment import PlayoutSegment
+from app.core.schedule_index import CompiledSchedule, ScheduleIndex, DayTimeline, schedule_index
+
+# Horizonte que se mantiene generado desde el arranque
+PLAN_DAYS = 7
+# Máximo de días que se pueden pedir en una consulta
+MAX_PLAN_DAYS = 62
+
+# Regenerar un día es borrar + insertar: se serializa dentro del proceso (entre
+# procesos lo serializa el lock de escritura de SQLite, ver sync_horizon)
+_materialize_lock = threading.Lock()
+
+
+def timeline_rows(timeline: DayTimeline) -> List[dict]:
+    """Rows for the segments of one compiled day"""
+    midnight = datetime.combine(timeline.day, time())
+    rows = []
+    ends = timeline.starts[1:] + [24 * 3600]
+    for start, end, rule in zip(timeline.starts, ends, timeline.winners):
+        rows.append({
+            "day": timeline.day,
+            "starts_at": midnight + timedelta(seconds=start),
+            "ends_at": midnight + timedelta(seconds=end),
+            "schedule_id": rule.id if rule else None,
+            "content_type": rule.content_type if rule else None,
+            "media_id": rule.content_id if rule and rule.content_type == "media" else None,
+            "playlist_id": rule.content_id if rule and rule.content_type == "playlist" else None,
+            "priority": rule.priority if rule else None,
+        })
+    return rows
+
+
+def get_materialized_days(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> Set[date]:
+    """Days (within [start, end] if given) that have a stored plan"""
+    query = db.query(PlayoutSegment.day).distinct()
+    if start:
+        query = query.filter(PlayoutSegment.day >= start)
+    if end:
+        query = query.filter(PlayoutSegment.day <= end)
+    return {day for (day,) in query.all()}
+
+
+def materialize_days(db: Session, days: Iterable[date], index: ScheduleIndex = schedule_index) -> int:
+    """(Re)generate the stored plan of `days`; returns the number of segments written"""
+    days = sorted(set(days))
+    if not days:
+        return 0
+    index.ensure_loaded(db)
+    with _materialize_lock:
+        rows = [row for day in days for row in timeline_rows(index.timeline(day))]
+        try:
+            db.query(PlayoutSegment).filter(PlayoutSegment.day.in_(days)).delete(synchronize_session=False)
+            db.bulk_insert_mappings(PlayoutSegment, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return len(rows)
+
+
+def ensure_days(db: Session, start: date, end: date, index: ScheduleIndex = schedule_index) -> int:
+    """Generate the days of [start, end] that are not stored yet"""
+    existing = get_materialized_days(db, start, end)
+    missing = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    return materialize_days(db, [day for day in missing if day not in existing], index)
+
+
+def prune_before(db: Session, day: date) -> int:
+    """Delete the plan of days before `day`"""
+    deleted = db.query(PlayoutSegment).filter(PlayoutSegment.day < day).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+# Campos que definen un segmento; dos planes con las mismas tuplas son idénticos
+SEGMENT_FIELDS = ("starts_at", "ends_at", "schedule_id", "content_type", "media_id", "playlist_id", "priority")
+
+
+def _stale_days(db: Session, desired: Dict[date, List[dict]]) -> List[date]:
+    """Days whose stored segments differ from the compiled ones"""
+    stored: Dict[date, List[tuple]] = {day: [] for day in desired}
+    columns = [getattr(PlayoutSegment, field) for field in SEGMENT_FIELDS]
+    for row in db.query(PlayoutSegment.day, *columns).filter(PlayoutSegment.day.in_(list(desired))):
+        stored[row[0]].append(tuple(row[1:]))
+    return sorted(
+        day for day, rows in desired.items()
+        if sorted(stored[day]) != sorted(tuple(r[f] for f in SEGMENT_FIELDS) for r in rows)
+    )
+
+
+def sync_horizon(db: Session, start: date, days: int = PLAN_DAYS, index: ScheduleIndex = schedule_index) -> int:
+    """
+    Bring the stored plan of the `days` days from `start` up to date and drop
+    older days, writing only the days that differ. Returns the segments written.
+
+    Meant for startup: with several workers, the first one rewrites what is
+    stale while holding SQLite's write lock; the others re-check under the
+    same lock, find the plan current and write nothing.
+    """
+    index.ensure_loaded(db)
+    desired = {start + timedelta(days=i): timeline_rows(index.timeline(start + timedelta(days=i)))
+               for i in range(days)}
+    outdated = db.query(PlayoutSegment.id).filter(PlayoutSegment.day < start).first() is not None
+    stale = _stale_days(db, desired)
+    # Termina la transacción de lectura: la de escritura debe empezar escribiendo
+    db.rollback()
+    if not outdated and not stale:
+        return 0
+    
+    with _materialize_lock:
+        try:
+            # Primera sentencia de escritura: toma el lock y la relectura ya ve lo último confirmado
+            db.query(PlayoutSegment).filter(PlayoutSegment.day < start).delete(synchronize_session=False)
+            stale = _stale_days(db, desired)
+            rows = [row for day in stale for row in desired[day]]
+            if stale:
+                db.query(PlayoutSegment).filter(PlayoutSegment.day.in_(stale)).delete(synchronize_session=False)
+                db.bulk_insert_mappings(PlayoutSegment, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return len(rows)
+
+
+def refresh_for_rules(db: Session, rules: Iterable[Optional[CompiledSchedule]],
+                      index: ScheduleIndex = schedule_index) -> int:
+    """Regenerate the stored days affected by a schedule change (old and new rules)"""
+    stored = get_materialized_days(db)
+    if not stored:
+        return 0
+    if not index.loaded:
+        # Sin índice no se conoce la regla anterior: se regenera todo lo almacenado
+        return materialize_days(db, stored, index)
+    rules = [rule for rule in rules if rule]
+    return materialize_days(db, [day for day in stored if any(rule.windows_on(day) for rule in rules)], index)
+
+
+def list_segments(db: Session, start: date, end: date, skip: int = 0, limit: int = 500) -> Tuple[int, List[PlayoutSegment]]:
+    """Stored segments of [start, end] ordered by start time, with the total count"""
+    query = db.query(PlayoutSegment).filter(PlayoutSegment.day >= start, PlayoutSegment.day <= end)
+    total = query.count()
+    items = query.order_by(PlayoutSegment.starts_at).offset(skip).limit(limit).all()
+    return total, items
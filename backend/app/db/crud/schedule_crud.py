@@ -2,12 +2,35 @@
 CRUD operations for Schedule
 """
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, union
 from typing import List, Optional
 from datetime import date, datetime
 
-from app.db.models.schedule import Schedule, ScheduleType
+from app.db.models.schedule import Schedule, ScheduleType, masks_with_weekday
+from app.db.models.schedule_specific_time import ScheduleSpecificTime
 from app.db.schemas.schedule_schema import ScheduleCreate, ScheduleUpdate
+from app.db.crud import playout_crud
+from app.core.schedule_index import schedule_index
+from app.core.response_cache import SCHEDULES, response_versions
+from app.core.playlist_snapshots import playlist_snapshots
+
+
+def _refresh_plan(db: Session, *rules, media_ids=()) -> None:
+    """Regenerar los días del plan de emisión que tocan las reglas (anterior y nueva)"""
+    # Todas las escrituras de schedules pasan por aquí después del commit
+    response_versions.bump(SCHEDULES)
+    # Los snapshots del player incluyen el schedule activo de cada media: solo caen
+    # las playlists que contienen los medios afectados (antes y después del cambio)
+    media_ids = {media_id for media_id in media_ids if media_id}
+    media_ids.update(rule.content_id for rule in rules if rule and rule.content_type == "media")
+    if media_ids:
+        playlist_snapshots.invalidate_media(*media_ids)
+    playout_crud.refresh_for_rules(db, rules, schedule_index)
+
+
+def forget_schedules(db: Session, schedule_ids: List[int], media_ids: List[int] = ()) -> None:
+    """Drop deleted schedules (e.g. cascaded from media/playlists) from the index and the plan"""
+    _refresh_plan(db, *[schedule_index.remove(schedule_id) for schedule_id in schedule_ids], media_ids=media_ids)
 
 
 def create_schedule(db: Session, schedule_in: ScheduleCreate) -> Schedule:
@@ -16,6 +39,7 @@ def create_schedule(db: Session, schedule_in: ScheduleCreate) -> Schedule:
     db.add(db_schedule)
     db.commit()
     db.refresh(db_schedule)
+    _refresh_plan(db, *schedule_index.upsert(db_schedule), media_ids=[db_schedule.media_id])
     return db_schedule
 
 
@@ -55,58 +79,71 @@ def get_active_schedules(db: Session, schedule_type: Optional[str] = None) -> Li
     return query.all()
 
 
-def get_schedules_for_date(db: Session, target_date: date, weekday: int) -> List[Schedule]:
-    """Get schedules that should run on a specific date and weekday"""
-    schedules = []
+def _query_occurrences(db: Session, start_date: date, end_date: date, weekday: Optional[int] = None):
+    """
+    Active schedules with an occurrence in [start_date, end_date].
     
-    # Obtener schedules simples que incluyan este día de la semana
-    simple_schedules = db.query(Schedule)\
-        .options(selectinload(Schedule.media), selectinload(Schedule.playlist))\
-        .filter(
+    Candidate ids come from one select per kind of occurrence joined with
+    UNION, each an index lookup instead of a scan of the whole table; the
+    candidates are then fetched by primary key and checked.
+    """
+    advanced = ScheduleType.advanced.value
+    ranged = and_(Schedule.schedule_type == advanced, Schedule.has_specific_times == False)
+    selects = [
+        # specific_times: filas normalizadas por fecha (índice day, schedule_id)
+        select(ScheduleSpecificTime.schedule_id.label("id"))
+        .where(ScheduleSpecificTime.day >= start_date, ScheduleSpecificTime.day <= end_date),
+        # Rangos de fechas: las campañas ya terminadas quedan fuera del índice por end_date
+        select(Schedule.id).where(ranged, Schedule.end_date >= start_date),
+        select(Schedule.id).where(ranged, Schedule.end_date == None),
+    ]
+    # Con specific_times solo cuentan esas fechas (dentro del rango, si lo hay)
+    matches = and_(
+        Schedule.schedule_type == advanced,
+        or_(Schedule.start_date == None, Schedule.start_date <= end_date),
+        or_(Schedule.end_date == None, Schedule.end_date >= start_date)
+    )
+    if weekday is not None:
+        # Simples: el bitmask admite 64 valores con el día -> IN sobre el índice
+        on_weekday = and_(
             Schedule.is_active == True,
-            Schedule.schedule_type == ScheduleType.simple
-        ).all()
-    
-    for schedule in simple_schedules:
-        if schedule.weekdays and weekday in schedule.weekdays:
-            schedules.append(schedule)
+            Schedule.schedule_type == ScheduleType.simple.value,
+            Schedule.weekday_mask.in_(masks_with_weekday(weekday))
+        )
+        selects.append(select(Schedule.id).where(on_weekday))
+        matches = or_(on_weekday, matches)
     
-    # Obtener schedules avanzados para esta fecha
-    advanced_schedules = db.query(Schedule)\
+    candidates = union(*selects).subquery()
+    return db.query(Schedule)\
         .options(selectinload(Schedule.media), selectinload(Schedule.playlist))\
-        .filter(
-            Schedule.is_active == True,
-            Schedule.schedule_type == ScheduleType.advanced,
-            or_(
-                and_(
-                    Schedule.start_date <= target_date,
-                    Schedule.end_date >= target_date
-                ),
-                Schedule.specific_times.contains(str(target_date))
-            )
-        ).all()
-    
-    schedules.extend(advanced_schedules)
+        .join(candidates, Schedule.id == candidates.c.id)\
+        .filter(Schedule.is_active == True, matches)
+
+
+def get_schedules_for_date(db: Session, target_date: date, weekday: int) -> List[Schedule]:
+    """Get schedules that should run on a specific date and weekday"""
+    schedules = _query_occurrences(db, target_date, target_date, weekday).all()
     
     # Ordenar por prioridad (mayor prioridad primero)
     return sorted(schedules, key=lambda x: x.priority, reverse=True)
 
 
 def get_schedules_by_date_range(db: Session, start_date: date, end_date: date) -> List[Schedule]:
-    """Get schedules that should run within a date range"""
-    return db.query(Schedule)\
-        .options(selectinload(Schedule.media), selectinload(Schedule.playlist))\
-        .filter(
-            Schedule.is_active == True,
-            Schedule.schedule_type == ScheduleType.advanced,
-            or_(
-                and_(
-                    Schedule.start_date <= end_date,
-                    Schedule.end_date >= start_date
-                ),
-                # Para specific_times necesitaríamos una lógica más compleja
-            )
-        ).all()
+    """Get advanced schedules that should run within a date range"""
+    return _query_occurrences(db, start_date, end_date).all()
+
+
+def backfill_schedule_occurrences(db: Session) -> int:
+    """Fill weekday_mask, has_specific_times and specific-time rows of schedules saved before they existed"""
+    pending = db.query(Schedule).filter(
+        or_(Schedule.weekday_mask == None, Schedule.has_specific_times == None)
+    ).all()
+    for schedule in pending:
+        # Reasignar dispara los validadores del modelo, que recalculan ambos
+        schedule.weekdays = schedule.weekdays
+        schedule.specific_times = schedule.specific_times
+    db.commit()
+    return len(pending)
 
 
 def reorder_playlist_schedules(db: Session, playlist_id: int, schedule_orders: List[tuple]) -> bool:
@@ -117,6 +154,7 @@ def reorder_playlist_schedules(db: Session, playlist_id: int, schedule_orders: L
                 and_(Schedule.id == schedule_id, Schedule.playlist_id == playlist_id)
             ).update({"order_index": new_order})
         db.commit()
+        response_versions.bump(SCHEDULES)
         return True
     except Exception:
         db.rollback()
@@ -132,6 +170,7 @@ def toggle_schedule_status(db: Session, schedule_id: int) -> Optional[Schedule]:
     schedule.is_active = not schedule.is_active
     db.commit()
     db.refresh(schedule)
+    _refresh_plan(db, *schedule_index.upsert(schedule), media_ids=[schedule.media_id])
     return schedule
 
 
@@ -148,6 +187,7 @@ def update_schedule(db: Session, schedule_id: int, schedule_update: ScheduleUpda
     db.add(db_schedule)
     db.commit()
     db.refresh(db_schedule)
+    _refresh_plan(db, *schedule_index.upsert(db_schedule), media_ids=[db_schedule.media_id])
     return db_schedule
 
 
@@ -157,6 +197,8 @@ def delete_schedule(db: Session, schedule_id: int) -> bool:
     if not db_schedule:
         return False
     
+    media_id = db_schedule.media_id
     db.delete(db_schedule)
     db.commit()
+    forget_schedules(db, [schedule_id], media_ids=[media_id])
     return True
@@ -2,18 +2,18 @@
 Database configuration and setup
 """
 from typing import Generator
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.config import settings
+from app.db.engine_profile import create_app_engine, create_read_engine
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = create_app_engine(settings.DATABASE_URL)
+# Pool de solo lectura para el player; sin él comparte el engine principal
+read_engine = create_read_engine(settings.DATABASE_URL) or engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base = declarative_base()
 
@@ -29,12 +29,33 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Dependency to get a read-only session (player endpoints)
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
     """
     Initialize database tables
     """
     # Import all models to ensure they are registered with Base
-    from app.db.models import User, Business, Media, Schedule
+    from app.db.models import User, Business, Media, Schedule, Playlist, PlaylistMedia, MediaJob, MediaBlob, PlayoutSegment, PlaylistChange
+    from app.db.crud.schedule_crud import backfill_schedule_occurrences
+    from app.db.migrations import migrate
+    
+    # Tablas nuevas y migraciones pendientes (app/db/migrations.py)
+    migrate(engine)
     
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Schedules creados antes del bitmask / tabla de fechas específicas
+    db = SessionLocal()
+    try:
+        backfill_schedule_occurrences(db)
+    finally:
+        db.close()
+
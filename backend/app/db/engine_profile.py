@@ -0,0 +1,89 @@
+"""
+SQLite engine profile
+
+Builds the engines used by app.db.database. For a file SQLite database:
+
+- Pragmas applied on every new connection: WAL journal (readers do not block
+  the writer and vice versa), synchronous=NORMAL (safe with WAL, one fsync per
+  checkpoint instead of per commit), busy_timeout (a writer waits for the lock
+  instead of failing with "database is locked"), page cache, mmap and
+  in-memory temp tables.
+- A QueuePool sized for the uvicorn worker count (WEB_CONCURRENCY): every
+  worker keeps its share of DB_MAX_CONNECTIONS open, instead of SQLAlchemy
+  1.4's default NullPool that reconnects (and re-runs the pragmas) per session.
+- An optional read-only engine (query_only) for player traffic, with its own
+  pool so screens polling the API do not take connections from admin writes.
+
+Other databases (or an in-memory SQLite) get the plain engine.
+"""
+import math
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+from app.config import settings
+
+
+def is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas() -> Dict[str, object]:
+    """Pragmas applied on connect, in order (journal_mode first)"""
+    return {
+        "journal_mode": "WAL" if settings.DB_WAL else "DELETE",
+        "synchronous": settings.DB_SYNCHRONOUS,
+        "busy_timeout": settings.DB_BUSY_TIMEOUT,
+        # Negativo: tamaño en KiB en lugar de páginas
+        "cache_size": -settings.DB_CACHE_SIZE_KB,
+        "mmap_size": settings.DB_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+
+
+def pool_size_for_workers(workers: int, max_connections: int) -> int:
+    """Connections each worker keeps open so all workers together stay within max_connections"""
+    return max(2, math.ceil(max_connections / max(1, workers)))
+
+
+def apply_pragmas(engine: Engine, pragmas: Dict[str, object], query_only: bool = False) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if query_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def create_app_engine(url: str, read_only: bool = False) -> Engine:
+    """Engine for the application database (read_only: the player pool)"""
+    if "sqlite" not in url:
+        return create_engine(url)
+    if not is_sqlite_file(url):
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    pool_size = pool_size_for_workers(settings.WEB_CONCURRENCY, settings.DB_MAX_CONNECTIONS)
+    engine = create_engine(
+        url,
+        # timeout del driver = espera por el lock en milisegundos / 1000
+        connect_args={"check_same_thread": False, "timeout": settings.DB_BUSY_TIMEOUT / 1000},
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=settings.DB_POOL_OVERFLOW,
+    )
+    apply_pragmas(engine, sqlite_pragmas(), query_only=read_only)
+    return engine
+
+
+def create_read_engine(url: str) -> Optional[Engine]:
+    """Separate read-only engine for player traffic; None to share the main engine"""
+    if not settings.DB_READ_POOL or not is_sqlite_file(url):
+        return None
+    return create_app_engine(url, read_only=True)
@@ -0,0 +1,301 @@
+"""
+Versioned schema migrations
+
+``init_db`` calls ``migrate()`` at startup:
+
+1. Tables that do not exist yet are created from the models (``create_all``).
+   On a fresh database every migration is then recorded as applied, since
+   the models already describe the latest schema.
+2. On an existing database, pending migrations from ``MIGRATIONS`` run in
+   version order. Each runs in its own ``BEGIN IMMEDIATE`` transaction
+   together with its ``schema_version`` row (SQLite DDL is transactional), so
+   a failing migration leaves no partial change behind. Before the first one,
+   the file is copied with SQLite's online backup API in small steps.
+
+Migrations marked ``online`` only add indexes. They are skipped at startup and
+applied by ``start_online()`` in a background thread once the app is serving.
+With WAL, readers keep working while an index is built; writers wait up to
+busy_timeout.
+
+Several workers may start at once: the applied versions are re-read inside
+each migration's write transaction, so every migration runs exactly once.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+# Páginas copiadas por paso del backup; entre pasos otros procesos pueden escribir
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+
+
+class MigrationError(Exception):
+    """A migration failed and was rolled back"""
+
+
+class MigrationContext:
+    """DDL helpers for a migration, bound to its transaction"""
+
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+
+    def execute(self, sql: str, **params):
+        return self.conn.execute(text(sql), params)
+
+    def has_table(self, table: str) -> bool:
+        return self.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name", name=table
+        ).first() is not None
+
+    def columns(self, table: str) -> Set[str]:
+        return {row[1] for row in self.execute(f"PRAGMA table_info({table})")}
+
+    def add_column(self, table: str, column: str, ddl: str) -> None:
+        """ALTER TABLE ... ADD COLUMN unless the column (or the whole table) is missing or already there"""
+        if self.has_table(table) and column not in self.columns(table):
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+    def create_index(self, name: str, table: str, columns: Sequence[str], unique: bool = False) -> None:
+        self.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        )
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[MigrationContext], None]
+    online: bool = False  # Solo índices: se aplica en segundo plano tras el arranque
+
+
+# =============================================================================
+# REGISTRO (solo se añaden al final; una versión publicada no se modifica)
+# =============================================================================
+
+def _playlist_media_duration(ctx: MigrationContext) -> None:
+    # Antes en migrate_db.py
+    ctx.add_column("playlist_media", "duration", "INTEGER")
+
+
+def _media_processing(ctx: MigrationContext) -> None:
+    ctx.add_column("media", "blob_id", "INTEGER REFERENCES media_blobs (id)")
+    ctx.create_index("ix_media_blob_id", "media", ["blob_id"])
+    ctx.add_column("media", "status", "VARCHAR NOT NULL DEFAULT 'ready'")
+    ctx.add_column("media", "hls_path", "VARCHAR")
+    ctx.add_column("media", "renditions", "JSON")
+    ctx.add_column("media", "derivatives", "JSON")
+    ctx.add_column("media_jobs", "progress", "FLOAT NOT NULL DEFAULT 0")
+
+
+def _schedule_occurrences(ctx: MigrationContext) -> None:
+    # init_db rellena los valores de los schedules existentes (backfill_schedule_occurrences)
+    ctx.add_column("schedules", "weekday_mask", "INTEGER")
+    ctx.add_column("schedules", "has_specific_times", "BOOLEAN")
+
+
+def _schedule_occurrence_indexes(ctx: MigrationContext) -> None:
+    ctx.create_index("ix_schedules_active_type_mask", "schedules", ["is_active", "schedule_type", "weekday_mask"])
+    ctx.create_index("ix_schedules_type_end_date", "schedules",
+                     ["schedule_type", "has_specific_times", "end_date", "start_date"])
+
+
+def _playlist_versions(ctx: MigrationContext) -> None:
+    ctx.add_column("playlists", "version", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _playlist_media_unique(ctx: MigrationContext) -> None:
+    # Duplicados de la antigua carrera de "comprobar y luego insertar": se conserva el primero
+    ctx.execute(
+        "DELETE FROM playlist_media WHERE id NOT IN "
+        "(SELECT MIN(id) FROM playlist_media GROUP BY playlist_id, media_id)"
+    )
+    ctx.create_index("uq_playlist_media_playlist_media", "playlist_media", ["playlist_id", "media_id"], unique=True)
+
+
+def _hot_lookup_indexes(ctx: MigrationContext) -> None:
+    ctx.create_index("ix_playlist_media_playlist_order", "playlist_media", ["playlist_id", "order_index"])
+    ctx.create_index("ix_schedules_media_active", "schedules", ["media_id", "is_active"])
+
+
+def _media_job_heartbeat(ctx: MigrationContext) -> None:
+    ctx.add_column("media_jobs", "heartbeat_at", "DATETIME")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "playlist_media_duration", _playlist_media_duration),
+    Migration(2, "media_processing", _media_processing),
+    Migration(3, "schedule_occurrences", _schedule_occurrences),
+    Migration(4, "schedule_occurrence_indexes", _schedule_occurrence_indexes, online=True),
+    Migration(5, "playlist_versions", _playlist_versions),
+    Migration(6, "playlist_media_unique", _playlist_media_unique),
+    Migration(7, "hot_lookup_indexes", _hot_lookup_indexes, online=True),
+    Migration(8, "media_job_heartbeat", _media_job_heartbeat),
+]
+
+
+def _check_registry(migrations: Sequence[Migration]) -> None:
+    versions = [migration.version for migration in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError("Migration versions must be unique and in ascending order")
+
+
+_check_registry(MIGRATIONS)
+
+
+# =============================================================================
+# EJECUCIÓN
+# =============================================================================
+
+def _begin_immediate(conn: Connection) -> None:
+    # pysqlite no abre transacción antes del DDL: se abre explícitamente y con el
+    # lock de escritura, para que otro worker no aplique la misma migración a la vez
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, "
+        "applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+
+
+def _applied(conn: Connection) -> Set[int]:
+    return {row[0] for row in conn.exec_driver_sql(f"SELECT version FROM {SCHEMA_VERSION_TABLE}")}
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name}
+    )
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    with engine.connect() as conn:
+        _ensure_version_table(conn)
+        return _applied(conn)
+
+
+def pending_migrations(engine: Engine, include_online: bool = True,
+                       migrations: Sequence[Migration] = MIGRATIONS) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [m for m in migrations if m.version not in applied and (include_online or not m.online)]
+
+
+def _create_tables(engine: Engine, migrations: Sequence[Migration]) -> bool:
+    """create_all for missing tables; on a fresh database stamp every migration. True if fresh"""
+    from app.db.database import Base
+
+    with engine.begin() as conn:
+        _begin_immediate(conn)
+        _ensure_version_table(conn)
+        ctx = MigrationContext(conn)
+        fresh = not any(ctx.has_table(table.name) for table in Base.metadata.sorted_tables)
+        Base.metadata.create_all(bind=conn)
+        if fresh and not _applied(conn):
+            for migration in migrations:
+                _record(conn, migration)
+    return fresh
+
+
+def apply_migration(engine: Engine, migration: Migration) -> bool:
+    """Run one migration in its own transaction; False if another process already applied it"""
+    started = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            _begin_immediate(conn)
+            if migration.version in _applied(conn):
+                return False
+            migration.upgrade(MigrationContext(conn))
+            _record(conn, migration)
+    except Exception as e:
+        raise MigrationError(f"Migration {migration.version} ({migration.name}) failed: {e}") from e
+    logger.info("Migración %s (%s) aplicada en %.2fs", migration.version, migration.name,
+                time.perf_counter() - started)
+    return True
+
+
+def migrate(engine: Engine, include_online: bool = False, backup: Optional[bool] = None,
+            migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """Bring the schema up to date; returns the versions applied by this call"""
+    if engine.dialect.name != "sqlite":
+        from app.db.database import Base
+        Base.metadata.create_all(bind=engine)
+        return []
+
+    if _create_tables(engine, migrations):
+        return []
+
+    pending = pending_migrations(engine, include_online, migrations)
+    if not pending:
+        return []
+
+    if backup if backup is not None else settings.DB_BACKUP_BEFORE_MIGRATE:
+        path = database_path(engine)
+        if path:
+            applied = applied_versions(engine)
+            backup_database(path, f"{path}.schema-v{max(applied, default=0)}.bak")
+
+    return [m.version for m in pending if apply_migration(engine, m)]
+
+
+def start_online(engine: Engine, migrations: Sequence[Migration] = MIGRATIONS) -> Optional[threading.Thread]:
+    """Apply pending online migrations (indexes) in a background thread"""
+    if engine.dialect.name != "sqlite":
+        return None
+    pending = [m for m in pending_migrations(engine, True, migrations) if m.online]
+    if not pending:
+        return None
+
+    def run():
+        for migration in pending:
+            try:
+                apply_migration(engine, migration)
+            except MigrationError:
+                # Se reintenta en el próximo arranque; la app funciona sin el índice
+                logger.exception("Migración online %s no aplicada", migration.version)
+
+    thread = threading.Thread(target=run, name="schema-migrations", daemon=True)
+    thread.start()
+    return thread
+
+
+# =============================================================================
+# BACKUP
+# =============================================================================
+
+def database_path(engine: Engine) -> Optional[str]:
+    database = engine.url.database
+    if not database or database == ":memory:":
+        return None
+    return os.path.abspath(database)
+
+
+def backup_database(source_path: str, target_path: str, pages: int = BACKUP_PAGES_PER_STEP) -> str:
+    """Copy a live SQLite database with the online backup API, a few pages at a time"""
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        # Por pasos: el lock de lectura se suelta entre pasos y las escrituras de
+        # otras conexiones reinician la copia en lugar de quedar bloqueadas
+        source.backup(target, pages=pages, sleep=BACKUP_STEP_SLEEP)
+    finally:
+        target.close()
+        source.close()
+    logger.info("Backup de %s en %s", source_path, target_path)
+    return target_path
@@ -4,6 +4,12 @@ from .user import User
 from .business import Business
 from .media import Media
 from .schedule import Schedule
+from .schedule_specific_time import ScheduleSpecificTime
 from .playlist import Playlist
+from .playlist_media import PlaylistMedia
+from .media_job import MediaJob
+from .media_blob import MediaBlob
+from .playout_segment import PlayoutSegment
+from .playlist_change import PlaylistChange
 
-__all__ = ["User", "Business", "Media", "Schedule", "Playlist"]
+__all__ = ["User", "Business", "Media", "Schedule", "ScheduleSpecificTime", "Playlist", "PlaylistMedia", "MediaJob", "MediaBlob", "PlayoutSegment", "PlaylistChange"]
@@ -2,7 +2,7 @@
 """
 Media model
 """
-from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from enum import Enum
@@ -15,16 +15,29 @@ class MediaType(str, Enum):
     video = "video"
 
 
+class MediaStatus(str, Enum):
+    processing = "processing"  # Subido, esperando probe/thumbnail en segundo plano
+    ready = "ready"
+    failed = "failed"
+
+
 class Media(Base):
     __tablename__ = "media"
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False, index=True)
     filepath = Column(String, nullable=False)  # Almacenado en /media/uploads
+    blob_id = Column(Integer, ForeignKey("media_blobs.id"), nullable=True, index=True)  # Archivo compartido por hash (None en media antiguos)
     media_type = Column(SQLEnum(MediaType), nullable=False)
     duration = Column(Integer, nullable=False)  # Segundos de reproducción
+    status = Column(String, nullable=False, default=MediaStatus.ready.value, server_default=MediaStatus.ready.value)
+    hls_path = Column(String, nullable=True)    # URL del master playlist HLS (/uploads/hls/<id>/master.m3u8)
+    renditions = Column(JSON, nullable=True)    # [{name, height, bandwidth, playlist}, ...]
+    derivatives = Column(JSON, nullable=True)   # URLs de thumbnail, poster, proxy y mezzanine generados en la ingesta
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     schedules = relationship("Schedule", back_populates="media", cascade="all, delete-orphan")
-    playlist_media = relationship("PlaylistMedia", back_populates="media", cascade="all, delete-orphan")
\ No newline at end of file
+    playlist_media = relationship("PlaylistMedia", back_populates="media", cascade="all, delete-orphan")
+    jobs = relationship("MediaJob", back_populates="media", cascade="all, delete-orphan")
+    blob = relationship("MediaBlob", back_populates="media")
@@ -0,0 +1,22 @@
+"""
+MediaBlob model - Content-addressed media files shared by Media rows
+"""
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+
+class MediaBlob(Base):
+    __tablename__ = "media_blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    filename = Column(String, nullable=False)  # Nombre en UPLOAD_DIR: <sha256><ext>
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Media que apuntan a este archivo
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    media = relationship("Media", back_populates="blob")
@@ -0,0 +1,37 @@
+"""
+MediaJob model - Persistent background processing jobs for media files
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from enum import Enum
+
+from app.db.database import Base
+
+
+class MediaJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class MediaJob(Base):
+    __tablename__ = "media_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    media_id = Column(Integer, ForeignKey("media.id"), nullable=False, index=True)
+    job_type = Column(String, nullable=False, default="process")  # Tipo de procesamiento (probe + thumbnail)
+    status = Column(String, nullable=False, default=MediaJobStatus.queued.value, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    progress = Column(Float, nullable=False, default=0, server_default="0")  # Porcentaje 0-100 leído de FFmpeg
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Latido (UTC) del worker que lo ejecuta; sin él se reclama
+    
+    # Relationships
+    media = relationship("Media", back_populates="jobs")
@@ -16,7 +16,10 @@ class Playlist(Base):
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Se incrementa con cada cambio de sus elementos (ver playlist_changes)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     schedules = relationship("Schedule", back_populates="playlist", cascade="all, delete-orphan")
     playlist_media = relationship("PlaylistMedia", back_populates="playlist", cascade="all, delete-orphan", order_by="PlaylistMedia.order_index")
+    changes = relationship("PlaylistChange", cascade="all, delete-orphan", order_by="PlaylistChange.version")
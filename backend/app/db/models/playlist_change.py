@@ -0,0 +1,22 @@
+"""
+PlaylistChange model - Change log of a playlist's items, one row per version
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class PlaylistChange(Base):
+    __tablename__ = "playlist_changes"
+    __table_args__ = (
+        UniqueConstraint("playlist_id", "version", name="uq_playlist_changes_version"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    playlist_id = Column(Integer, ForeignKey("playlists.id"), nullable=False, index=True)
+    version = Column(Integer, nullable=False)  # Versión de la playlist tras aplicar el cambio
+    # media_added | media_removed | media_reordered | media_duration_updated | playlist_modified
+    action = Column(String, nullable=False)
+    diff = Column(JSON, nullable=False)  # Ver playlist_crud.record_change
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
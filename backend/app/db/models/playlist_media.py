@@ -1,7 +1,7 @@
 """
 PlaylistMedia model - Many-to-many relationship between Playlist and Media
 """
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -10,6 +10,12 @@ from app.db.database import Base
 
 class PlaylistMedia(Base):
     __tablename__ = "playlist_media"
+    __table_args__ = (
+        # Un medio aparece una sola vez por playlist; también sirve las búsquedas por (playlist_id, media_id)
+        Index("uq_playlist_media_playlist_media", "playlist_id", "media_id", unique=True),
+        # Elementos de una playlist en orden sin ordenar en memoria
+        Index("ix_playlist_media_playlist_order", "playlist_id", "order_index"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     playlist_id = Column(Integer, ForeignKey("playlists.id"), nullable=False, index=True)
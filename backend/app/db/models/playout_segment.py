@@ -0,0 +1,26 @@
+"""
+PlayoutSegment model - Materialized playout plan (priority-resolved schedule timeline)
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Date
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class PlayoutSegment(Base):
+    __tablename__ = "playout_segments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)                      # Día del plan al que pertenece
+    starts_at = Column(DateTime, nullable=False, unique=True, index=True)  # Hora local, sin solapes
+    ends_at = Column(DateTime, nullable=False)
+    
+    # Schedule ganador; NULL = hueco sin programación (suena la playlist por defecto)
+    # Sin FK: es una instantánea que se regenera cuando el schedule cambia o se borra
+    schedule_id = Column(Integer, nullable=True, index=True)
+    content_type = Column(String, nullable=True)  # media | playlist
+    media_id = Column(Integer, nullable=True)
+    playlist_id = Column(Integer, nullable=True)
+    priority = Column(Integer, nullable=True)
+    
+    generated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -2,10 +2,11 @@
 """
 Schedule model - Enhanced scheduling system
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Boolean, Date, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from enum import Enum
+from typing import List, Optional
 
 from app.db.database import Base
 
@@ -15,8 +16,34 @@ class ScheduleType(str, Enum):
     advanced = "advanced"  # Programación avanzada con fechas específicas
 
 
+# Bit n = día n (0=Lunes ... 6=Domingo)
+ALL_WEEKDAYS = 0b1111111
+
+
+def weekdays_to_mask(weekdays: Optional[List[int]]) -> int:
+    """[0, 2, 4] -> 0b0010101; None or [] means every day"""
+    if not weekdays:
+        return ALL_WEEKDAYS
+    mask = 0
+    for weekday in weekdays:
+        mask |= 1 << int(weekday)
+    return mask & ALL_WEEKDAYS
+
+
+def masks_with_weekday(weekday: int) -> List[int]:
+    """Every mask value that includes `weekday` (64 values), for an indexed IN lookup"""
+    return [mask for mask in range(1, ALL_WEEKDAYS + 1) if mask & (1 << weekday)]
+
+
 class Schedule(Base):
     __tablename__ = "schedules"
+    __table_args__ = (
+        Index("ix_schedules_active_type_mask", "is_active", "schedule_type", "weekday_mask"),
+        # end_date tras las igualdades: las campañas ya terminadas quedan fuera del rango del índice
+        Index("ix_schedules_type_end_date", "schedule_type", "has_specific_times", "end_date", "start_date"),
+        # Schedule activo de un media (snapshot del player, borrados en cascada)
+        Index("ix_schedules_media_active", "media_id", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     media_id = Column(Integer, ForeignKey("media.id"), nullable=True, index=True)  # Puede ser NULL si es para playlist
@@ -30,11 +57,13 @@ class Schedule(Base):
     daily_start = Column(String, nullable=True)  # HH:MM inicio (ej: "10:00")
     daily_end = Column(String, nullable=True)    # HH:MM fin (ej: "16:00")
     weekdays = Column(JSON, nullable=True)       # [0,1,2,3,4,5,6] donde 0=Lunes, 6=Domingo
+    weekday_mask = Column(Integer, nullable=True, default=ALL_WEEKDAYS)  # weekdays como bitmask, se mantiene solo
     
     # Programación AVANZADA (fechas específicas)
     start_date = Column(Date, nullable=True)     # Fecha de inicio (ej: campaña de Halloween)
     end_date = Column(Date, nullable=True)       # Fecha de fin
     specific_times = Column(JSON, nullable=True) # Lista de fechas/horas específicas
+    has_specific_times = Column(Boolean, nullable=True, default=False)  # Derivado de specific_times, se mantiene solo
     
     # Configuración adicional
     is_active = Column(Boolean, default=True)    # Para activar/desactivar schedule
@@ -45,4 +74,30 @@ class Schedule(Base):
     
     # Relationships
     media = relationship("Media", back_populates="schedules")
-    playlist = relationship("Playlist", back_populates="schedules")
\ No newline at end of file
+    playlist = relationship("Playlist", back_populates="schedules")
+    # specific_times normalizados (una fila por fecha/ventana), se mantienen solos
+    specific_dates = relationship(
+        "ScheduleSpecificTime", back_populates="schedule", cascade="all, delete-orphan"
+    )
+    
+    @validates("weekdays")
+    def _sync_weekday_mask(self, key, weekdays):
+        self.weekday_mask = weekdays_to_mask(weekdays)
+        return weekdays
+    
+    @validates("specific_times")
+    def _sync_specific_dates(self, key, specific_times):
+        # Import local: schedule_index importa este modelo
+        from app.core.schedule_index import parse_specific_time
+        from app.db.models.schedule_specific_time import ScheduleSpecificTime
+        
+        rows = []
+        for entry in specific_times or []:
+            parsed = parse_specific_time(entry)
+            if parsed:
+                day, (start, end) = parsed
+                rows.append(ScheduleSpecificTime(day=day, start_seconds=start, end_seconds=end))
+        self.specific_dates = rows
+        # Con specific_times no válidos nunca se reproduce (como en el índice): no es un rango
+        self.has_specific_times = bool(specific_times)
+        return specific_times
@@ -0,0 +1,24 @@
+"""
+ScheduleSpecificTime model - Normalized occurrences of Schedule.specific_times
+"""
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+
+class ScheduleSpecificTime(Base):
+    __tablename__ = "schedule_specific_times"
+    __table_args__ = (
+        # Búsqueda por fecha: "qué schedules tienen una ocurrencia el día X"
+        Index("ix_schedule_specific_times_day_schedule", "day", "schedule_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    schedule_id = Column(Integer, ForeignKey("schedules.id", ondelete="CASCADE"), nullable=False, index=True)
+    day = Column(Date, nullable=False)
+    start_seconds = Column(Integer, nullable=False)  # Segundos desde medianoche, [inicio, fin)
+    end_seconds = Column(Integer, nullable=False)
+    
+    # Relationships
+    schedule = relationship("Schedule", back_populates="specific_dates")
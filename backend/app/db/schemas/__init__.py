@@ -6,5 +6,6 @@ from . import schedule_schema
 from . import business_schema
 from . import token_schema
 from . import playlist_schema
+from . import media_job_schema
 
-__all__ = ["user_schema", "media_schema", "schedule_schema", "business_schema", "token_schema", "playlist_schema"]
+__all__ = ["user_schema", "media_schema", "schedule_schema", "business_schema", "token_schema", "playlist_schema", "media_job_schema"]
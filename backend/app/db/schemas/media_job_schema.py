@@ -0,0 +1,24 @@
+"""
+MediaJob schemas for API responses
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class MediaJobRead(BaseModel):
+    id: int
+    media_id: int
+    job_type: str
+    status: str
+    attempts: int
+    max_attempts: int
+    progress: float = 0
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
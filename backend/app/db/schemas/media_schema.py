@@ -3,7 +3,7 @@ Media schemas for API validation
 """
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 from fastapi import UploadFile
 
@@ -29,6 +29,10 @@ class MediaRead(MediaBase):
     created_at: datetime
     file_url: Optional[str] = None
     served_filename: Optional[str] = None
+    status: str = "ready"  # processing | ready | failed
+    hls_path: Optional[str] = None  # Master playlist HLS si ya se generó
+    renditions: Optional[List[dict]] = None
+    derivatives: Optional[dict] = None  # thumbnail, poster, proxy, mezzanine
 
     class Config:
         orm_mode = True
@@ -37,3 +41,23 @@ class MediaRead(MediaBase):
 class MediaUpdate(BaseModel):
     duration: Optional[int] = None
     # No permitimos cambiar tipo o nombre de fichero
+
+
+class ResumableUploadInit(BaseModel):
+    filename: str
+    media_type: MediaType
+    size: int  # Tamaño total en bytes
+    duration: int = 0  # Se sobrescribe con la metadata real en videos
+    sha256: Optional[str] = None  # Checksum opcional del archivo completo
+
+
+class ResumableUploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    media_type: MediaType
+    size: int
+    received_bytes: int
+    received_ranges: List[List[int]]
+    next_offset: Optional[int] = None  # None cuando no falta ningún byte
+    max_chunk_size: int
+    complete: bool
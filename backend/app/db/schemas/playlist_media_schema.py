@@ -35,6 +35,19 @@ class PlaylistAddMediaRequest(BaseModel):
     media_ids: List[int]
 
 
+class PlaylistBulkAddResult(BaseModel):
+    media_id: int
+    status: str  # added | already_in_playlist | not_found | duplicate
+    order_index: Optional[int] = None
+
+
+class PlaylistBulkAddResponse(BaseModel):
+    playlist_id: int
+    version: Optional[int] = None  # Versión de la playlist tras la operación
+    added: int
+    results: List[PlaylistBulkAddResult]
+
+
 # Para agregar un solo medio
 class PlaylistAddSingleMediaRequest(BaseModel):
     media_id: int
@@ -1,21 +1,35 @@
 """
 FastAPI main application
 """
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import RedirectResponse
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
+from datetime import date
+import asyncio
 import os
 import socket
 import uvicorn
 
 from app.config import settings
 from app.db import init_db, get_db
+from app.db.database import SessionLocal, engine
+from app.db import migrations
 from sqlalchemy.orm import Session
 from app.db.crud.user_crud import count_users
-from app.db.crud import business_crud
-from app.api.routers import auth, media, schedules, business, ws, playlists, player
+from app.db.crud import business_crud, playout_crud
+from app.core.job_queue import job_queue
+from app.core.schedule_index import schedule_index
+from app.core.schedule_notifier import schedule_notifier
+from app.core.websocket_manager import manager as ws_manager
+from app.core.event_bus import event_bus
+from app.core.response_cache import response_versions
+from app.core.playlist_snapshots import playlist_snapshots
+from app.core.media_delivery import MediaFiles
+from app.core.static_assets import PrecompressedStaticFiles, SpaIndex
+from app.api.routers import auth, media, schedules, business, ws, playlists, player, system
+from app.utils import ffmpeg
 
 
 def check_port_available(port):
@@ -36,14 +50,69 @@ def find_available_port(start_port=8000, end_port=8010):
     return None
 
 
+def load_schedule_index():
+    db = SessionLocal()
+    try:
+        schedule_index.load(db)
+        # Plan de emisión: solo se reescriben los días que no coinciden con los schedules
+        # (cambios fuera del proceso); con varios workers lo hace el primero que arranca
+        playout_crud.sync_horizon(db, date.today(), index=schedule_index)
+    finally:
+        db.close()
+
+
+# Eventos de otro worker que cambian los schedules: el índice de este proceso queda desactualizado
+SCHEDULE_CHANGE_EVENTS = {
+    "schedule_created", "schedule_updated", "schedule_deleted", "schedule_toggled",
+    "media_deleted", "playlist_deleted",
+}
+
+
+def reload_schedule_index():
+    db = SessionLocal()
+    try:
+        schedule_index.load(db)
+    finally:
+        db.close()
+
+
+async def on_remote_event(event: str, data: dict):
+    # Las versiones de respuesta son por proceso: cualquier cambio de contenido las invalida
+    if event.startswith(("playlist_", "media_", "schedule_")) and event != "media_processing_progress":
+        response_versions.bump_all()
+        # El snapshot de otro worker no se puede invalidar con precisión desde aquí
+        playlist_snapshots.clear()
+    if event in SCHEDULE_CHANGE_EVENTS:
+        await run_in_threadpool(reload_schedule_index)
+
+
+event_bus.add_remote_listener(on_remote_event)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     init_db()
+    # Migraciones que solo crean índices: en segundo plano, sin retrasar el arranque
+    migrations.start_online(engine)
+    # Probe único de FFmpeg: evita lanzar procesos de verificación en cada operación
+    await run_in_threadpool(ffmpeg.probe_capabilities, True)
+    job_queue.start(asyncio.get_running_loop())
+    # Índice de schedules compilado una vez (y plan de emisión); luego se actualizan de forma incremental
+    await run_in_threadpool(load_schedule_index)
+    # Un único temporizador empuja schedule_started/schedule_ended por WebSocket
+    schedule_notifier.start()
+    # Heartbeat de WebSocket: detecta y desconecta pantallas caídas
+    ws_manager.start()
+    # Bus de eventos: con varios workers reenvía los eventos a las conexiones de los demás
+    await event_bus.start()
     
     yield
     # Shutdown
-    pass
+    await event_bus.stop()
+    await ws_manager.stop()
+    await schedule_notifier.stop()
+    job_queue.stop()
 
 
 # Crear directorio de uploads ANTES de montar archivos estáticos
@@ -66,19 +135,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Static files
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+# Media subida: Range/multi-range, ETag fuerte y caché immutable para nombres por contenido
+app.mount("/uploads", MediaFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Serve frontend from static directory
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
-if os.path.exists(os.path.join(STATIC_DIR, "index.html")):
+# index.html se mantiene en memoria (con sus variantes .br/.gz y ETag); se recarga al reiniciar
+spa_index = SpaIndex(os.path.join(STATIC_DIR, "index.html"))
+if spa_index.load():
     # Montar archivos estáticos del frontend (CSS, JS, imágenes, etc.)
-    app.mount("/css", StaticFiles(directory=os.path.join(STATIC_DIR, "css")), name="css")
-    app.mount("/js", StaticFiles(directory=os.path.join(STATIC_DIR, "js")), name="js")
-    app.mount("/fonts", StaticFiles(directory=os.path.join(STATIC_DIR, "fonts")), name="fonts")
+    # Se sirven las variantes precomprimidas del build y los nombres con hash son immutable
+    app.mount("/css", PrecompressedStaticFiles(directory=os.path.join(STATIC_DIR, "css")), name="css")
+    app.mount("/js", PrecompressedStaticFiles(directory=os.path.join(STATIC_DIR, "js")), name="js")
+    app.mount("/fonts", PrecompressedStaticFiles(directory=os.path.join(STATIC_DIR, "fonts")), name="fonts")
     
     # También montar toda la carpeta static para archivos no específicos
-    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    app.mount("/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
     
     print(f"✅ Frontend servido desde: {STATIC_DIR}")
     print(f"   📁 Archivos estáticos disponibles desde raíz")
@@ -92,6 +164,7 @@ app.include_router(schedules.router, prefix="/api/schedules", tags=["schedules"]
 app.include_router(playlists.router, prefix="/api/playlists", tags=["playlists"])
 app.include_router(business.router, prefix="/api/business", tags=["business"])
 app.include_router(player.router, prefix="/api", tags=["player-public"])  # Endpoints públicos del player
+app.include_router(system.router, prefix="/api/system", tags=["system"])
 app.include_router(ws.router)
 
 
@@ -105,7 +178,7 @@ async def api_health_check():
 
 
 @app.get("/", include_in_schema=False)
-async def root(db: Session = Depends(get_db)):
+async def root(request: Request, db: Session = Depends(get_db)):
     """Serve SPA entry or redirect based on setup state"""
     if count_users(db) == 0:
         return RedirectResponse(url="/login")
@@ -113,14 +186,13 @@ async def root(db: Session = Depends(get_db)):
         return RedirectResponse(url="/config")
     
     # Servir el frontend si existe
-    index_file = os.path.join(STATIC_DIR, "index.html")
-    if os.path.exists(index_file):
-        return FileResponse(index_file)
+    if spa_index.available:
+        return spa_index.response(request)
     return {"detail": "Frontend not built"}
 
 
 @app.get("/{full_path:path}", include_in_schema=False)
-async def spa_router(full_path: str):
+async def spa_router(full_path: str, request: Request):
     """Catch-all para rutas del frontend - debe ir AL FINAL"""
     # Evitar interferir con rutas de API y archivos estáticos
     if (full_path.startswith("api/") or 
@@ -129,9 +201,8 @@ async def spa_router(full_path: str):
         full_path == "health"):
         raise HTTPException(status_code=404, detail="Not found")
     
-    index_file = os.path.join(STATIC_DIR, "index.html")
-    if os.path.exists(index_file):
-        return FileResponse(index_file)
+    if spa_index.available:
+        return spa_index.response(request)
     return {"detail": "Not Found"}
 
 
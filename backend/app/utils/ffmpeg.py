@@ -1,23 +1,118 @@
 import subprocess
 import json
 import logging
+import shutil
+import threading
+from datetime import datetime
 from pathlib import Path
+from typing import Callable, Dict, IO, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Resultado cacheado del probe de capacidades (se ejecuta una vez al arrancar)
+_capabilities: Optional[dict] = None
+_capabilities_lock = threading.Lock()
 
-def is_ffmpeg_installed() -> bool:
+
+def _run_quiet(cmd: List[str]) -> str:
+    result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return result.stdout
+
+
+def _parse_codec_list(output: str) -> List[str]:
     """
-    Verifica si FFmpeg está disponible en el sistema.
+    Parsea la salida de `ffmpeg -encoders` / `ffmpeg -decoders`.
+    Las entradas vienen después de la línea ' ------' con formato ' V....D libx264  descripción'.
     """
+    names = []
+    in_list = False
+    for line in output.splitlines():
+        if line.strip().startswith("------"):
+            in_list = True
+            continue
+        parts = line.split()
+        if in_list and len(parts) >= 2:
+            names.append(parts[1])
+    return names
+
+
+def _parse_hwaccels(output: str) -> List[str]:
+    """Parsea la salida de `ffmpeg -hwaccels`"""
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    if lines and lines[0].lower().startswith("hardware acceleration methods"):
+        lines = lines[1:]
+    return lines
+
+
+def _probe() -> dict:
+    ffmpeg_path = shutil.which("ffmpeg")
+    ffprobe_path = shutil.which("ffprobe")
+    capabilities = {
+        "available": bool(ffmpeg_path and ffprobe_path),
+        "ffmpeg_path": ffmpeg_path,
+        "ffprobe_path": ffprobe_path,
+        "version": None,
+        "encoders": [],
+        "decoders": [],
+        "hwaccels": [],
+        "probed_at": datetime.utcnow().isoformat(),
+    }
+    if not ffmpeg_path:
+        return capabilities
+
     try:
-        subprocess.run(["ffmpeg", "-version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        subprocess.run(["ffprobe", "-version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError) as e:
-        logger.error("FFmpeg o FFprobe no están instalados: %s", e)
+        version_line = _run_quiet([ffmpeg_path, "-version"]).splitlines()[0]
+        # "ffmpeg version 6.1.1 Copyright (c) ..."
+        capabilities["version"] = version_line.split()[2] if len(version_line.split()) > 2 else version_line
+        capabilities["encoders"] = _parse_codec_list(_run_quiet([ffmpeg_path, "-hide_banner", "-encoders"]))
+        capabilities["decoders"] = _parse_codec_list(_run_quiet([ffmpeg_path, "-hide_banner", "-decoders"]))
+        capabilities["hwaccels"] = _parse_hwaccels(_run_quiet([ffmpeg_path, "-hide_banner", "-hwaccels"]))
+    except (subprocess.CalledProcessError, OSError, IndexError) as e:
+        logger.error("No se pudieron leer las capacidades de FFmpeg: %s", e)
+        capabilities["available"] = False
+    return capabilities
+
+
+def probe_capabilities(refresh: bool = False) -> dict:
+    """
+    Devuelve (y cachea) las capacidades de FFmpeg: rutas de los binarios,
+    versión, encoders, decoders y hwaccels. Con refresh=True vuelve a ejecutar el probe.
+    """
+    global _capabilities
+    with _capabilities_lock:
+        if _capabilities is None or refresh:
+            _capabilities = _probe()
+            logger.info(
+                "FFmpeg %s (%d encoders, hwaccels: %s)",
+                _capabilities["version"] or "no disponible",
+                len(_capabilities["encoders"]),
+                ", ".join(_capabilities["hwaccels"]) or "ninguno"
+            )
+        return _capabilities
+
+
+def has_encoder(name: str) -> bool:
+    """Indica si FFmpeg tiene disponible un encoder (p.ej. 'libx264')"""
+    return name in probe_capabilities()["encoders"]
+
+
+def _ffmpeg_bin() -> str:
+    return probe_capabilities()["ffmpeg_path"] or "ffmpeg"
+
+
+def _ffprobe_bin() -> str:
+    return probe_capabilities()["ffprobe_path"] or "ffprobe"
+
+
+def is_ffmpeg_installed() -> bool:
+    """
+    Verifica si FFmpeg está disponible en el sistema (usa el probe cacheado).
+    """
+    if not probe_capabilities()["available"]:
+        logger.error("FFmpeg o FFprobe no están instalados")
         return False
+    return True
 
 
 def get_media_info(input_path: Path) -> dict:
@@ -31,7 +126,7 @@ def get_media_info(input_path: Path) -> dict:
         raise EnvironmentError("FFprobe no disponible")
 
     cmd = [
-        "ffprobe", "-v", "quiet",
+        _ffprobe_bin(), "-v", "quiet",
         "-print_format", "json",
         "-show_format", "-show_streams",
         str(input_path)
@@ -68,7 +163,7 @@ def transcode_video(
         raise EnvironmentError("FFmpeg no disponible")
 
     cmd = [
-        'ffmpeg', '-y' if overwrite else '-n',
+        _ffmpeg_bin(), '-y' if overwrite else '-n',
         '-i', str(input_path),
         '-c:v', video_codec,
         '-preset', preset,
@@ -97,7 +192,7 @@ def generate_thumbnail(
         raise EnvironmentError("FFmpeg no disponible para thumbnails")
 
     cmd = [
-        'ffmpeg', '-y' if overwrite else '-n',
+        _ffmpeg_bin(), '-y' if overwrite else '-n',
         '-ss', str(time_offset),
         '-i', str(input_path),
         '-vframes', '1',
@@ -127,7 +222,7 @@ def transcode_to_hls(
     output_playlist = output_dir / playlist_name
 
     cmd = [
-        'ffmpeg', '-y',
+        _ffmpeg_bin(), '-y',
         '-i', str(input_path),
         '-c:v', 'libx264',
         '-vf', f"scale={resolution}",
@@ -139,3 +234,213 @@ def transcode_to_hls(
     ]
     logger.info("Transcodificando a HLS: %s", ' '.join(cmd))
     subprocess.run(cmd, check=True)
+
+
+# Escalera ABR por defecto: (nombre, alto, bitrate de video, bitrate de audio)
+HLS_LADDER = [
+    {"name": "1080p", "height": 1080, "video_bitrate": "5000k", "audio_bitrate": "192k"},
+    {"name": "720p", "height": 720, "video_bitrate": "2800k", "audio_bitrate": "128k"},
+    {"name": "480p", "height": 480, "video_bitrate": "1400k", "audio_bitrate": "96k"},
+]
+
+
+def _bitrate_to_bps(bitrate: str) -> int:
+    value = bitrate.lower()
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    if value.endswith("m"):
+        return int(float(value[:-1]) * 1000 * 1000)
+    return int(value)
+
+
+def select_hls_ladder(source_height: Optional[int], ladder: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Filtra la escalera para no escalar hacia arriba: solo renditions con alto
+    menor o igual al del original (siempre al menos la más pequeña).
+    """
+    ladder = sorted(ladder or HLS_LADDER, key=lambda r: r["height"], reverse=True)
+    if not source_height:
+        return ladder
+    selected = [r for r in ladder if r["height"] <= source_height]
+    return selected or ladder[-1:]
+
+
+def transcode_to_hls_ladder(
+    input_path: Path,
+    output_dir: Path,
+    renditions: Optional[List[dict]] = None,
+    segment_time: int = 6,
+    has_audio: bool = True,
+    master_name: str = 'master.m3u8'
+) -> List[dict]:
+    """
+    Genera HLS adaptativo (varias renditions + master playlist) con una sola
+    invocación de FFmpeg: el video se decodifica una vez y se divide con `split`.
+    Estructura: output_dir/master.m3u8 y output_dir/<rendition>/index.m3u8 + seg_XXX.ts
+    Devuelve la metadata de cada rendition.
+    """
+    if not is_ffmpeg_installed():
+        raise EnvironmentError("FFmpeg no disponible para HLS")
+    if not has_encoder('libx264'):
+        raise EnvironmentError("FFmpeg no tiene el encoder libx264 para HLS")
+
+    renditions = renditions or HLS_LADDER
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    count = len(renditions)
+    split = f"[0:v]split={count}" + "".join(f"[v{i}]" for i in range(count))
+    scales = [f"[v{i}]scale=-2:{r['height']}[v{i}out]" for i, r in enumerate(renditions)]
+    cmd = [
+        _ffmpeg_bin(), '-y',
+        '-i', str(input_path),
+        '-filter_complex', ";".join([split] + scales),
+    ]
+    for i, rendition in enumerate(renditions):
+        bitrate = rendition['video_bitrate']
+        cmd += [
+            '-map', f"[v{i}out]",
+            f'-c:v:{i}', 'libx264',
+            f'-b:v:{i}', bitrate,
+            f'-maxrate:v:{i}', bitrate,
+            f'-bufsize:v:{i}', f"{2 * _bitrate_to_bps(bitrate) // 1000}k",
+        ]
+        if has_audio:
+            cmd += ['-map', 'a:0', f'-c:a:{i}', 'aac', f'-b:a:{i}', rendition['audio_bitrate']]
+
+    stream_map = " ".join(
+        f"v:{i},a:{i},name:{r['name']}" if has_audio else f"v:{i},name:{r['name']}"
+        for i, r in enumerate(renditions)
+    )
+    cmd += [
+        # Keyframes alineados con los segmentos para que el cambio de calidad sea limpio
+        '-force_key_frames', f"expr:gte(t,n_forced*{segment_time})",
+        '-f', 'hls',
+        '-hls_time', str(segment_time),
+        '-hls_playlist_type', 'vod',
+        '-hls_list_size', '0',
+        '-hls_segment_filename', str(output_dir / '%v' / 'seg_%03d.ts'),
+        '-master_pl_name', master_name,
+        '-var_stream_map', stream_map,
+        str(output_dir / '%v' / 'index.m3u8')
+    ]
+    logger.info("Generando escalera HLS: %s", ' '.join(cmd))
+    subprocess.run(cmd, check=True)
+
+    return [
+        {
+            "name": r["name"],
+            "height": r["height"],
+            "bandwidth": _bitrate_to_bps(r["video_bitrate"]) + (_bitrate_to_bps(r["audio_bitrate"]) if has_audio else 0),
+            "playlist": f"{r['name']}/index.m3u8",
+        }
+        for r in renditions
+    ]
+
+
+def iter_progress(stream: IO[str]) -> Iterator[Dict[str, str]]:
+    """
+    Itera los bloques de `-progress pipe:1`: líneas key=value terminadas por
+    una línea progress=continue|end. Devuelve un dict por bloque.
+    """
+    block: Dict[str, str] = {}
+    for line in stream:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value
+        if key == "progress":
+            yield block
+            block = {}
+
+
+def progress_percent(block: Dict[str, str], duration: float) -> Optional[float]:
+    """Porcentaje (0-100) de un bloque de progreso respecto a la duración total"""
+    if block.get("progress") == "end":
+        return 100.0
+    # out_time_us y out_time_ms están ambos en microsegundos
+    raw = block.get("out_time_us") or block.get("out_time_ms")
+    if not raw or not duration or raw == "N/A":
+        return None
+    try:
+        return max(0.0, min(100.0, int(raw) / 1_000_000 / duration * 100))
+    except ValueError:
+        return None
+
+
+def ingest_media(
+    input_path: Path,
+    duration: float,
+    thumbnail_path: Optional[Path] = None,
+    poster_path: Optional[Path] = None,
+    proxy_path: Optional[Path] = None,
+    mezzanine_path: Optional[Path] = None,
+    time_offset: float = 1.0,
+    thumbnail_resolution: str = '640x360',
+    proxy_height: int = 360,
+    mezzanine_resolution: str = '1920x1080',
+    on_progress: Optional[Callable[[float], None]] = None
+) -> Dict[str, Path]:
+    """
+    Genera en una sola pasada de decodificación (una invocación de FFmpeg con
+    varias salidas) el thumbnail, el póster, un proxy de baja resolución y el
+    mezzanine H.264/AAC. Solo se producen las salidas con ruta indicada.
+    - duration: duración del original (de get_media_info) para calcular el progreso
+    - on_progress: callback con el porcentaje leído de `-progress pipe:1`
+    Devuelve {nombre_salida: ruta} de las salidas generadas.
+    """
+    if not is_ffmpeg_installed():
+        raise EnvironmentError("FFmpeg no disponible")
+    if (proxy_path or mezzanine_path) and not has_encoder('libx264'):
+        raise EnvironmentError("FFmpeg no tiene el encoder libx264 para proxy/mezzanine")
+
+    # Frame del thumbnail/póster: no más allá de la mitad de videos muy cortos
+    offset = min(time_offset, duration / 2) if duration else 0
+    frame_chain = f"trim=start={offset},setpts=PTS-STARTPTS"
+    branches = []
+    if thumbnail_path:
+        branches.append(("thumbnail", thumbnail_path,
+                         f"{frame_chain},scale={thumbnail_resolution}:force_original_aspect_ratio=decrease",
+                         ['-frames:v', '1']))
+    if poster_path:
+        branches.append(("poster", poster_path, frame_chain, ['-frames:v', '1', '-q:v', '2']))
+    if proxy_path:
+        branches.append(("proxy", proxy_path, f"scale=-2:{proxy_height}",
+                         ['-map', '0:a?', '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '30',
+                          '-c:a', 'aac', '-b:a', '64k', '-movflags', '+faststart']))
+    if mezzanine_path:
+        branches.append(("mezzanine", mezzanine_path,
+                         f"scale={mezzanine_resolution}:force_original_aspect_ratio=decrease",
+                         ['-map', '0:a?', '-c:v', 'libx264', '-preset', 'medium', '-crf', '20',
+                          '-c:a', 'aac', '-movflags', '+faststart']))
+    if not branches:
+        return {}
+
+    labels = [f"[s{i}]" for i in range(len(branches))]
+    graph = [f"[0:v]split={len(branches)}{''.join(labels)}"]
+    graph += [f"{labels[i]}{chain}[o{i}]" for i, (_, _, chain, _) in enumerate(branches)]
+
+    cmd = [
+        _ffmpeg_bin(), '-y', '-hide_banner', '-nostats',
+        '-progress', 'pipe:1',
+        '-i', str(input_path),
+        '-filter_complex', ";".join(graph),
+    ]
+    for i, (_, output_path, _, output_args) in enumerate(branches):
+        cmd += ['-map', f"[o{i}]"] + output_args + [str(output_path)]
+
+    logger.info("Ingesta en una pasada: %s", ' '.join(cmd))
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # stderr se drena en un hilo para que el pipe no se llene mientras leemos el progreso
+    stderr_lines: List[str] = []
+    stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+    stderr_reader.start()
+    for block in iter_progress(process.stdout):
+        percent = progress_percent(block, duration)
+        if on_progress and percent is not None:
+            on_progress(percent)
+    returncode = process.wait()
+    stderr_reader.join()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr="".join(stderr_lines[-20:]))
+
+    return {name: output_path for name, output_path, _, _ in branches}
@@ -0,0 +1,82 @@
+"""
+Build-time compression of static assets
+
+Writes ``.gz`` (and ``.br`` when the optional ``brotli`` package is
+installed) next to every compressible file, so the server can send them
+without compressing on each request. Only depends on the standard library so
+build_and_deploy_frontend.py can use it outside the application.
+"""
+import gzip
+import os
+from pathlib import Path
+from typing import Dict, Union
+
+try:
+    import brotli  # Opcional: pip install brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+# Formatos de texto que comprimen bien; woff2/png/jpg/mp4 ya van comprimidos
+COMPRESSIBLE_EXTENSIONS = {
+    ".html", ".js", ".mjs", ".css", ".map", ".json", ".svg", ".txt", ".xml", ".ico", ".ttf", ".otf", ".eot"
+}
+MIN_SIZE = 1024
+# Solo se conserva la variante si ahorra al menos este porcentaje
+MIN_SAVING = 0.05
+
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def available_encodings() -> list:
+    """Encodings that can be produced in this environment, preferred first"""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0 hace la salida reproducible entre builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompress_file(path: Union[str, Path]) -> Dict[str, int]:
+    """Write compressed variants of one file; returns {encoding: compressed size}"""
+    path = Path(path)
+    data = path.read_bytes()
+    written = {}
+    for encoding in available_encodings():
+        variant = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+        compressed = _compress(data, encoding)
+        if len(compressed) > len(data) * (1 - MIN_SAVING):
+            # No compensa: se borra una variante antigua para no servir datos obsoletos
+            if variant.exists():
+                variant.unlink()
+            continue
+        tmp = variant.with_name(variant.name + ".tmp")
+        tmp.write_bytes(compressed)
+        os.replace(tmp, variant)
+        written[encoding] = len(compressed)
+    return written
+
+
+def precompress_directory(directory: Union[str, Path]) -> Dict[str, int]:
+    """
+    Precompress every compressible asset under `directory`.
+
+    Returns totals: files processed, original bytes and bytes per encoding.
+    """
+    totals = {"files": 0, "original": 0}
+    for path in sorted(Path(directory).rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            continue
+        size = path.stat().st_size
+        if size < MIN_SIZE:
+            continue
+        written = precompress_file(path)
+        if not written:
+            continue
+        totals["files"] += 1
+        totals["original"] += size
+        for encoding, compressed_size in written.items():
+            totals[encoding] = totals.get(encoding, 0) + compressed_size
+    return totals
@@ -0,0 +1,285 @@
+"""
+Resumable chunked uploads for large media files
+
+Each upload session owns a sparse ``.part`` file pre-sized to the final
+length plus a small JSON state file with the byte ranges received so far.
+Chunks can arrive in any order (and be retried) at an explicit offset; the
+session is finalized once every byte has been received.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.uploads import StoredUpload, UploadRejected, blob_filename, validate_extension
+
+
+# Un /complete que no terminó en este tiempo (proceso caído) deja de bloquear la sesión
+COMPLETE_TIMEOUT = 600
+
+
+class UploadSessionNotFound(Exception):
+    """Raised when an upload id does not match an open session"""
+
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(upload_id: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _session_dir() -> str:
+    os.makedirs(settings.RESUMABLE_UPLOAD_DIR, exist_ok=True)
+    return settings.RESUMABLE_UPLOAD_DIR
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(_session_dir(), f"{upload_id}.part")
+
+
+def _state_path(upload_id: str) -> str:
+    return os.path.join(_session_dir(), f"{upload_id}.json")
+
+
+def _validate_id(upload_id: str) -> None:
+    try:
+        uuid.UUID(upload_id)
+    except (ValueError, TypeError):
+        raise UploadSessionNotFound(upload_id)
+
+
+def _load_state(upload_id: str) -> dict:
+    _validate_id(upload_id)
+    try:
+        with open(_state_path(upload_id), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UploadSessionNotFound(upload_id)
+
+
+def _save_state(state: dict) -> None:
+    path = _state_path(state["upload_id"])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _merge_range(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Insert [start, end) into a sorted list of disjoint ranges, coalescing overlaps"""
+    merged = []
+    for r_start, r_end in sorted(ranges + [[start, end]]):
+        if merged and r_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], r_end)
+        else:
+            merged.append([r_start, r_end])
+    return merged
+
+
+def _received_bytes(state: dict) -> int:
+    return sum(end - start for start, end in state["received"])
+
+
+def _next_missing_offset(state: dict) -> Optional[int]:
+    offset = 0
+    for start, end in state["received"]:
+        if start > offset:
+            return offset
+        offset = max(offset, end)
+    return offset if offset < state["size"] else None
+
+
+def describe(state: dict) -> dict:
+    """Public view of a session used by the status endpoints"""
+    received = _received_bytes(state)
+    return {
+        "upload_id": state["upload_id"],
+        "filename": state["filename"],
+        "media_type": state["media_type"],
+        "size": state["size"],
+        "received_bytes": received,
+        "received_ranges": state["received"],
+        "next_offset": _next_missing_offset(state),
+        "max_chunk_size": settings.RESUMABLE_CHUNK_MAX_SIZE,
+        "complete": received == state["size"],
+    }
+
+
+def purge_expired_sessions() -> int:
+    """Remove sessions untouched for longer than RESUMABLE_UPLOAD_TTL_HOURS"""
+    cutoff = time.time() - settings.RESUMABLE_UPLOAD_TTL_HOURS * 3600
+    removed = 0
+    for name in os.listdir(_session_dir()):
+        if not name.endswith(".json"):
+            continue
+        upload_id = name[:-len(".json")]
+        try:
+            if os.path.getmtime(_state_path(upload_id)) < cutoff:
+                abort_upload(upload_id)
+                removed += 1
+        except (OSError, UploadSessionNotFound):
+            continue
+    return removed
+
+
+def init_upload(
+    filename: str,
+    media_type: str,
+    size: int,
+    duration: int = 0,
+    sha256: Optional[str] = None
+) -> dict:
+    """Open a new upload session and pre-allocate its sparse file"""
+    validate_extension(filename)
+    if size <= 0:
+        raise UploadRejected("Upload size must be greater than zero")
+    if size > settings.RESUMABLE_UPLOAD_MAX_SIZE:
+        raise UploadRejected(
+            f"File exceeds maximum size of {settings.RESUMABLE_UPLOAD_MAX_SIZE} bytes",
+            status_code=413
+        )
+
+    purge_expired_sessions()
+
+    upload_id = str(uuid.uuid4())
+    # truncate() sobre un archivo vacío crea un archivo disperso: no ocupa disco hasta recibir datos
+    with open(_part_path(upload_id), "wb") as f:
+        f.truncate(size)
+
+    state = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "media_type": media_type,
+        "duration": duration,
+        "size": size,
+        "sha256": sha256.lower() if sha256 else None,
+        "received": [],
+        "created_at": time.time(),
+    }
+    _save_state(state)
+    return describe(state)
+
+
+def get_upload_status(upload_id: str) -> dict:
+    """Return the current state of an upload session"""
+    return describe(_load_state(upload_id))
+
+
+def write_chunk(upload_id: str, offset: int, data: bytes, chunk_sha256: Optional[str] = None) -> dict:
+    """Write one chunk at `offset`, verifying its SHA-256 when provided"""
+    if not data:
+        raise UploadRejected("Empty chunk")
+    if len(data) > settings.RESUMABLE_CHUNK_MAX_SIZE:
+        raise UploadRejected(
+            f"Chunk exceeds maximum size of {settings.RESUMABLE_CHUNK_MAX_SIZE} bytes",
+            status_code=413
+        )
+    if chunk_sha256 and hashlib.sha256(data).hexdigest() != chunk_sha256.lower():
+        raise UploadRejected("Chunk checksum mismatch", status_code=422)
+
+    with _lock_for(upload_id):
+        state = _load_state(upload_id)
+        _check_not_completing(state)
+        end = offset + len(data)
+        if offset < 0 or end > state["size"]:
+            raise UploadRejected(
+                f"Chunk [{offset}, {end}) is outside the declared size {state['size']}",
+                status_code=416
+            )
+
+        with open(_part_path(upload_id), "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        state["received"] = _merge_range(state["received"], offset, end)
+        _save_state(state)
+        return describe(state)
+
+
+def _check_not_completing(state: dict) -> None:
+    # Durante /complete el .part puede compartir inodo con el archivo definitivo
+    completing = state.get("completing")
+    if completing and time.time() - completing < COMPLETE_TIMEOUT:
+        raise UploadRejected("Upload is being completed", status_code=409)
+
+
+def finalize_upload(upload_id: str) -> Tuple[StoredUpload, dict]:
+    """
+    Verify the session is complete and hash it for content-addressed storage.
+
+    Returns the upload staged in its ``.part`` file (placed in UPLOAD_DIR by
+    media_blob_crud.acquire_blob) and the session state (filename, media_type,
+    duration declared at init). The session stays open, locked against new
+    chunks, until close_upload (media registered) or release_upload (failure,
+    the client can call complete again).
+    """
+    with _lock_for(upload_id):
+        state = _load_state(upload_id)
+        _check_not_completing(state)
+        if _received_bytes(state) != state["size"]:
+            raise UploadRejected(
+                f"Upload incomplete: next missing offset is {_next_missing_offset(state)}",
+                status_code=409
+            )
+
+        # El hash se calcula siempre: da nombre al archivo y permite deduplicar
+        part_path = _part_path(upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, "rb") as f:
+            for block in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+        if state["sha256"] and sha256 != state["sha256"]:
+            raise UploadRejected("File checksum mismatch", status_code=422)
+
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        extension = validate_extension(state["filename"])
+        stored = StoredUpload(blob_filename(sha256, extension), sha256, state["size"], part_path)
+        state["completing"] = time.time()
+        _save_state(state)
+    return stored, state
+
+
+def release_upload(upload_id: str) -> None:
+    """Reopen a session whose completion failed, so complete can be retried"""
+    with _lock_for(upload_id):
+        try:
+            state = _load_state(upload_id)
+        except UploadSessionNotFound:
+            return
+        state.pop("completing", None)
+        _save_state(state)
+
+
+def close_upload(upload_id: str) -> None:
+    """Remove a completed session once its media has been registered"""
+    with _lock_for(upload_id):
+        for path in (_part_path(upload_id), _state_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+    with _locks_guard:
+        _locks.pop(upload_id, None)
+
+
+def abort_upload(upload_id: str) -> None:
+    """Discard an upload session and its partial data"""
+    _validate_id(upload_id)
+    with _lock_for(upload_id):
+        found = False
+        for path in (_part_path(upload_id), _state_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+                found = True
+    with _locks_guard:
+        _locks.pop(upload_id, None)
+    if not found:
+        raise UploadSessionNotFound(upload_id)
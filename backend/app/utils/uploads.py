@@ -0,0 +1,150 @@
+"""
+Streaming storage for uploaded media files
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional, Tuple
+
+from app.config import settings
+
+
+class StoredUpload(NamedTuple):
+    """
+    A hashed upload waiting in a staging file. It gets its content-addressed
+    name in UPLOAD_DIR (place_blob) only once a blob reference is held.
+    """
+    filename: str  # Nombre definitivo en UPLOAD_DIR: <sha256><ext>
+    sha256: str
+    size: int
+    staged_path: str  # Copia completa de los datos hasta que se descarte con discard_staged
+
+
+class UploadRejected(Exception):
+    """Raised when an upload violates the configured extension or size limits"""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def get_extension(filename: str) -> str:
+    """Return the lowercase extension of a filename including the dot ('' if none)"""
+    return os.path.splitext(filename or "")[1].lower()
+
+
+def validate_extension(filename: str) -> str:
+    """Check the filename against ALLOWED_EXTENSIONS and return its extension"""
+    extension = get_extension(filename)
+    allowed = [ext.lower() for ext in settings.ALLOWED_EXTENSIONS]
+    if extension not in allowed:
+        raise UploadRejected(
+            f"File type '{extension or filename}' is not allowed. Allowed: {', '.join(allowed)}",
+            status_code=415
+        )
+    return extension
+
+
+def _stream_to_temp(
+    source: BinaryIO,
+    upload_dir: str,
+    max_size: int,
+    chunk_size: int
+) -> Tuple[str, str, int]:
+    """
+    Copy `source` into a temporary file inside `upload_dir` in bounded chunks,
+    hashing it on the fly. Returns (temp path, sha256 hex digest, size).
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    # El temporal vive en el mismo directorio para que os.replace sea atómico
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=upload_dir)
+    try:
+        digest = hashlib.sha256()
+        written = 0
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_size:
+                    raise UploadRejected(
+                        f"File exceeds maximum size of {max_size} bytes",
+                        status_code=413
+                    )
+                digest.update(chunk)
+                buffer.write(chunk)
+        return tmp_path, digest.hexdigest(), written
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def blob_filename(sha256: str, extension: str) -> str:
+    """Name of a content-addressed file: its SHA-256 plus the original extension"""
+    return f"{sha256}{extension}"
+
+
+def place_blob(stored: StoredUpload, upload_dir: Optional[str] = None) -> bool:
+    """
+    Make sure the content-addressed file of a staged upload exists.
+
+    Call it only while holding a reference to the blob (media_blob_crud.acquire_blob):
+    the file can then no longer be unlinked by the release of the last
+    reference. Returns False if an identical file was already stored.
+    """
+    upload_dir = upload_dir or settings.UPLOAD_DIR
+    final_path = os.path.join(upload_dir, stored.filename)
+    if os.path.exists(final_path):
+        return False
+    try:
+        # Enlace duro: el staging sigue intacto hasta el commit (y para reintentos)
+        os.link(stored.staged_path, final_path)
+    except FileExistsError:
+        return False
+    except OSError:
+        # Sin enlaces duros (otro sistema de archivos): copia a temporal y rename atómico
+        fd, tmp_path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=upload_dir)
+        os.close(fd)
+        try:
+            shutil.copyfile(stored.staged_path, tmp_path)
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return True
+
+
+def discard_staged(stored: Optional[StoredUpload]) -> None:
+    """Remove the staging file of an upload (once committed, or abandoned)"""
+    if stored is not None and os.path.exists(stored.staged_path):
+        os.remove(stored.staged_path)
+
+
+def stream_to_blob_store(
+    source: BinaryIO,
+    filename: str,
+    upload_dir: Optional[str] = None,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> StoredUpload:
+    """
+    Copy an uploaded file into UPLOAD_DIR in bounded chunks, hashing it so
+    that identical uploads share a single file on disk.
+
+    The data goes to a staging file inside the upload directory, so a failed
+    or rejected upload never leaves a partial file behind. It only gets its
+    content-addressed name when acquire_blob places it; the caller discards
+    the staging file afterwards (discard_staged).
+    """
+    extension = validate_extension(filename)
+    upload_dir = upload_dir or settings.UPLOAD_DIR
+    max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    tmp_path, sha256, size = _stream_to_temp(source, upload_dir, max_size, chunk_size)
+    return StoredUpload(blob_filename(sha256, extension), sha256, size, tmp_path)
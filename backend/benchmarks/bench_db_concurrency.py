@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrencia SQLite: lecturas del player mezcladas con escrituras del admin.
+
+Crea una base SQLite temporal por perfil con 50 playlists x 40 elementos y
+lanza durante unos segundos:
+
+- lectores: cargan una playlist con sus medios (como /api/playlists/{id}/player).
+- escritores: actualizan la duración de un medio y hacen commit.
+
+Perfiles comparados:
+
+- anterior: create_engine con solo check_same_thread=False (NullPool, journal
+  DELETE, sin busy_timeout más allá del predeterminado del driver).
+- perfil: app.db.engine_profile (WAL, synchronous=NORMAL, busy_timeout, caché,
+  mmap, QueuePool) con pool de solo lectura para los lectores.
+
+Reporta operaciones por segundo, errores "database is locked" y p99 de lectura.
+
+Uso:
+    python benchmarks/bench_db_concurrency.py [lectores] [escritores] [segundos]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parents[1]
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db import models  # noqa: F401  (registra todos los modelos)
+from app.db.crud import playlist_crud
+from app.db.engine_profile import create_app_engine, create_read_engine
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.models.playlist_media import PlaylistMedia
+
+PLAYLISTS = 50
+ITEMS = 40
+MEDIA_POOL = 400
+
+
+def populate(db) -> None:
+    db.bulk_insert_mappings(Media, [
+        {"id": i + 1, "filename": f"media-{i}", "filepath": f"/uploads/media-{i}.mp4",
+         "media_type": "video", "duration": 10 + i % 50}
+        for i in range(MEDIA_POOL)
+    ])
+    db.bulk_insert_mappings(Playlist, [{"id": p + 1, "name": f"playlist-{p}"} for p in range(PLAYLISTS)])
+    db.bulk_insert_mappings(PlaylistMedia, [
+        {"playlist_id": p + 1, "media_id": (p * ITEMS + i) % MEDIA_POOL + 1, "order_index": i}
+        for p in range(PLAYLISTS) for i in range(ITEMS)
+    ])
+    db.commit()
+
+
+def run(write_factory, read_factory, readers: int, writers: int, seconds: float) -> dict:
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {"reads": 0, "writes": 0, "locked": 0}
+    latencies = []
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            db = read_factory()
+            started = time.perf_counter()
+            try:
+                playlist = playlist_crud.get_playlist(db, rng.randint(1, PLAYLISTS))
+                [pm.media.duration for pm in playlist.playlist_media]
+                elapsed = time.perf_counter() - started
+                with lock:
+                    totals["reads"] += 1
+                    latencies.append(elapsed)
+            except OperationalError:
+                with lock:
+                    totals["locked"] += 1
+            finally:
+                db.close()
+
+    def writer(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            db = write_factory()
+            try:
+                db.query(Media).filter(Media.id == rng.randint(1, MEDIA_POOL)).update({"duration": rng.randint(5, 60)})
+                db.commit()
+                with lock:
+                    totals["writes"] += 1
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    totals["locked"] += 1
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    totals["p99"] = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    return totals
+
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🗄️  {PLAYLISTS} playlists x {ITEMS} elementos, {readers} lectores + {writers} escritores, {seconds:.0f}s")
+        print(f"{'Perfil':<10} | {'Lecturas/s':>10} | {'Escrituras/s':>12} | {'Bloqueos':>8} | {'p99 lectura':>11}")
+        print("-" * 64)
+        for name in ("anterior", "perfil"):
+            url = f"sqlite:///{os.path.join(tmp, name + '.db')}"
+            if name == "anterior":
+                engine = create_engine(url, connect_args={"check_same_thread": False})
+                read_engine = engine
+            else:
+                engine = create_app_engine(url)
+                read_engine = create_read_engine(url) or engine
+            Base.metadata.create_all(bind=engine)
+            populate(sessionmaker(bind=engine)())
+
+            result = run(sessionmaker(bind=engine), sessionmaker(bind=read_engine), readers, writers, seconds)
+            print(f"{name:<10} | {result['reads'] / seconds:>10.0f} | {result['writes'] / seconds:>12.0f} | "
+                  f"{result['locked']:>8} | {result['p99'] * 1000:>9.1f}ms")
+            read_engine.dispose()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
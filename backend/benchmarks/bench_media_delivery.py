@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la entrega de media en /uploads.
+
+Levanta un servidor uvicorn local con un video sintético servido por
+StaticFiles (montaje anterior) y por MediaFiles (app/core/media_delivery.py)
+y simula N players concurrentes:
+
+- Un player "nuevo" pide el video completo por rangos de 1MB, como hace el
+  elemento <video> del navegador.
+- Un player "en bucle" revalida el archivo con If-None-Match en cada vuelta,
+  como tras un reinicio con la caché HTTP poblada.
+
+Reporta peticiones/s, MB/s y latencias p50/p95 por servidor y escenario.
+
+Uso:
+    python benchmarks/bench_media_delivery.py [--players 50] [--duration 10] [--size-mb 64]
+    python benchmarks/bench_media_delivery.py --url http://pantalla:8000/uploads/<archivo>.mp4
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parents[1]
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app.core.media_delivery import MediaFiles
+
+MB = 1024 * 1024
+RANGE_SIZE = MB
+
+
+def make_sample(directory: str, size: int) -> str:
+    """Archivo aleatorio nombrado por su hash, como el almacenamiento por contenido"""
+    data = os.urandom(size)
+    filename = f"{hashlib.sha256(data).hexdigest()}.mp4"
+    with open(os.path.join(directory, filename), "wb") as f:
+        f.write(data)
+    return filename
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port: int) -> uvicorn.Server:
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", loop="asyncio")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def player(client: httpx.AsyncClient, url: str, mode: str, deadline: float, stats: dict) -> None:
+    etag = None
+    while time.perf_counter() < deadline:
+        if mode == "loop":
+            headers = {"If-None-Match": etag} if etag else {}
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            stats["latencies"].append(time.perf_counter() - started)
+            stats["requests"] += 1
+            stats["bytes"] += len(response.content)
+            etag = response.headers.get("etag")
+            stats["status"][response.status_code] = stats["status"].get(response.status_code, 0) + 1
+            continue
+
+        # Player nuevo: descarga completa por rangos consecutivos
+        offset, size = 0, None
+        while (size is None or offset < size) and time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(url, headers={"Range": f"bytes={offset}-{offset + RANGE_SIZE - 1}"})
+            stats["latencies"].append(time.perf_counter() - started)
+            stats["requests"] += 1
+            stats["bytes"] += len(response.content)
+            stats["status"][response.status_code] = stats["status"].get(response.status_code, 0) + 1
+            if response.status_code == 206:
+                size = int(response.headers["content-range"].split("/")[1])
+                offset += len(response.content)
+            else:
+                # El servidor ignoró el Range y envió el archivo completo
+                break
+
+
+async def run_load(url: str, players: int, duration: float, mode: str) -> dict:
+    stats = {"requests": 0, "bytes": 0, "latencies": [], "status": {}}
+    limits = httpx.Limits(max_connections=players, max_keepalive_connections=players)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(player(client, url, mode, deadline, stats) for _ in range(players)))
+        stats["elapsed"] = time.perf_counter() - started
+    return stats
+
+
+def report(label: str, stats: dict) -> None:
+    latencies = sorted(stats["latencies"]) or [0.0]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    statuses = ",".join(f"{code}x{count}" for code, count in sorted(stats["status"].items()))
+    print(
+        f"{label:<28} | {stats['requests'] / stats['elapsed']:>8.1f} | "
+        f"{stats['bytes'] / MB / stats['elapsed']:>9.1f} | "
+        f"{statistics.median(latencies) * 1000:>8.1f} | {p95 * 1000:>8.1f} | {statuses}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--url", help="Medir un servidor ya en marcha en lugar del local")
+    args = parser.parse_args()
+
+    print(f"{'Servidor / escenario':<28} | {'req/s':>8} | {'MB/s':>9} | {'p50 ms':>8} | {'p95 ms':>8} | status")
+    print("-" * 90)
+
+    if args.url:
+        for mode in ("ranges", "loop"):
+            report(f"remoto / {mode}", asyncio.run(run_load(args.url, args.players, args.duration, mode)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = make_sample(directory, args.size_mb * MB)
+        servers = {
+            "StaticFiles": StaticFiles(directory=directory),
+            "MediaFiles": MediaFiles(directory=directory),
+        }
+        for name, files_app in servers.items():
+            port = free_port()
+            server = start_server(Starlette(routes=[Mount("/uploads", files_app)]), port)
+            url = f"http://127.0.0.1:{port}/uploads/{filename}"
+            try:
+                for mode in ("ranges", "loop"):
+                    report(f"{name} / {mode}", asyncio.run(run_load(url, args.players, args.duration, mode)))
+            finally:
+                server.should_exit = True
+                time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ingesta de video: llamadas secuenciales vs. una sola pasada.
+
+Secuencial: ffprobe + thumbnail + póster + proxy + mezzanine, cada uno con
+su propia invocación de FFmpeg (y su propia decodificación del original).
+Una pasada: ffprobe + ffmpeg.ingest_media con las cuatro salidas.
+
+Mide tiempo real y segundos de CPU de los procesos hijos (RUSAGE_CHILDREN).
+
+Uso:
+    python benchmarks/bench_media_ingest.py [video.mp4]
+Sin argumento genera un video de prueba de 30s con la fuente lavfi testsrc.
+"""
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parents[1]
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+from app.utils import ffmpeg
+
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(label: str, func) -> None:
+    cpu_before = children_cpu_seconds()
+    start = time.perf_counter()
+    func()
+    wall = time.perf_counter() - start
+    cpu = children_cpu_seconds() - cpu_before
+    print(f"{label:<14} | {wall:>8.2f} s | {cpu:>10.2f} s")
+
+
+def make_sample(path: Path, seconds: int = 30) -> None:
+    subprocess.run([
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=duration={seconds}:size=1920x1080:rate=30",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac", str(path)
+    ], check=True)
+
+
+def main():
+    if not ffmpeg.is_ffmpeg_installed():
+        print("❌ FFmpeg no está instalado; no se puede ejecutar el benchmark")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = Path(sys.argv[1]) if len(sys.argv) > 1 else tmp / "sample.mp4"
+        if len(sys.argv) <= 1:
+            print("🎬 Generando video de prueba 1080p de 30s...")
+            make_sample(source)
+
+        def sequential():
+            ffmpeg.get_media_info(source)
+            ffmpeg.generate_thumbnail(source, tmp / "seq_thumb.jpg")
+            ffmpeg.generate_thumbnail(source, tmp / "seq_poster.jpg", resolution="1920x1080")
+            ffmpeg.transcode_video(source, tmp / "seq_proxy.mp4", crf=30, preset="veryfast", resolution="640x360")
+            ffmpeg.transcode_video(source, tmp / "seq_mezzanine.mp4", crf=20)
+
+        def single_pass():
+            info = ffmpeg.get_media_info(source)
+            ffmpeg.ingest_media(
+                source,
+                info["duration"],
+                thumbnail_path=tmp / "one_thumb.jpg",
+                poster_path=tmp / "one_poster.jpg",
+                proxy_path=tmp / "one_proxy.mp4",
+                mezzanine_path=tmp / "one_mezzanine.mp4"
+            )
+
+        print(f"{'Modo':<14} | {'Tiempo':>10} | {'CPU hijos':>12}")
+        print("-" * 44)
+        measure("secuencial", sequential)
+        measure("una pasada", single_pass)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark del listado de playlists del player: bucle N+1 vs. consulta agrupada.
+
+Crea una base SQLite temporal con 500 playlists x 200 elementos (por
+defecto) y compara:
+
+- N+1: el código anterior de player.get_public_playlists (get_playlist_media
+  por playlist + media_crud.get_media por elemento).
+- selectinload: list_playlists cargando playlist_media.media y sumando en Python.
+- agrupada: playlist_crud.get_playlist_summaries (un solo GROUP BY).
+
+Reporta número de consultas SQL y latencia de cada estrategia.
+
+Uso:
+    python benchmarks/bench_playlist_summaries.py [playlists] [items_por_playlist]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parents[1]
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db import models  # noqa: F401  (registra todos los modelos)
+from app.db.crud import media_crud, playlist_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.models.playlist_media import PlaylistMedia
+
+MEDIA_POOL = 2000
+
+
+def populate(db, playlists: int, items: int) -> None:
+    db.bulk_insert_mappings(Media, [
+        {"id": i + 1, "filename": f"media-{i}", "filepath": f"/uploads/media-{i}.mp4",
+         "media_type": "video", "duration": 10 + i % 50}
+        for i in range(MEDIA_POOL)
+    ])
+    db.bulk_insert_mappings(Playlist, [{"id": p + 1, "name": f"playlist-{p}"} for p in range(playlists)])
+    db.bulk_insert_mappings(PlaylistMedia, [
+        {"playlist_id": p + 1, "media_id": (p * items + i) % MEDIA_POOL + 1, "order_index": i,
+         "duration": 5 if i % 7 == 0 else None}
+        for p in range(playlists) for i in range(items)
+    ])
+    db.commit()
+
+
+def n_plus_one(db, limit):
+    """Comportamiento anterior de player.get_public_playlists"""
+    result = []
+    for playlist in playlist_crud.list_playlists(db, limit=limit):
+        playlist_items = playlist_crud.get_playlist_media(db, playlist_id=playlist.id)
+        total_duration = 0
+        for item in playlist_items:
+            media = media_crud.get_media(db, media_id=item.media_id)
+            if media and media.duration:
+                total_duration += media.duration
+        result.append({"id": playlist.id, "media_count": len(playlist_items), "total_duration": total_duration})
+    return result
+
+
+def selectin(db, limit):
+    return [
+        {"id": p.id, "media_count": len(p.playlist_media),
+         "total_duration": sum(pm.duration if pm.duration is not None else pm.media.duration
+                               for pm in p.playlist_media)}
+        for p in playlist_crud.list_playlists(db, limit=limit)
+    ]
+
+
+def grouped(db, limit):
+    return playlist_crud.get_playlist_summaries(db, limit=limit)
+
+
+def main():
+    playlists = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        print(f"🗄️  Generando {playlists} playlists x {items} elementos...")
+        populate(Session(), playlists, items)
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+        print(f"{'Estrategia':<14} | {'Consultas':>10} | {'Tiempo':>10}")
+        print("-" * 40)
+        for name, strategy in (("N+1", n_plus_one), ("selectinload", selectin), ("agrupada", grouped)):
+            db = Session()
+            statements.clear()
+            started = time.perf_counter()
+            strategy(db, limit=playlists)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<14} | {len(statements):>10} | {elapsed * 1000:>8.1f}ms")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de schedule_crud.get_schedules_for_date al crecer la tabla de schedules.
+
+Crea una base SQLite temporal con 200 schedules semanales y N schedules
+avanzados (mitad con specific_times, mitad con rango de fechas) a razón de 5
+por día hacia atrás, como una instalación que acumula campañas pasadas: con
+más historial la tabla crece pero los schedules de cada fecha son los mismos.
+Consulta fechas del último mes y el siguiente (lo que piden el player y el
+plan de emisión). Compara:
+
+- anterior: todos los simples activos filtrados en Python + LIKE sobre el JSON
+  de specific_times (recorre la tabla entera).
+- indexada: bitmask de días + tabla schedule_specific_times (búsquedas por índice).
+
+Reporta filas devueltas y latencia p50/p95 sobre 30 fechas aleatorias.
+
+Uso:
+    python benchmarks/bench_schedules_for_date.py [N ...]   (por defecto 1000 10000 50000)
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parents[1]
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import and_, create_engine, or_
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.db.database import Base
+from app.db import models  # noqa: F401  (registra todos los modelos)
+from app.db.crud import schedule_crud
+from app.db.models.playlist_media import PlaylistMedia  # noqa: F401
+from app.db.models.schedule import Schedule, ScheduleType, weekdays_to_mask
+from app.db.models.schedule_specific_time import ScheduleSpecificTime
+from app.core.schedule_index import parse_specific_time
+
+WEEKLY = 200
+TODAY = date(2030, 1, 1)
+CAMPAIGNS_PER_DAY = 5
+QUERIES = 30
+
+
+def populate(db, advanced: int, rng: random.Random) -> None:
+    schedules, occurrences = [], []
+    span_days = max(advanced // CAMPAIGNS_PER_DAY, 60)
+    for i in range(WEEKLY):
+        weekdays = sorted(rng.sample(range(7), rng.randint(1, 7)))
+        schedules.append({
+            "id": i + 1, "playlist_id": 1, "schedule_type": "simple", "weekdays": weekdays,
+            "weekday_mask": weekdays_to_mask(weekdays), "daily_start": "08:00", "daily_end": "20:00",
+            "is_active": True, "priority": 1,
+        })
+    for i in range(advanced):
+        schedule_id = WEEKLY + i + 1
+        first = TODAY - timedelta(days=rng.randrange(span_days) - 30)
+        row = {"id": schedule_id, "media_id": 1, "schedule_type": "advanced", "weekday_mask": weekdays_to_mask(None),
+               "has_specific_times": i % 2 == 0, "is_active": True, "priority": 2}
+        if i % 2:
+            row.update(start_date=first, end_date=first + timedelta(days=rng.randint(1, 14)))
+        else:
+            times = [f"{first + timedelta(days=rng.randrange(30))}T{rng.randrange(24):02d}:00:00" for _ in range(3)]
+            row["specific_times"] = times
+            for entry in times:
+                day, (start, end) = parse_specific_time(entry)
+                occurrences.append({"schedule_id": schedule_id, "day": day, "start_seconds": start, "end_seconds": end})
+        schedules.append(row)
+    db.bulk_insert_mappings(Schedule, schedules)
+    db.bulk_insert_mappings(ScheduleSpecificTime, occurrences)
+    db.commit()
+
+
+def previous(db, target_date: date, weekday: int):
+    """Implementación anterior de get_schedules_for_date"""
+    schedules = []
+    simple_schedules = db.query(Schedule)\
+        .options(selectinload(Schedule.media), selectinload(Schedule.playlist))\
+        .filter(Schedule.is_active == True, Schedule.schedule_type == ScheduleType.simple).all()
+    for schedule in simple_schedules:
+        if schedule.weekdays and weekday in schedule.weekdays:
+            schedules.append(schedule)
+    schedules.extend(db.query(Schedule)
+        .options(selectinload(Schedule.media), selectinload(Schedule.playlist))
+        .filter(
+            Schedule.is_active == True,
+            Schedule.schedule_type == ScheduleType.advanced,
+            or_(
+                and_(Schedule.start_date <= target_date, Schedule.end_date >= target_date),
+                Schedule.specific_times.contains(str(target_date))
+            )
+        ).all())
+    return sorted(schedules, key=lambda x: x.priority, reverse=True)
+
+
+def measure(Session, strategy, days):
+    latencies, rows = [], 0
+    for day in days:
+        db = Session()
+        started = time.perf_counter()
+        rows += len(strategy(db, day, day.weekday()))
+        latencies.append(time.perf_counter() - started)
+        db.close()
+    latencies.sort()
+    return rows / len(days), statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    rng = random.Random(42)
+    days = [TODAY + timedelta(days=rng.randrange(-30, 30)) for _ in range(QUERIES)]
+
+    print(f"{'Schedules':>10} | {'Estrategia':<10} | {'Filas':>7} | {'p50':>9} | {'p95':>9}")
+    print("-" * 58)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            Session = sessionmaker(bind=engine)
+            populate(Session(), size, rng)
+            for name, strategy in (("anterior", previous), ("indexada", schedule_crud.get_schedules_for_date)):
+                rows, p50, p95 = measure(Session, strategy, days)
+                print(f"{WEEKLY + size:>10} | {name:<10} | {rows:>7.1f} | {p50 * 1000:>7.2f}ms | {p95 * 1000:>7.2f}ms")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria para el guardado de uploads.
+
+Compara el guardado anterior (file.read() completo) contra el guardado por
+bloques que usa la subida (app.utils.uploads.stream_to_blob_store: copia,
+hash SHA-256 y colocación del archivo bajo su hash) y muestra el pico de
+memoria Python medido con tracemalloc para distintos tamaños de archivo.
+
+Uso:
+    python benchmarks/bench_upload_memory.py [tamaños en MB...]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parents[1]
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+from app.utils.uploads import discard_staged, place_blob, stream_to_blob_store
+
+MB = 1024 * 1024
+
+
+class SyntheticUpload:
+    """File-like object that yields `size` bytes without holding them in memory"""
+
+    def __init__(self, size: int):
+        self.remaining = size
+
+    def read(self, n: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if n is None or n < 0 or n > self.remaining:
+            n = self.remaining
+        self.remaining -= n
+        return b"\0" * n
+
+
+def save_whole_file(source, upload_dir: str) -> None:
+    """Comportamiento anterior de media_crud.save_upload_file"""
+    with open(os.path.join(upload_dir, "whole.mp4"), "wb") as buffer:
+        content = source.read()
+        buffer.write(content)
+
+
+def save_streaming(source, upload_dir: str) -> None:
+    stored = stream_to_blob_store(source, "stream.mp4", upload_dir=upload_dir, max_size=sys.maxsize)
+    place_blob(stored, upload_dir)
+    discard_staged(stored)
+
+
+def measure_peak(func, size: int) -> int:
+    with tempfile.TemporaryDirectory() as upload_dir:
+        tracemalloc.start()
+        func(SyntheticUpload(size), upload_dir)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 50, 100, 200]
+
+    print(f"{'Tamaño':>10} | {'read() completo':>16} | {'por bloques':>12}")
+    print("-" * 46)
+    for size_mb in sizes:
+        whole = measure_peak(save_whole_file, size_mb * MB)
+        streaming = measure_peak(save_streaming, size_mb * MB)
+        print(f"{size_mb:>7} MB | {whole / MB:>13.1f} MB | {streaming / MB:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark del fan-out de WebSocket con 1000 sockets simulados.
+
+Cada socket simulado tarda un tiempo aleatorio en aceptar un mensaje
+(latencia de red de 0-2ms) y un 1% son pantallas en un enlace malo (200ms por
+mensaje). Se emiten MESSAGES eventos cada INTERVAL segundos y se mide, para
+las pantallas sanas, el tiempo entre el broadcast y la entrega. Compara:
+
+- secuencial: el broadcast anterior (await send_json conexión por conexión,
+  JSON serializado para cada cliente).
+- colas: ConnectionManager actual (serializa una vez, cola acotada y writer
+  por conexión).
+
+Uso:
+    python benchmarks/bench_ws_broadcast.py [sockets] [mensajes]   (por defecto 1000 20)
+"""
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parents[1]
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+from app.core.websocket_manager import ConnectionManager
+
+SLOW_FRACTION = 0.01
+SLOW_DELAY = 0.2
+INTERVAL = 0.05
+
+
+class SimulatedSocket:
+    def __init__(self, delay: float, slow: bool) -> None:
+        self.delay = delay
+        self.slow = slow
+        self.latencies = []
+        self.serializations = 0
+
+    async def accept(self):
+        pass
+
+    async def _deliver(self, text: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.latencies.append(time.perf_counter() - json.loads(text)["data"]["sent_at"])
+
+    async def send_text(self, text: str) -> None:
+        await self._deliver(text)
+
+    async def send_json(self, message) -> None:
+        self.serializations += 1
+        await self._deliver(json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+    async def close(self, code=1000):
+        pass
+
+
+def build_sockets(count: int, rng: random.Random):
+    return [
+        SimulatedSocket(SLOW_DELAY, True) if rng.random() < SLOW_FRACTION
+        else SimulatedSocket(rng.uniform(0, 0.002), False)
+        for _ in range(count)
+    ]
+
+
+async def sequential(sockets, messages: int) -> None:
+    """Broadcast anterior: un cliente lento retrasa a todos los siguientes"""
+    async def broadcast(message):
+        for socket in sockets:
+            await socket.send_json(message)
+
+    tasks = []
+    for i in range(messages):
+        tasks.append(asyncio.create_task(broadcast({"event": "tick", "data": {"n": i, "sent_at": time.perf_counter()}})))
+        await asyncio.sleep(INTERVAL)
+    await asyncio.gather(*tasks)
+
+
+async def queued(sockets, messages: int) -> ConnectionManager:
+    manager = ConnectionManager(outbox_size=16, send_timeout=5.0)
+    for socket in sockets:
+        await manager.connect(socket)
+    for i in range(messages):
+        await manager.broadcast({"event": "tick", "data": {"n": i, "sent_at": time.perf_counter()}})
+        await asyncio.sleep(INTERVAL)
+    await manager.flush()
+    return manager
+
+
+def report(name: str, sockets, elapsed: float, extra: str = "") -> None:
+    healthy = sorted(l for s in sockets if not s.slow for l in s.latencies)
+    slow = [l for s in sockets if s.slow for l in s.latencies]
+    p99 = healthy[int(len(healthy) * 0.99) - 1]
+    print(f"{name:<11} | {statistics.median(healthy) * 1000:>8.1f}ms | {p99 * 1000:>8.1f}ms | "
+          f"{len(slow):>9} | {elapsed:>6.1f}s {extra}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"{count} sockets ({SLOW_FRACTION:.0%} lentos a {SLOW_DELAY * 1000:.0f}ms/mensaje), {messages} mensajes")
+    print(f"{'Estrategia':<11} | {'p50 sanos':>10} | {'p99 sanos':>10} | {'msj lentos':>9} | {'total':>7}")
+    print("-" * 62)
+
+    sockets = build_sockets(count, random.Random(1))
+    started = time.perf_counter()
+    asyncio.run(sequential(sockets, messages))
+    report("secuencial", sockets, time.perf_counter() - started,
+           f"({sum(s.serializations for s in sockets)} serializaciones)")
+
+    sockets = build_sockets(count, random.Random(1))
+    started = time.perf_counter()
+    manager = asyncio.run(queued(sockets, messages))
+    stats = manager.stats()
+    report("colas", sockets, time.perf_counter() - started,
+           f"({messages} serializaciones, {stats['dropped']} descartados)")
+
+
+if __name__ == "__main__":
+    main()
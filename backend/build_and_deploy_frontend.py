@@ -11,7 +11,11 @@ Uso:
 El script:
 1. Ejecuta 'npm run build' en la carpeta frontend
 2. Copia todos los archivos generados a la carpeta static del backend
-3. Proporciona retroalimentación detallada del proceso
+3. Genera variantes precomprimidas (.br/.gz) de los assets de texto
+4. Proporciona retroalimentación detallada del proceso
+
+Las variantes .br requieren el paquete opcional 'brotli' (pip install brotli);
+sin él solo se generan .gz.
 """
 
 import os
@@ -21,6 +25,8 @@ import shutil
 import time
 from pathlib import Path
 
+from app.utils.precompress import available_encodings, precompress_directory
+
 
 class FrontendBuilder:
     def __init__(self):
@@ -236,6 +242,34 @@ class FrontendBuilder:
             self.print_error(f"Error desplegando archivos: {e}")
             return False
     
+    def compress_static_files(self):
+        """Genera las variantes .br/.gz que el backend sirve según Accept-Encoding."""
+        self.print_step(5, "Precomprimiendo assets estáticos...")
+        
+        encodings = available_encodings()
+        if "br" not in encodings:
+            self.print_warning("Paquete 'brotli' no instalado: solo se generarán variantes .gz")
+        
+        try:
+            start_time = time.time()
+            totals = precompress_directory(self.static_dir)
+            compress_time = round(time.time() - start_time, 2)
+            
+            original_kb = totals["original"] / 1024
+            self.print_success(f"{totals['files']} archivos precomprimidos en {compress_time}s")
+            for encoding in encodings:
+                if totals.get(encoding):
+                    compressed_kb = totals[encoding] / 1024
+                    self.print_info(
+                        f"{encoding}: {original_kb:.0f} KB -> {compressed_kb:.0f} KB "
+                        f"({100 * compressed_kb / original_kb:.0f}%)"
+                    )
+            return True
+            
+        except Exception as e:
+            self.print_error(f"Error precomprimiendo archivos: {e}")
+            return False
+    
     def cleanup(self):
         """Limpia archivos temporales."""
         try:
@@ -273,6 +307,10 @@ class FrontendBuilder:
         if not self.deploy_static_files():
             return False
         
+        # Variantes precomprimidas para servir sin comprimir en cada petición
+        if not self.compress_static_files():
+            return False
+        
         # Limpiar archivos temporales
         self.cleanup()
         
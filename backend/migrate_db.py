@@ -1,66 +1,69 @@
 #!/usr/bin/env python3
 """
-Script de migración para agregar el campo duration a la tabla playlist_media
+Migraciones del esquema de la base de datos (ver app/db/migrations.py)
+
+La aplicación aplica las migraciones pendientes al arrancar; este script
+permite hacerlo a mano (incluidas las online, que crean índices), ver el
+estado o sacar un backup en caliente.
+
+Uso:
+    python migrate_db.py             # aplicar todas las migraciones pendientes
+    python migrate_db.py --status    # versiones aplicadas y pendientes
+    python migrate_db.py --backup signance.backup.db
 """
-import sqlite3
-import os
+import argparse
 import sys
+from pathlib import Path
+
+ROOTPATH = Path(__file__).resolve().parent
+VENVPATH = ROOTPATH / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+sys.path.insert(0, str(ROOTPATH))
+
+from app.db import models  # noqa: F401  (registra todos los modelos)
+from app.db.database import engine, init_db
+from app.db.migrations import MIGRATIONS, MigrationError, applied_versions, backup_database, database_path, migrate
+
+
+def show_status():
+    applied = applied_versions(engine)
+    for migration in MIGRATIONS:
+        mark = "✅" if migration.version in applied else "⏳"
+        kind = " (online)" if migration.online else ""
+        print(f"{mark} {migration.version:>3} {migration.name}{kind}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migraciones del esquema")
+    parser.add_argument("--status", action="store_true", help="mostrar migraciones aplicadas y pendientes")
+    parser.add_argument("--backup", metavar="DESTINO", help="copiar la base con la API de backup de SQLite")
+    args = parser.parse_args()
+
+    path = database_path(engine)
+    print(f"🗄️  Base de datos: {path or engine.url}")
+
+    if args.backup:
+        if not path:
+            print("❌ Solo se puede hacer backup de una base SQLite en archivo")
+            sys.exit(1)
+        backup_database(path, args.backup)
+        print(f"✅ Backup creado en {args.backup}")
+        return
+
+    if args.status:
+        show_status()
+        return
 
-def migrate_database():
-    """Migrar la base de datos para agregar el campo duration a playlist_media"""
-    db_path = "signance.db"
-    
-    if not os.path.exists(db_path):
-        print(f"Error: Base de datos {db_path} no encontrada")
-        sys.exit(1)
-    
-    # Hacer backup de la base de datos
-    backup_path = f"{db_path}.backup"
-    if not os.path.exists(backup_path):
-        print(f"Creando backup en {backup_path}...")
-        import shutil
-        shutil.copy2(db_path, backup_path)
-        print("Backup creado exitosamente")
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
     try:
-        # Verificar si la columna duration ya existe
-        cursor.execute("PRAGMA table_info(playlist_media);")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-        
-        if 'duration' in column_names:
-            print("La columna 'duration' ya existe en la tabla playlist_media")
-            return
-        
-        print("Agregando columna 'duration' a la tabla playlist_media...")
-        
-        # Agregar la nueva columna
-        cursor.execute("""
-            ALTER TABLE playlist_media 
-            ADD COLUMN duration INTEGER;
-        """)
-        
-        conn.commit()
-        print("Migración completada exitosamente")
-        
-        # Verificar la nueva estructura
-        cursor.execute("PRAGMA table_info(playlist_media);")
-        columns = cursor.fetchall()
-        print("\nNueva estructura de la tabla playlist_media:")
-        for column in columns:
-            nullable = "NO" if column[3] == 1 else "YES"
-            default = f" DEFAULT {column[4]}" if column[4] is not None else ""
-            print(f"- {column[1]} {column[2]} (NULL: {nullable}){default}")
-        
-    except Exception as e:
-        print(f"Error durante la migración: {e}")
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+        init_db()
+        applied = migrate(engine, include_online=True)
+    except MigrationError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Migraciones aplicadas: {applied}" if applied else "✅ El esquema ya está al día")
+    show_status()
+
 
 if __name__ == "__main__":
-    migrate_database()
+    main()
@@ -0,0 +1,107 @@
+"""
+Shared fixtures: a throwaway SQLite database with every table
+
+``app`` is imported inside the fixtures, not at module level: pytest loads
+this file before any test module, and test_auth.py must set DATABASE_URL
+before the first import of app.db.
+"""
+import sys
+from pathlib import Path
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+
+def _create_schema(engine) -> None:
+    from app.db.database import Base
+    from app.db import models  # noqa: F401  (registra todos los modelos)
+    Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def engine():
+    """
+    In-memory SQLite shared by every session of the test (StaticPool).
+    Not disposed on teardown: threads a test stops without waiting (job queue
+    workers) may still be finishing a query on its single connection.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    _create_schema(engine)
+    return engine
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Session factory configured like app.db.database.SessionLocal"""
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL executed on the test engine; clear() it before the part to measure"""
+    from sqlalchemy import event
+
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda *args: executed.append(args[2]))
+    return executed
+
+
+@pytest.fixture
+def client_for(session_factory):
+    """Build a TestClient for an app whose routes use the test database and skip auth"""
+    from fastapi.testclient import TestClient
+    from app.db.database import get_db, get_read_db
+    from app.api.routers.auth import get_current_user
+
+    def override():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def build(app):
+        app.dependency_overrides[get_db] = override
+        app.dependency_overrides[get_read_db] = override
+        app.dependency_overrides[get_current_user] = lambda: None
+        return TestClient(app)
+
+    return build
+
+
+@pytest.fixture
+def worker_sessions(tmp_path):
+    """
+    Open a session factory with its own engine over one SQLite file, once per
+    simulated uvicorn worker
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    url = f"sqlite:///{tmp_path / 'workers.db'}"
+
+    def open_worker():
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        _create_schema(engine)
+        return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    return open_worker
@@ -0,0 +1,76 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.db.async_db import AsyncDB
+from app.db.crud import async_reads, playlist_crud
+from app.db.models.playlist import Playlist
+
+
+@pytest.fixture
+def adb(db):
+    db.add(Playlist(id=1, name="Lobby"))
+    db.commit()
+    return AsyncDB(db)
+
+
+def test_slow_query_does_not_stall_the_loop(monkeypatch, adb):
+    summary = playlist_crud.get_playlist_summary
+    threads = []
+
+    def slow_summary(db, playlist_id):
+        threads.append(threading.current_thread())
+        time.sleep(0.2)
+        return summary(db, playlist_id)
+
+    monkeypatch.setattr(playlist_crud, "get_playlist_summary", slow_summary)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await async_reads.get_playlist_summary(adb, 1)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result["name"] == "Lobby"
+    # El loop siguió atendiendo otras tareas mientras la consulta corría en otro hilo
+    assert ticks >= 5
+    assert threads[0] is not threading.main_thread()
+
+
+def test_calls_on_one_session_are_serialized(adb):
+    active, overlaps = [], []
+
+    def work(db, value):
+        active.append(value)
+        if len(active) > 1:
+            overlaps.append(value)
+        time.sleep(0.02)
+        active.remove(value)
+        return value
+
+    async def scenario():
+        return await asyncio.gather(*(adb.run(work, i) for i in range(4)))
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3]
+    assert overlaps == []
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from app.db import engine_profile
+from app.db.engine_profile import create_app_engine, create_read_engine, pool_size_for_workers
+
+
+def test_file_database_gets_pragmas_and_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_profile.settings, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(engine_profile.settings, "DB_MAX_CONNECTIONS", 16)
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = create_app_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        conn.execute(text("CREATE TABLE t (id INTEGER)"))
+    # 16 conexiones repartidas entre 4 workers
+    assert isinstance(engine.pool, QueuePool) and engine.pool.size() == 4
+
+    reader = create_read_engine(url)
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+
+
+def test_memory_database_keeps_plain_engine():
+    assert create_read_engine("sqlite://") is None
+    assert not isinstance(create_app_engine("sqlite://").pool, QueuePool)
+    assert pool_size_for_workers(1, 16) == 16
+    assert pool_size_for_workers(32, 16) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.core.event_bus import LocalEventBus, SQLiteEventBus
+
+
+def worker(bus):
+    """Attach collectors to a bus, like one uvicorn worker with its sockets"""
+    delivered, remote = [], []
+
+    async def deliver(event, data, topics):
+        delivered.append((event, data, topics))
+
+    async def on_remote(event, data):
+        remote.append(event)
+
+    bus.set_deliver(deliver)
+    bus.add_remote_listener(on_remote)
+    return delivered, remote
+
+
+def test_local_bus_delivers_in_process():
+    bus = LocalEventBus()
+    delivered, remote = worker(bus)
+    asyncio.run(bus.publish("media_created", {"id": 1}, ("admin",)))
+    assert delivered == [("media_created", {"id": 1}, ["admin"])]
+    assert remote == []
+
+
+def test_sqlite_bus_reaches_every_worker_once(tmp_path):
+    path = str(tmp_path / "bus.db")
+    first, second = SQLiteEventBus(path, poll_interval=0.01), SQLiteEventBus(path, poll_interval=0.01)
+    first_delivered, first_remote = worker(first)
+    second_delivered, second_remote = worker(second)
+
+    async def scenario():
+        await first.start()
+        await second.start()
+        await first.publish("schedule_created", {"id": 7}, ["admin"])
+        await second.publish("playlist_updated", {"playlist_id": 3}, None)
+        await asyncio.sleep(0.1)
+
+        # Un worker que arranca después no repite eventos anteriores
+        late = SQLiteEventBus(path, poll_interval=0.01)
+        late_delivered, _ = worker(late)
+        await late.start()
+        await asyncio.sleep(0.05)
+        for bus in (first, second, late):
+            await bus.stop()
+        return late_delivered
+
+    late_delivered = asyncio.run(scenario())
+    expected = [
+        ("schedule_created", {"id": 7}, ["admin"]),
+        ("playlist_updated", {"playlist_id": 3}, None),
+    ]
+    assert first_delivered == expected
+    assert second_delivered == [expected[1], expected[0]]
+    # Solo los eventos de otros procesos llegan a los listeners remotos
+    assert first_remote == ["playlist_updated"]
+    assert second_remote == ["schedule_created"]
+    assert late_delivered == []
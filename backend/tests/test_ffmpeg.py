@@ -0,0 +1,87 @@
+import io
+import subprocess
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.utils import ffmpeg
+
+ENCODERS_OUTPUT = """Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC (codec h264)
+ V....D h264_videotoolbox    VideoToolbox H.264 Encoder (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+HWACCELS_OUTPUT = """Hardware acceleration methods:
+videotoolbox
+vaapi
+"""
+
+
+def test_parse_codec_and_hwaccel_lists():
+    assert ffmpeg._parse_codec_list(ENCODERS_OUTPUT) == ["libx264", "h264_videotoolbox", "aac"]
+    assert ffmpeg._parse_hwaccels(HWACCELS_OUTPUT) == ["videotoolbox", "vaapi"]
+
+
+def test_capabilities_are_probed_once(monkeypatch):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        outputs = {
+            "-version": "ffmpeg version 6.1.1 Copyright (c) 2000-2023 the FFmpeg developers\n",
+            "-encoders": ENCODERS_OUTPUT,
+            "-decoders": ENCODERS_OUTPUT,
+            "-hwaccels": HWACCELS_OUTPUT,
+        }
+        return subprocess.CompletedProcess(cmd, 0, stdout=outputs[cmd[-1]], stderr="")
+
+    monkeypatch.setattr(ffmpeg.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(ffmpeg.subprocess, "run", fake_run)
+    monkeypatch.setattr(ffmpeg, "_capabilities", None)
+
+    caps = ffmpeg.probe_capabilities()
+    assert caps["version"] == "6.1.1"
+    assert caps["ffmpeg_path"] == "/usr/bin/ffmpeg"
+    assert ffmpeg.has_encoder("libx264")
+    assert ffmpeg.is_ffmpeg_installed()
+    probes = len(calls)
+
+    # Las comprobaciones siguientes usan la caché
+    ffmpeg.is_ffmpeg_installed()
+    ffmpeg.has_encoder("aac")
+    assert len(calls) == probes
+
+    ffmpeg.probe_capabilities(refresh=True)
+    assert len(calls) == 2 * probes
+
+
+def test_hls_ladder_never_upscales():
+    assert [r["name"] for r in ffmpeg.select_hls_ladder(1080)] == ["1080p", "720p", "480p"]
+    assert [r["name"] for r in ffmpeg.select_hls_ladder(720)] == ["720p", "480p"]
+    # Originales más pequeños que la escalera conservan la rendition mínima
+    assert [r["name"] for r in ffmpeg.select_hls_ladder(360)] == ["480p"]
+
+
+def test_progress_blocks_are_parsed():
+    output = io.StringIO(
+        "frame=10\nout_time_us=2500000\nprogress=continue\n"
+        "frame=40\nout_time_ms=10000000\nprogress=end\n"
+    )
+    blocks = list(ffmpeg.iter_progress(output))
+
+    assert len(blocks) == 2
+    assert ffmpeg.progress_percent(blocks[0], duration=10.0) == 25.0
+    assert ffmpeg.progress_percent(blocks[1], duration=10.0) == 100.0
+    assert ffmpeg.progress_percent({"out_time_us": "N/A", "progress": "continue"}, 10.0) is None
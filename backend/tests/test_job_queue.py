@@ -0,0 +1,143 @@
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.config import settings
+from app.db.models.media import Media, MediaStatus
+from app.db.models.media_job import MediaJob
+from app.core.job_queue import MediaJobQueue
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_job_is_retried_and_updates_media(monkeypatch, session_factory):
+    monkeypatch.setattr(settings, "MEDIA_JOB_RETRY_DELAY", 0.01)
+    db = session_factory()
+    media = Media(filename="promo", filepath="/uploads/promo.mp4", media_type="video",
+                  duration=1, status=MediaStatus.processing.value)
+    db.add(media)
+    db.commit()
+
+    calls = []
+
+    def flaky_handler(db, media, report_progress):
+        calls.append(media.id)
+        if len(calls) == 1:
+            raise RuntimeError("ffprobe crashed")
+        report_progress(50.0)
+        return {"duration": 42}
+
+    queue = MediaJobQueue(max_workers=1, session_factory=session_factory)
+    queue.handlers["process"] = flaky_handler
+    queue.start()
+    try:
+        job = queue.enqueue(db, media.id)
+        assert wait_for(lambda: session_factory().get(MediaJob, job.id).status == "done")
+    finally:
+        queue.stop()
+
+    check = session_factory()
+    job = check.get(MediaJob, job.id)
+    assert job.attempts == 2
+    assert job.last_error is None
+    assert job.progress == 100
+    media = check.get(Media, media.id)
+    assert media.status == MediaStatus.ready.value
+    assert media.duration == 42
+
+
+def test_pending_jobs_resume_on_start(session_factory):
+    db = session_factory()
+    media = Media(filename="clip", filepath="/uploads/clip.mp4", media_type="video", duration=1)
+    db.add(media)
+    db.commit()
+    # Trabajo persistido sin cola en marcha (p.ej. reinicio del servidor)
+    db.add(MediaJob(media_id=media.id, job_type="process", status="running", attempts=1, max_attempts=3))
+    db.commit()
+
+    queue = MediaJobQueue(max_workers=1, session_factory=session_factory)
+    queue.handlers["process"] = lambda db, media, report_progress: {"duration": 7}
+    queue.start()
+    try:
+        assert wait_for(lambda: session_factory().get(Media, media.id).status == MediaStatus.ready.value)
+    finally:
+        queue.stop()
+
+
+def test_two_queues_on_one_database_run_each_job_once(worker_sessions):
+    # Dos "workers" de uvicorn: cada uno con su motor sobre el mismo archivo
+    factories = [worker_sessions() for _ in range(2)]
+
+    db = factories[0]()
+    db.add_all([Media(id=i, filename=f"clip{i}", filepath=f"/uploads/clip{i}.mp4", media_type="video", duration=1)
+                for i in range(1, 7)])
+    db.add_all([MediaJob(media_id=i, job_type="process", status="queued", max_attempts=3) for i in range(1, 7)])
+    # Uno "running" con lease vigente (otro worker lo ejecuta) y otro abandonado
+    db.add(MediaJob(media_id=1, job_type="hls", status="running", attempts=1, max_attempts=3,
+                    heartbeat_at=datetime.utcnow()))
+    db.add(MediaJob(media_id=2, job_type="hls", status="running", attempts=1, max_attempts=3,
+                    heartbeat_at=datetime.utcnow() - timedelta(hours=1)))
+    db.commit()
+
+    calls = []
+    calls_lock = threading.Lock()
+
+    def handler(db, media, report_progress):
+        with calls_lock:
+            calls.append(media.id)
+        time.sleep(0.05)
+        return {}
+
+    queues = [MediaJobQueue(max_workers=3, session_factory=factory, lease_seconds=600) for factory in factories]
+    for queue in queues:
+        queue.handlers = {"process": handler, "hls": handler}
+        queue.start()
+    try:
+        assert wait_for(lambda: factories[0]().query(MediaJob).filter(MediaJob.status == "done").count() == 7)
+    finally:
+        for queue in queues:
+            queue.stop()
+
+    assert sorted(calls) == [1, 2, 2, 3, 4, 5, 6]
+    check = factories[0]()
+    jobs = check.query(MediaJob).order_by(MediaJob.id).all()
+    assert [job.attempts for job in jobs[:6]] == [1] * 6
+    assert jobs[6].status == "running" and jobs[6].attempts == 1
+    assert jobs[7].status == "done" and jobs[7].attempts == 2
+
+
+def test_expired_lease_is_adopted_while_running(session_factory):
+    db = session_factory()
+    media = Media(filename="clip", filepath="/uploads/clip.mp4", media_type="video", duration=1)
+    db.add(media)
+    db.commit()
+
+    queue = MediaJobQueue(max_workers=1, session_factory=session_factory, lease_seconds=0.3)
+    queue.handlers["process"] = lambda db, media, report_progress: {"duration": 9}
+    queue.start()
+    try:
+        # Un worker que se cae después del arranque deja el trabajo "running" sin latido
+        db.add(MediaJob(media_id=media.id, job_type="process", status="running", attempts=1, max_attempts=3,
+                        heartbeat_at=datetime.utcnow()))
+        db.commit()
+        assert wait_for(lambda: session_factory().get(Media, media.id).duration == 9)
+    finally:
+        queue.stop()
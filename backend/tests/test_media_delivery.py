@@ -0,0 +1,97 @@
+import hashlib
+import sys
+from pathlib import Path
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from fastapi.testclient import TestClient
+
+from app.core.media_delivery import MediaFiles, parse_range_header
+
+PAYLOAD = bytes(range(256)) * 8
+
+
+@pytest.fixture
+def client(tmp_path):
+    sha = hashlib.sha256(PAYLOAD).hexdigest()
+    (tmp_path / f"{sha}.mp4").write_bytes(PAYLOAD)
+    (tmp_path / f"{sha}_thumb.jpg").write_bytes(b"jpg")
+    app = Starlette(routes=[Mount("/uploads", MediaFiles(directory=str(tmp_path)))])
+    return TestClient(app), sha
+
+
+def test_parse_range_header():
+    assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_range_header("bytes=-100", 1000) == [(900, 999)]
+    assert parse_range_header("bytes=900-", 1000) == [(900, 999)]
+    # Rangos solapados o contiguos se fusionan
+    assert parse_range_header("bytes=0-10,5-20,21-30", 1000) == [(0, 30)]
+    assert parse_range_header("bytes=2000-3000", 1000) == []
+    assert parse_range_header("items=0-1", 1000) is None
+    assert parse_range_header("bytes=" + ",".join(f"{i}-{i}" for i in range(0, 40, 2)), 1000) is None
+
+
+def test_full_response_is_immutable_and_revalidates(client):
+    client, sha = client
+    response = client.get(f"/uploads/{sha}.mp4")
+    assert response.status_code == 200
+    assert response.content == PAYLOAD
+    assert response.headers["etag"] == f'"{sha}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["content-type"] == "video/mp4"
+
+    cached = client.get(f"/uploads/{sha}.mp4", headers={"If-None-Match": f'W/"{sha}"'})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # Los derivados pueden regenerarse: se revalidan en vez de ser immutable
+    thumb = client.get(f"/uploads/{sha}_thumb.jpg")
+    assert "immutable" not in thumb.headers["cache-control"]
+
+
+def test_single_and_multi_range(client):
+    client, sha = client
+    response = client.get(f"/uploads/{sha}.mp4", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(PAYLOAD)}"
+    assert response.content == PAYLOAD[100:200]
+
+    response = client.get(f"/uploads/{sha}.mp4", headers={"Range": "bytes=0-9,-10"})
+    assert response.status_code == 206
+    boundary = response.headers["content-type"].split("boundary=")[1]
+    assert int(response.headers["content-length"]) == len(response.content)
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[1].endswith(b"\r\n\r\n" + PAYLOAD[:10] + b"\r\n")
+    assert parts[2].endswith(b"\r\n\r\n" + PAYLOAD[-10:] + b"\r\n")
+    assert parts[3] == b"--\r\n"
+
+    response = client.get(f"/uploads/{sha}.mp4", headers={"Range": "bytes=99999-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(PAYLOAD)}"
+
+
+def test_if_range_with_stale_validator_returns_full_file(client):
+    client, sha = client
+    response = client.get(f"/uploads/{sha}.mp4", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == PAYLOAD
+
+    response = client.get(f"/uploads/{sha}.mp4", headers={"Range": "bytes=0-9", "If-Range": f'"{sha}"'})
+    assert response.status_code == 206
+
+
+def test_traversal_and_missing_files_are_404(client):
+    client, sha = client
+    assert client.get("/uploads/../../etc/passwd").status_code == 404
+    assert client.get("/uploads/missing.mp4").status_code == 404
+    assert client.post(f"/uploads/{sha}.mp4").status_code == 405
@@ -0,0 +1,108 @@
+import io
+import os
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.config import settings
+from app.db.crud import media_blob_crud, media_crud
+from app.db.models.media_blob import MediaBlob
+from app.db.models.playlist import Playlist
+from app.db.schemas.media_schema import MediaCreate
+from app.utils.uploads import discard_staged, stream_to_blob_store
+
+
+def test_shared_blob_is_unlinked_with_last_reference(tmp_path, monkeypatch, db):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    payload = b"\x00promo" * 1000
+
+    created = []
+    for branch in ("centro", "norte"):
+        stored = stream_to_blob_store(io.BytesIO(payload), f"promo-{branch}.mp4")
+        created.append(media_crud.create_media(
+            db, MediaCreate(filename=f"promo-{branch}", media_type="video", duration=10), stored=stored
+        ))
+        discard_staged(stored)
+    first, second = created
+
+    assert first.blob_id == second.blob_id
+    assert first.filepath == second.filepath
+    assert db.get(MediaBlob, first.blob_id).ref_count == 2
+    disk_path = media_crud.get_media_disk_path(first)
+    thumbnail = disk_path.parent / f"{disk_path.stem}_thumb.jpg"
+    thumbnail.write_bytes(b"jpg")
+
+    # El primer borrado conserva el archivo y los derivados compartidos
+    assert media_crud.delete_media(db, first.id)
+    assert disk_path.exists() and thumbnail.exists()
+    assert db.get(MediaBlob, second.blob_id).ref_count == 1
+
+    assert media_crud.delete_media(db, second.id)
+    assert not disk_path.exists() and not thumbnail.exists()
+    assert db.query(MediaBlob).count() == 0
+
+
+def test_same_bytes_under_two_extensions_share_one_file(tmp_path, monkeypatch, db):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    payload = b"\x00clip" * 1000
+
+    created = []
+    for name in ("clip.mp4", "clip.mov"):
+        stored = stream_to_blob_store(io.BytesIO(payload), name)
+        created.append(media_crud.create_media(
+            db, MediaCreate(filename=name, media_type="video", duration=10), stored=stored
+        ))
+        discard_staged(stored)
+
+    # El blob es por contenido: el segundo media apunta al archivo del primero
+    assert created[1].filepath == created[0].filepath
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(created[0].filepath)]
+
+    for media in created:
+        assert media_crud.delete_media(db, media.id)
+    assert list(tmp_path.iterdir()) == []
+    assert db.query(MediaBlob).count() == 0
+
+
+def test_upload_racing_the_last_release_keeps_its_file(tmp_path, monkeypatch, db):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    payload = b"\x00spot" * 1000
+
+    stored = stream_to_blob_store(io.BytesIO(payload), "spot.mp4")
+    media = media_crud.create_media(db, MediaCreate(filename="spot", media_type="video", duration=10), stored=stored)
+    discard_staged(stored)
+
+    # Una subida idéntica ya hasheada cuando se borra la última referencia al blob
+    racing = stream_to_blob_store(io.BytesIO(payload), "spot-2.mp4")
+    assert media_crud.delete_media(db, media.id)
+    assert not media_crud.get_media_disk_path(media).exists()
+
+    again = media_crud.create_media(db, MediaCreate(filename="spot-2", media_type="video", duration=10), stored=racing)
+    discard_staged(racing)
+    assert media_crud.get_media_disk_path(again).read_bytes() == payload
+    assert db.get(MediaBlob, again.blob_id).ref_count == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == [stored.filename]
+
+
+def test_acquire_blob_keeps_the_callers_pending_work(tmp_path, monkeypatch, db):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    first = stream_to_blob_store(io.BytesIO(b"clip" * 100), "clip.mp4")
+    media_blob_crud.acquire_blob(db, first)
+    db.commit()
+
+    # Un blob ya existente no provoca rollback de lo pendiente en la sesión
+    db.add(Playlist(name="Lobby"))
+    second = stream_to_blob_store(io.BytesIO(b"clip" * 100), "clip-2.mp4")
+    assert media_blob_crud.acquire_blob(db, second).ref_count == 2
+    db.commit()
+    assert db.query(Playlist).count() == 1
+    discard_staged(first)
+    discard_staged(second)
@@ -0,0 +1,91 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import create_engine
+
+from app.db.database import Base
+from app.db import models  # noqa: F401  (registra todos los modelos)
+from app.db import migrations
+from app.db.migrations import MIGRATIONS, Migration, MigrationError
+
+
+def legacy_database(path):
+    """A database created by an older version: no schema_version, columns and indexes missing"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX ix_schedules_active_type_mask")
+    conn.execute("ALTER TABLE playlists DROP COLUMN version")
+    conn.execute("ALTER TABLE playlist_media DROP COLUMN duration")
+    conn.execute("INSERT INTO playlists (id, name) VALUES (1, 'Lobby')")
+    conn.commit()
+    conn.close()
+    return create_engine(f"sqlite:///{path}")
+
+
+def columns(engine, table):
+    with engine.connect() as conn:
+        return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def test_fresh_database_is_stamped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrations.migrate(engine) == []
+    assert migrations.applied_versions(engine) == {m.version for m in MIGRATIONS}
+    assert migrations.start_online(engine) is None
+
+
+def test_legacy_database_is_upgraded_with_backup(tmp_path):
+    path = tmp_path / "legacy.db"
+    engine = legacy_database(path)
+
+    applied = migrations.migrate(engine, backup=True)
+    # Las online quedan para después del arranque
+    assert applied == [m.version for m in MIGRATIONS if not m.online]
+    assert "version" in columns(engine, "playlists") and "duration" in columns(engine, "playlist_media")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT version FROM playlists").scalar() == 0
+
+    # El backup es una copia consistente del esquema anterior
+    backup = sqlite3.connect(tmp_path / "legacy.db.schema-v0.bak")
+    assert "version" not in {row[1] for row in backup.execute("PRAGMA table_info(playlists)")}
+    backup.close()
+
+    thread = migrations.start_online(engine)
+    thread.join(5)
+    assert migrations.applied_versions(engine) == {m.version for m in MIGRATIONS}
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'ix_schedules_active_type_mask'"
+        ).first()
+    # Ya aplicadas: otra ejecución (u otro worker) no hace nada
+    assert migrations.migrate(engine, include_online=True) == []
+
+
+def test_failed_migration_is_rolled_back(tmp_path):
+    engine = legacy_database(tmp_path / "broken.db")
+
+    def broken(ctx):
+        ctx.add_column("playlists", "color", "VARCHAR")
+        raise RuntimeError("boom")
+
+    registry = MIGRATIONS + [Migration(99, "broken", broken)]
+    with pytest.raises(MigrationError, match="99"):
+        migrations.migrate(engine, backup=False, migrations=registry)
+    # El DDL de la migración fallida se deshizo; las anteriores quedaron aplicadas
+    assert "color" not in columns(engine, "playlists")
+    applied = migrations.applied_versions(engine)
+    assert 99 not in applied and 5 in applied
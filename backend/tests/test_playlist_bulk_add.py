@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from fastapi import FastAPI
+
+from app.db.crud import playlist_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.models.playlist_change import PlaylistChange
+from app.db.models.playlist_media import PlaylistMedia
+from app.api.routers import playlists
+from app.core.playlist_snapshots import PlaylistSnapshotCache
+
+MEDIA = 600
+
+
+def setup(monkeypatch, db):
+    snapshots = PlaylistSnapshotCache()
+    for module in (playlist_crud, playlists):
+        monkeypatch.setattr(module, "playlist_snapshots", snapshots)
+
+    db.add_all([Playlist(id=1, name="Lobby"), Playlist(id=2, name="Bar")])
+    db.bulk_insert_mappings(Media, [
+        {"id": i, "filename": f"m{i}.jpg", "filepath": f"/uploads/m{i}.jpg", "media_type": "image", "duration": 10}
+        for i in range(1, MEDIA + 1)
+    ])
+    db.commit()
+    return snapshots
+
+
+def test_statement_count_does_not_grow_with_the_batch(monkeypatch, db, statements):
+    setup(monkeypatch, db)
+
+    statements.clear()
+    playlist_crud.bulk_add_media_to_playlist(db, 1, list(range(1, 11)))
+    small = len(statements)
+
+    statements.clear()
+    change, results = playlist_crud.bulk_add_media_to_playlist(db, 2, list(range(1, MEDIA + 1)))
+    assert len(statements) == small
+    assert change.version == 1 and len(change.diff["items"]) == MEDIA
+    assert all(result["status"] == "added" for result in results)
+    assert db.query(PlaylistMedia).filter(PlaylistMedia.playlist_id == 2).count() == MEDIA
+
+
+def test_results_per_id_and_a_single_change(monkeypatch, db):
+    snapshots = setup(monkeypatch, db)
+    playlist_crud.add_single_media_to_playlist(db, 1, 2)
+    snapshots.put(1, {"medias": []}, [2], snapshots.generation())
+
+    change, results = playlist_crud.bulk_add_media_to_playlist(db, 1, [1, 2, 9999, 3, 1])
+    assert results == [
+        {"media_id": 1, "status": "added", "order_index": 1},
+        {"media_id": 2, "status": "already_in_playlist", "order_index": None},
+        {"media_id": 9999, "status": "not_found", "order_index": None},
+        {"media_id": 3, "status": "added", "order_index": 2},
+        {"media_id": 1, "status": "duplicate", "order_index": None},
+    ]
+    assert change.version == 2
+    assert [item["media_id"] for item in change.diff["items"]] == [1, 3]
+    assert db.query(PlaylistChange).filter(PlaylistChange.playlist_id == 1).count() == 2
+    assert snapshots.get(1) is None
+
+    # Nada que agregar: sin versión nueva ni registro de cambio
+    change, results = playlist_crud.bulk_add_media_to_playlist(db, 1, [1, 9999])
+    assert change is None
+    assert [result["status"] for result in results] == ["already_in_playlist", "not_found"]
+    assert playlist_crud.get_playlist_version(db, 1) == 2
+    assert playlist_crud.bulk_add_media_to_playlist(db, 42, [1]) is None
+
+
+def test_endpoint_broadcasts_one_aggregated_event(monkeypatch, db, client_for):
+    setup(monkeypatch, db)
+    events = []
+    monkeypatch.setattr(playlists, "broadcast_event", lambda *args: events.append(args))
+
+    app = FastAPI()
+    app.include_router(playlists.router, prefix="/api/playlists")
+    client = client_for(app)
+
+    body = client.post("/api/playlists/1/media/bulk", json={"media_ids": [1, 2, 3, 9999]}).json()
+    assert body["version"] == 1 and body["added"] == 3
+    assert [result["status"] for result in body["results"]] == ["added", "added", "added", "not_found"]
+    assert len(events) == 1
+    assert events[0][0] == "playlist_updated"
+    assert [item["media_id"] for item in events[0][1]["change"]["items"]] == [1, 2, 3]
+
+    body = client.post("/api/playlists/1/media/bulk", json={"media_ids": [1]}).json()
+    assert body["version"] == 1 and body["added"] == 0
+    assert len(events) == 1
+
+    assert client.post("/api/playlists/42/media/bulk", json={"media_ids": [1]}).status_code == 404
+
+    # La ruta existente usa el mismo camino y también devuelve el detalle por id
+    body = client.post("/api/playlists/2/media", json={"media_ids": [4, 4]}).json()
+    assert body["version"] == 1
+    assert [result["status"] for result in body["results"]] == ["added", "duplicate"]
+    assert len(events) == 2
+
+    # Volver a agregar lo mismo (o medios inexistentes) es idempotente: 200, sin evento
+    response = client.post("/api/playlists/2/media", json={"media_ids": [4, 9999]})
+    assert response.status_code == 200
+    assert response.json()["version"] == 1
+    assert [result["status"] for result in response.json()["results"]] == ["already_in_playlist", "not_found"]
+    assert len(events) == 2
+    assert client.post("/api/playlists/42/media", json={"media_ids": [4]}).status_code == 404
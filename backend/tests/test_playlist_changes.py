@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from fastapi import FastAPI
+
+from app.db.crud import playlist_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.schemas.playlist_media_schema import PlaylistAddMediaRequest
+from app.db.schemas.playlist_schema import PlaylistUpdate
+from app.api.routers import player
+
+
+def setup(db, client_for):
+    db.add(Playlist(id=1, name="Lobby"))
+    db.add_all([
+        Media(id=i, filename=f"m{i}.jpg", filepath=f"/uploads/m{i}.jpg", media_type="image", duration=10)
+        for i in range(1, 5)
+    ])
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(player.router, prefix="/api")
+    return client_for(app)
+
+
+def test_every_change_bumps_version_and_is_logged(db, client_for):
+    setup(db, client_for)
+    added = playlist_crud.add_media_to_playlist(db, 1, PlaylistAddMediaRequest(media_ids=[1, 2, 3]))
+    assert added.version == 1
+    assert added.diff["items"] == [
+        {"media_id": m, "order_index": i, "duration": None} for i, m in enumerate([1, 2, 3])
+    ]
+
+    # Solo los elementos que se mueven entran en el diff; sin movimientos no hay versión nueva
+    reordered = playlist_crud.reorder_playlist_media(db, 1, [
+        {"media_id": 1, "order_index": 1}, {"media_id": 2, "order_index": 0}, {"media_id": 3, "order_index": 2}
+    ])
+    assert playlist_crud.change_payload(reordered) == {
+        "version": 2, "action": "media_reordered",
+        "order": [{"media_id": 1, "order_index": 1}, {"media_id": 2, "order_index": 0}]
+    }
+    assert playlist_crud.reorder_playlist_media(db, 1, [{"media_id": 3, "order_index": 2}]) is None
+
+    assert playlist_crud.update_media_duration_in_playlist(db, 1, 2, 30).version == 3
+    assert playlist_crud.remove_media_from_playlist(db, 1, 3).version == 4
+    assert playlist_crud.remove_media_from_playlist(db, 1, 3) is None
+    playlist_crud.update_playlist(db, 1, PlaylistUpdate(name="Hall"))
+
+    assert playlist_crud.get_playlist_version(db, 1) == 5
+    assert [c.action for c in playlist_crud.get_changes_since(db, 1, 2)] == [
+        "media_duration_updated", "media_removed", "playlist_modified"
+    ]
+    assert playlist_crud.get_changes_since(db, 1, 5) == []
+    assert playlist_crud.get_changes_since(db, 1, 6) is None
+
+
+def test_since_version_returns_only_deltas(monkeypatch, db, client_for):
+    client = setup(db, client_for)
+    playlist_crud.add_single_media_to_playlist(db, 1, 1)
+    playlist_crud.add_single_media_to_playlist(db, 1, 2)
+
+    full = client.get("/api/player/playlists/1/complete").json()
+    assert full["full"] is True and full["version"] == 2
+    assert [m["id"] for m in full["medias"]] == [1, 2]
+
+    playlist_crud.add_single_media_to_playlist(db, 1, 4, duration=15)
+    playlist_crud.reorder_playlist_media(db, 1, [{"media_id": 4, "order_index": 0}, {"media_id": 1, "order_index": 2}])
+
+    delta = client.get("/api/player/playlists/1/complete", params={"since_version": 2}).json()
+    assert delta["full"] is False and delta["version"] == 4
+    added, reordered = delta["changes"]
+    # Los añadidos llevan la entrada completa del player, con el mismo formato que la respuesta completa
+    assert added["action"] == "media_added"
+    assert added["items"][0]["id"] == 4 and added["items"][0]["effective_duration"] == 15
+    assert added["items"][0]["file_url"].endswith("/uploads/m4.jpg")
+    assert reordered["order"] == [{"media_id": 4, "order_index": 0}, {"media_id": 1, "order_index": 2}]
+
+    assert client.get("/api/player/playlists/1/complete", params={"since_version": 4}).json()["changes"] == []
+
+    # Historial recortado: la versión pedida ya no está y se devuelve la playlist completa
+    monkeypatch.setattr(playlist_crud, "MAX_CHANGES_PER_PLAYLIST", 1)
+    playlist_crud.remove_media_from_playlist(db, 1, 2)
+    response = client.get("/api/player/playlists/1/complete", params={"since_version": 2}).json()
+    assert response["full"] is True and response["version"] == 5
+    assert [m["id"] for m in response["medias"]] == [4, 1]
+
+
+def test_duplicate_media_is_rejected_by_unique_index(db, client_for):
+    setup(db, client_for)
+    assert playlist_crud.add_single_media_to_playlist(db, 1, 1).version == 1
+    # Sin consulta previa: el índice único (playlist_id, media_id) rechaza el segundo alta
+    assert playlist_crud.add_single_media_to_playlist(db, 1, 1) is None
+    assert playlist_crud.get_playlist_version(db, 1) == 1
+    assert len(playlist_crud.get_playlist_media(db, 1)) == 1
@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.db.crud import media_crud, playlist_crud, schedule_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.schemas.media_schema import MediaUpdate
+from app.db.schemas.schedule_schema import ScheduleCreate
+from app.api.routers import playlists
+from app.core.playlist_snapshots import PlaylistSnapshotCache
+
+
+def setup(monkeypatch, db):
+    snapshots = PlaylistSnapshotCache()
+    for module in (playlist_crud, media_crud, schedule_crud, playlists):
+        monkeypatch.setattr(module, "playlist_snapshots", snapshots)
+
+    db.add_all([Playlist(id=1, name="Lobby"), Playlist(id=2, name="Bar")])
+    db.add_all([
+        Media(id=i, filename=f"m{i}.jpg", filepath=f"/uploads/m{i}.jpg", media_type="image", duration=10)
+        for i in range(1, 4)
+    ])
+    db.commit()
+    for media_id in (1, 2, 3):
+        playlist_crud.add_single_media_to_playlist(db, 1, media_id)
+    playlist_crud.add_single_media_to_playlist(db, 2, 3)
+    return snapshots
+
+
+def test_hits_do_not_touch_sqlite(monkeypatch, db, statements):
+    snapshots = setup(monkeypatch, db)
+    schedule_crud.create_schedule(db, ScheduleCreate(media_id=2, is_all_day=True))
+
+    statements.clear()
+    first = playlists._playlist_for_player(db, 1)
+    # Playlist, elementos, medios y schedules: cuatro consultas sin importar el tamaño
+    assert len(statements) == 4
+    assert [m["id"] for m in first["medias"]] == [1, 2, 3]
+    assert first["medias"][1]["schedule"]["is_all_day"] is True
+
+    statements.clear()
+    assert playlists._playlist_for_player(db, 1) is first
+    assert statements == []
+    assert snapshots.stats()["hits"] == 1 and snapshots.stats()["misses"] == 1
+
+
+def test_invalidation_is_precise(monkeypatch, db):
+    snapshots = setup(monkeypatch, db)
+    playlists._playlist_for_player(db, 1)
+    playlists._playlist_for_player(db, 2)
+
+    # La media 1 solo está en la playlist 1
+    media_crud.update_media(db, 1, MediaUpdate(duration=20))
+    assert snapshots.get(1) is None and snapshots.get(2) is not None
+    assert playlists._playlist_for_player(db, 1)["medias"][0]["duration"] == 20
+
+    # Un schedule de la media 3 afecta a las dos playlists
+    schedule = schedule_crud.create_schedule(db, ScheduleCreate(media_id=3, is_all_day=True))
+    assert snapshots.stats()["entries"] == 0
+    assert playlists._playlist_for_player(db, 2)["medias"][0]["schedule"]["id"] == schedule.id
+
+    # Desactivarlo también invalida, aunque ya no compile a una regla del índice
+    playlists._playlist_for_player(db, 1)
+    schedule_crud.toggle_schedule_status(db, schedule.id)
+    assert snapshots.stats()["entries"] == 0
+    assert playlists._playlist_for_player(db, 2)["medias"][0]["schedule"] is None
+
+    playlist_crud.remove_media_from_playlist(db, 1, 2)
+    assert [m["id"] for m in playlists._playlist_for_player(db, 1)["medias"]] == [1, 3]
+
+
+def test_lru_limits_and_stale_builds():
+    cache = PlaylistSnapshotCache(max_entries=2, max_items=3)
+    cache.put(1, {"id": 1}, [1, 2], cache.generation())
+    cache.put(2, {"id": 2}, [3], cache.generation())
+    cache.get(1)
+    # Se supera el límite de elementos: sale la menos usada
+    cache.put(3, {"id": 3}, [4], cache.generation())
+    assert cache.get(2) is None and cache.get(1) == {"id": 1}
+    assert cache.stats()["evictions"] == 1 and cache.stats()["items"] == 3
+
+    # Un snapshot leído antes de una invalidación no se guarda
+    generation = cache.generation()
+    cache.invalidate_media(4)
+    assert cache.put(3, {"id": 3}, [4], generation) is False
+    assert cache.stats()["entries"] == 1 and cache.stats()["invalidations"] == 1
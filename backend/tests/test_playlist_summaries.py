@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.db.crud import playlist_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.models.playlist_media import PlaylistMedia
+
+
+def test_summaries_use_one_grouped_query_and_duration_override(db, statements):
+    video = Media(filename="promo", filepath="/uploads/promo.mp4", media_type="video", duration=30)
+    image = Media(filename="banner", filepath="/uploads/banner.png", media_type="image", duration=10)
+    morning, empty = Playlist(name="Mañana"), Playlist(name="Vacía")
+    db.add_all([video, image, morning, empty])
+    db.flush()
+    db.add_all([
+        PlaylistMedia(playlist_id=morning.id, media_id=video.id, order_index=0),
+        # Duración específica de la playlist: la imagen se muestra 5s en vez de 10s
+        PlaylistMedia(playlist_id=morning.id, media_id=image.id, order_index=1, duration=5),
+    ])
+    db.commit()
+
+    statements.clear()
+
+    summaries = playlist_crud.get_playlist_summaries(db)
+    assert len(statements) == 1
+    by_name = {s["name"]: s for s in summaries}
+    assert by_name["Mañana"]["media_count"] == 2
+    assert by_name["Mañana"]["total_duration"] == 35
+    assert by_name["Vacía"]["media_count"] == 0
+    assert by_name["Vacía"]["total_duration"] == 0
+
+    assert playlist_crud.get_playlist_summary(db, morning.id)["total_duration"] == 35
+    assert playlist_crud.get_playlist_summary(db, 999) is None
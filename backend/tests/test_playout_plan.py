@@ -0,0 +1,112 @@
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import event
+
+from app.db.crud import schedule_crud, playout_crud, playlist_crud
+from app.db.models.playlist import Playlist
+from app.db.models.playout_segment import PlayoutSegment
+from app.db.schemas.schedule_schema import ScheduleCreate, ScheduleUpdate
+from app.core.schedule_index import ScheduleIndex
+
+# 2024-10-28 es lunes
+MONDAY = date(2024, 10, 28)
+SUNDAY = MONDAY + timedelta(days=6)
+
+
+def test_plan_covers_range_and_refreshes_only_affected_days(monkeypatch, db):
+    db.add_all([Playlist(id=1, name="Mañana"), Playlist(id=2, name="Tarde")])
+    db.commit()
+
+    index = ScheduleIndex()
+    monkeypatch.setattr(schedule_crud, "schedule_index", index)
+    weekly = schedule_crud.create_schedule(db, ScheduleCreate(
+        playlist_id=1, daily_start="08:00", daily_end="20:00", weekdays=[0, 1, 2, 3, 4]
+    ))
+
+    playout_crud.ensure_days(db, MONDAY, SUNDAY, index)
+    total, segments = playout_crud.list_segments(db, MONDAY, SUNDAY)
+    # Lunes-viernes: hueco, playlist, hueco; fin de semana: un hueco por día
+    assert total == 5 * 3 + 2
+    assert segments[0].starts_at == datetime(2024, 10, 28)
+    for previous, current in zip(segments, segments[1:]):
+        assert previous.ends_at == current.starts_at
+    assert segments[-1].ends_at == datetime(2024, 11, 4)
+    assert [s.schedule_id for s in segments[:3]] == [None, weekly.id, None]
+
+    untouched = {s.id for s in segments if s.day != MONDAY}
+    # Una regla de lunes con más prioridad solo regenera el lunes
+    promo = schedule_crud.create_schedule(db, ScheduleCreate(
+        playlist_id=2, daily_start="12:00", daily_end="13:00", weekdays=[0], priority=5
+    ))
+    _, segments = playout_crud.list_segments(db, MONDAY, SUNDAY)
+    assert untouched <= {s.id for s in segments}
+    monday = [(s.starts_at.hour, s.ends_at.hour, s.schedule_id) for s in segments if s.day == MONDAY]
+    assert monday == [(0, 8, None), (8, 12, weekly.id), (12, 13, promo.id), (13, 20, weekly.id), (20, 0, None)]
+
+    schedule_crud.update_schedule(db, weekly.id, ScheduleUpdate(weekdays=[5]))
+    saturday = [s for s in playout_crud.list_segments(db, MONDAY, SUNDAY)[1] if s.day == MONDAY + timedelta(days=5)]
+    assert [s.schedule_id for s in saturday] == [None, weekly.id, None]
+
+    # Borrar la playlist elimina sus schedules también del plan
+    playlist_crud.delete_playlist(db, 2)
+    assert db.query(PlayoutSegment).filter(PlayoutSegment.schedule_id == promo.id).count() == 0
+    # Lunes-viernes ya sin schedules (un hueco cada uno) + sábado (tres segmentos)
+    assert playout_crud.prune_before(db, SUNDAY) == 5 + 3
+
+
+def test_startup_sync_writes_once_across_workers(worker_sessions):
+    workers = []
+    for _ in range(3):
+        Session = worker_sessions()
+        statements = []
+        event.listen(Session.kw["bind"], "before_cursor_execute", lambda *args, log=statements: log.append(args[2]))
+        workers.append((Session, statements))
+
+    # Un día anterior al horizonte: se purga
+    db = workers[0][0]()
+    db.add(PlayoutSegment(day=MONDAY - timedelta(days=1), starts_at=datetime(2024, 10, 27), ends_at=datetime(2024, 10, 28)))
+    db.commit()
+    db.close()
+    workers[0][1].clear()
+
+    # Arranque simultáneo de tres workers
+    barrier = threading.Barrier(len(workers))
+    written = []
+
+    def start(Session):
+        session = Session()
+        try:
+            barrier.wait()
+            written.append(playout_crud.sync_horizon(session, MONDAY, index=ScheduleIndex()))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=start, args=(Session,)) for Session, _ in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Un solo worker escribe (7 días sin schedules: un hueco cada uno); el resto no
+    assert sorted(written) == [0, 0, 7]
+    check = workers[0][0]()
+    assert check.query(PlayoutSegment).count() == 7
+    assert sum(1 for _, statements in workers for sql in statements if sql.startswith("INSERT")) == 1
+
+    # Reinicio sin cambios: ninguna escritura
+    for _, statements in workers:
+        statements.clear()
+    assert playout_crud.sync_horizon(workers[1][0](), MONDAY, index=ScheduleIndex()) == 0
+    assert not any(sql.startswith(("INSERT", "DELETE")) for sql in workers[1][1])
@@ -0,0 +1,139 @@
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import event
+
+from app.db.database import Base
+from app.db.crud import media_crud, playlist_crud, schedule_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.schemas.media_schema import MediaUpdate
+from app.db.schemas.playlist_schema import PlaylistCreate, PlaylistUpdate
+from app.db.schemas.playlist_media_schema import PlaylistAddMediaRequest
+from app.db.schemas.schedule_schema import ScheduleCreate, ScheduleUpdate
+from app.api.routers import playlists
+from app.core.playlist_snapshots import PlaylistSnapshotCache
+
+# Recorridos completos aceptados, con su motivo: (paso, tabla)
+ALLOWED_SCANS = {
+    # Solo al arrancar, sobre los schedules sin columnas derivadas
+    ("backfill_schedule_occurrences", "schedules"),
+}
+
+SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def tour(db):
+    """Every CRUD function of playlist_crud, media_crud and schedule_crud that touches the database"""
+    return [
+        ("create_playlist", lambda: playlist_crud.create_playlist(db, PlaylistCreate(name="Hall"))),
+        ("add_single_media_to_playlist", lambda: playlist_crud.add_single_media_to_playlist(db, 1, 1)),
+        ("add_media_to_playlist", lambda: playlist_crud.add_media_to_playlist(db, 1, PlaylistAddMediaRequest(media_ids=[2, 3]))),
+        ("get_playlist", lambda: playlist_crud.get_playlist(db, 1)),
+        ("list_playlists", lambda: playlist_crud.list_playlists(db)),
+        ("get_playlist_summaries", lambda: playlist_crud.get_playlist_summaries(db)),
+        ("get_playlist_summary", lambda: playlist_crud.get_playlist_summary(db, 1)),
+        ("get_playlist_version", lambda: playlist_crud.get_playlist_version(db, 1)),
+        ("get_changes_since", lambda: playlist_crud.get_changes_since(db, 1, 0)),
+        ("reorder_playlist_media", lambda: playlist_crud.reorder_playlist_media(db, 1, [{"media_id": 1, "order_index": 5}])),
+        ("update_media_duration_in_playlist", lambda: playlist_crud.update_media_duration_in_playlist(db, 1, 2, 30)),
+        ("get_playlist_media", lambda: playlist_crud.get_playlist_media(db, 1)),
+        ("get_playlist_media_relation", lambda: playlist_crud.get_playlist_media_relation(db, 1, 2)),
+        ("player_snapshot", lambda: playlists._playlist_for_player(db, 1)),
+        ("remove_media_from_playlist", lambda: playlist_crud.remove_media_from_playlist(db, 1, 3)),
+        ("update_playlist", lambda: playlist_crud.update_playlist(db, 1, PlaylistUpdate(name="Lobby"))),
+        ("get_playlist_stats", lambda: playlist_crud.get_playlist_stats(db)),
+        ("get_media", lambda: media_crud.get_media(db, 1)),
+        ("list_media", lambda: media_crud.list_media(db)),
+        ("update_media", lambda: media_crud.update_media(db, 1, MediaUpdate(duration=15))),
+        ("get_media_playlists", lambda: media_crud.get_media_playlists(db, 1)),
+        ("get_media_playlist_ids", lambda: media_crud.get_media_playlist_ids(db, 1)),
+        ("get_processed_media_for_blob", lambda: media_crud.get_processed_media_for_blob(db, 1, exclude_id=2)),
+        ("create_schedule", lambda: schedule_crud.create_schedule(db, ScheduleCreate(media_id=1, is_all_day=True))),
+        ("create_schedule", lambda: schedule_crud.create_schedule(db, ScheduleCreate(
+            playlist_id=1, schedule_type="advanced", specific_times=["2026-10-31T10:00:00"]))),
+        ("get_schedule", lambda: schedule_crud.get_schedule(db, 1)),
+        ("list_schedules", lambda: schedule_crud.list_schedules(db)),
+        ("get_schedules_by_media", lambda: schedule_crud.get_schedules_by_media(db, 1)),
+        ("get_schedules_by_playlist", lambda: schedule_crud.get_schedules_by_playlist(db, 1)),
+        ("get_active_schedules", lambda: schedule_crud.get_active_schedules(db, "simple")),
+        ("get_schedules_for_date", lambda: schedule_crud.get_schedules_for_date(db, date(2026, 10, 31), 5)),
+        ("get_schedules_by_date_range", lambda: schedule_crud.get_schedules_by_date_range(db, date(2026, 10, 1), date(2026, 10, 31))),
+        ("backfill_schedule_occurrences", lambda: schedule_crud.backfill_schedule_occurrences(db)),
+        ("toggle_schedule_status", lambda: schedule_crud.toggle_schedule_status(db, 1)),
+        ("update_schedule", lambda: schedule_crud.update_schedule(db, 1, ScheduleUpdate(priority=2))),
+        ("delete_schedule", lambda: schedule_crud.delete_schedule(db, 2)),
+        ("delete_media", lambda: media_crud.delete_media(db, 2)),
+        ("delete_playlist", lambda: playlist_crud.delete_playlist(db, 2)),
+    ]
+
+
+def capture_plans(monkeypatch, engine, db):
+    """(step, statement, plan rows) of every query run by the CRUD tour"""
+    monkeypatch.setattr(playlists, "playlist_snapshots", PlaylistSnapshotCache())
+    db.add_all([Playlist(id=1, name="Lobby"), Playlist(id=2, name="Bar")])
+    db.add_all([
+        Media(id=i, filename=f"m{i}.jpg", filepath=f"/uploads/m{i}.jpg", media_type="image", duration=10)
+        for i in range(1, 5)
+    ])
+    db.commit()
+
+    captured, current = [], [None]
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((current[0], statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    for step, call in tour(db):
+        current[0] = step
+        call()
+    event.remove(engine, "before_cursor_execute", record)
+
+    cursor = engine.raw_connection().cursor()
+    return [
+        (step, statement, [row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)])
+        for step, statement, parameters in captured
+    ]
+
+
+def test_filtered_queries_never_scan_a_table(monkeypatch, engine, db):
+    tables = set(Base.metadata.tables)
+    plans = capture_plans(monkeypatch, engine, db)
+    assert {step for step, _, _ in plans} >= {name for name, _ in tour(None)}
+
+    offenders = []
+    for step, statement, plan in plans:
+        # Los listados sin filtro recorren la tabla por definición (paginados con LIMIT)
+        if " WHERE " not in statement:
+            continue
+        for detail in plan:
+            match = SCAN.match(detail)
+            if match and match.group(1) in tables and (step, match.group(1)) not in ALLOWED_SCANS:
+                offenders.append(f"{step}: {detail} :: {' '.join(statement.split())[:160]}")
+    assert offenders == []
+
+
+def test_hot_lookups_use_composite_indexes(monkeypatch, engine, db):
+    plans = {}
+    for step, statement, plan in capture_plans(monkeypatch, engine, db):
+        plans.setdefault(step, []).extend(plan)
+
+    # Elementos de la playlist en orden, sin ordenar en un B-tree temporal
+    assert any("ix_playlist_media_playlist_order" in detail for detail in plans["get_playlist_media"])
+    assert not any("TEMP B-TREE" in detail for detail in plans["get_playlist_media"])
+    assert any("uq_playlist_media_playlist_media" in detail for detail in plans["get_playlist_media_relation"])
+    assert any("ix_schedules_media_active (media_id=? AND is_active=?)" in detail for detail in plans["player_snapshot"])
+    assert any("ix_schedules_active_type_mask (is_active=? AND schedule_type=?)" in detail
+               for detail in plans["get_active_schedules"])
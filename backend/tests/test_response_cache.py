@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from fastapi import FastAPI
+
+from app.db.crud import media_crud, playlist_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.schemas.media_schema import MediaUpdate
+from app.api.routers import player, playlists
+from app.core import response_cache as cache_module
+from app.core.response_cache import ResponseCache, VersionRegistry
+from app.core.playlist_snapshots import PlaylistSnapshotCache
+
+
+def setup(monkeypatch, db, client_for):
+    # Registro y caché propios: los contadores globales no dependen del orden de los tests
+    registry = VersionRegistry()
+    cache = ResponseCache(registry)
+    for module in (playlist_crud, media_crud):
+        monkeypatch.setattr(module, "response_versions", registry)
+    monkeypatch.setattr(player, "response_cache", cache)
+    monkeypatch.setattr(playlists, "response_cache", cache)
+    snapshots = PlaylistSnapshotCache()
+    for module in (playlist_crud, media_crud, playlists):
+        monkeypatch.setattr(module, "playlist_snapshots", snapshots)
+
+    db.add_all([Playlist(id=1, name="Lobby"), Playlist(id=2, name="Bar")])
+    db.add(Media(id=1, filename="a.jpg", filepath="/uploads/a.jpg", media_type="image", duration=10))
+    db.commit()
+    playlist_crud.add_single_media_to_playlist(db, 1, 1)
+
+    app = FastAPI()
+    app.include_router(player.router, prefix="/api")
+    app.include_router(playlists.router, prefix="/api/playlists")
+    return client_for(app), cache
+
+
+def test_not_modified_skips_database_and_body_is_reused(monkeypatch, db, client_for):
+    client, cache = setup(monkeypatch, db, client_for)
+    calls = []
+    summaries = playlist_crud.get_playlist_summaries
+    monkeypatch.setattr(playlist_crud, "get_playlist_summaries",
+                        lambda *a, **kw: calls.append(1) or summaries(*a, **kw))
+
+    first = client.get("/api/player/playlists")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.headers["cache-control"] == "no-cache"
+    assert [p["media_count"] for p in first.json()] == [1, 0]
+
+    revalidated = client.get("/api/player/playlists", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    # Sin ETag se sirve el cuerpo ya serializado
+    assert client.get("/api/player/playlists").content == first.content
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses, cache.not_modified) == (1, 1, 1)
+
+    # Un cambio en cualquier media invalida la lista (total_duration depende de él)
+    media_crud.update_media(db, 1, MediaUpdate(duration=20))
+    changed = client.get("/api/player/playlists", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert changed.json()[0]["total_duration"] == 20
+    assert len(calls) == 2
+
+
+def test_playlist_etags_are_scoped_per_playlist(monkeypatch, db, client_for):
+    client, _ = setup(monkeypatch, db, client_for)
+    complete = client.get("/api/player/playlists/1/complete")
+    legacy = client.get("/api/playlists/1/player")
+    assert complete.json()["version"] == 1 and legacy.json()["total_medias"] == 1
+
+    # Cambiar otra playlist no invalida esta
+    playlist_crud.add_single_media_to_playlist(db, 2, 1)
+    for response, url in ((complete, "/api/player/playlists/1/complete"), (legacy, "/api/playlists/1/player")):
+        assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+    playlist_crud.update_media_duration_in_playlist(db, 1, 1, 30)
+    refreshed = client.get("/api/player/playlists/1/complete", headers={"If-None-Match": complete.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["medias"][0]["effective_duration"] == 30
+
+    # Los deltas tienen su propia entrada en la caché
+    delta = client.get("/api/player/playlists/1/complete", params={"since_version": 1}).json()
+    assert [c["action"] for c in delta["changes"]] == ["media_duration_updated"]
+
+    assert client.get("/api/player/playlists/9/complete").status_code == 404
+
+
+def test_etag_includes_process_epoch_and_generation():
+    first, second = VersionRegistry(), VersionRegistry()
+    # Otro worker nunca produce la misma etiqueta para los mismos contadores
+    assert first.etag(["media"]) != second.etag(["media"])
+    before = first.etag(["media"])
+    first.bump_all()
+    assert first.etag(["media"]) != before
+    assert cache_module.playlist_scope(3) == "playlist:3"
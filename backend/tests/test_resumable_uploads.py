@@ -0,0 +1,132 @@
+import hashlib
+import sys
+from pathlib import Path
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.db.crud import media_blob_crud, media_crud
+from app.db.models.media_blob import MediaBlob
+from app.db.schemas.media_schema import MediaCreate
+from app.api.routers import media
+from app.utils import resumable_uploads
+from app.utils.uploads import UploadRejected, place_blob
+
+
+@pytest.fixture
+def upload_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "RESUMABLE_UPLOAD_DIR", str(tmp_path / "resumable"))
+    return tmp_path
+
+
+def test_out_of_order_chunks_and_finalize(upload_dirs):
+    payload = bytes(range(256)) * 40
+    session = resumable_uploads.init_upload(
+        "campaign.mp4", "video", len(payload), sha256=hashlib.sha256(payload).hexdigest()
+    )
+    upload_id = session["upload_id"]
+    assert session["next_offset"] == 0
+
+    second = payload[4096:]
+    status = resumable_uploads.write_chunk(upload_id, 4096, second, hashlib.sha256(second).hexdigest())
+    assert status["next_offset"] == 0
+    assert not status["complete"]
+
+    with pytest.raises(UploadRejected) as exc:
+        resumable_uploads.finalize_upload(upload_id)
+    assert exc.value.status_code == 409
+
+    # Reintento del mismo bloque: debe ser idempotente
+    resumable_uploads.write_chunk(upload_id, 0, payload[:4096])
+    status = resumable_uploads.write_chunk(upload_id, 0, payload[:4096])
+    assert status["complete"]
+    assert status["received_ranges"] == [[0, len(payload)]]
+
+    stored, state = resumable_uploads.finalize_upload(upload_id)
+    assert state["filename"] == "campaign.mp4"
+    assert stored.filename == f"{hashlib.sha256(payload).hexdigest()}.mp4"
+    # Mientras se completa la sesión no admite bloques ni otro complete
+    for call in (lambda: resumable_uploads.write_chunk(upload_id, 0, payload[:4096]),
+                 lambda: resumable_uploads.finalize_upload(upload_id)):
+        with pytest.raises(UploadRejected) as exc:
+            call()
+        assert exc.value.status_code == 409
+
+    assert place_blob(stored)
+    resumable_uploads.close_upload(upload_id)
+    assert (Path(settings.UPLOAD_DIR) / stored.filename).read_bytes() == payload
+    assert list(Path(settings.RESUMABLE_UPLOAD_DIR).iterdir()) == []
+
+
+def test_failed_registration_keeps_the_session(upload_dirs, monkeypatch, client_for):
+    app = FastAPI()
+    app.include_router(media.router, prefix="/api/media")
+    client = client_for(app)
+
+    payload = b"\xff\xd8poster" * 500
+    upload_id = resumable_uploads.init_upload("poster.jpg", "image", len(payload))["upload_id"]
+    resumable_uploads.write_chunk(upload_id, 0, payload)
+
+    create_media = media_crud.create_media
+
+    def broken_create_media(db, **kwargs):
+        # Falla después de enlazar el blob, antes del commit
+        media_blob_crud.acquire_blob(db, kwargs["stored"])
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(media_crud, "create_media", broken_create_media)
+    assert client.post(f"/api/media/uploads/{upload_id}/complete").status_code == 500
+    assert resumable_uploads.get_upload_status(upload_id)["complete"]
+
+    # Reintento sin volver a subir el archivo
+    monkeypatch.setattr(media_crud, "create_media", create_media)
+    response = client.post(f"/api/media/uploads/{upload_id}/complete")
+    assert response.status_code == 200
+    filename = f"{hashlib.sha256(payload).hexdigest()}.jpg"
+    assert response.json()["filepath"] == f"/uploads/{filename}"
+    assert (Path(settings.UPLOAD_DIR) / filename).read_bytes() == payload
+    assert list(Path(settings.RESUMABLE_UPLOAD_DIR).iterdir()) == []
+    assert client.post(f"/api/media/uploads/{upload_id}/complete").status_code == 404
+
+
+def test_rolled_back_media_leaves_no_blob_file(upload_dirs, db):
+    payload = b"spot" * 1000
+    upload_id = resumable_uploads.init_upload("spot.mp4", "video", len(payload))["upload_id"]
+    resumable_uploads.write_chunk(upload_id, 0, payload)
+    stored, _ = resumable_uploads.finalize_upload(upload_id)
+
+    with pytest.raises(Exception):
+        # media_type inválido: el INSERT del media falla tras enlazar el blob
+        media_crud.create_media(db, MediaCreate.construct(filename="spot", media_type=None, duration=1),
+                                stored=stored)
+    assert not (Path(settings.UPLOAD_DIR) / stored.filename).exists()
+    assert db.query(MediaBlob).count() == 0
+    assert Path(stored.staged_path).read_bytes() == payload
+
+
+def test_chunk_integrity_and_bounds(upload_dirs):
+    session = resumable_uploads.init_upload("clip.mov", "video", 100)
+    upload_id = session["upload_id"]
+
+    with pytest.raises(UploadRejected) as exc:
+        resumable_uploads.write_chunk(upload_id, 0, b"a" * 10, hashlib.sha256(b"b" * 10).hexdigest())
+    assert exc.value.status_code == 422
+
+    with pytest.raises(UploadRejected) as exc:
+        resumable_uploads.write_chunk(upload_id, 95, b"a" * 10)
+    assert exc.value.status_code == 416
+
+    resumable_uploads.abort_upload(upload_id)
+    with pytest.raises(resumable_uploads.UploadSessionNotFound):
+        resumable_uploads.get_upload_status(upload_id)
@@ -0,0 +1,105 @@
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.db.crud import schedule_crud
+from app.db.models.media import Media
+from app.db.models.playlist import Playlist
+from app.db.schemas.schedule_schema import ScheduleCreate, ScheduleUpdate
+from app.core.schedule_index import ScheduleIndex
+
+# 2024-10-28 es lunes (weekday 0)
+MONDAY = date(2024, 10, 28)
+
+
+def seed(db):
+    db.add_all([
+        Media(id=1, filename="promo", filepath="/uploads/promo.mp4", media_type="video", duration=30),
+        Playlist(id=1, name="Mañana"),
+        Playlist(id=2, name="Halloween"),
+    ])
+    db.commit()
+    return db
+
+
+def at(day, clock):
+    hours, minutes = map(int, clock.split(":"))
+    return datetime(day.year, day.month, day.day, hours, minutes)
+
+
+def test_priority_windows_and_incremental_updates(monkeypatch, db):
+    seed(db)
+    index = ScheduleIndex()
+    monkeypatch.setattr(schedule_crud, "schedule_index", index)
+    index.load(db)
+
+    weekly = schedule_crud.create_schedule(db, ScheduleCreate(
+        playlist_id=1, daily_start="08:00", daily_end="20:00", weekdays=[0, 1, 2, 3, 4], priority=1
+    ))
+    promo = schedule_crud.create_schedule(db, ScheduleCreate(
+        media_id=1, daily_start="12:00", daily_end="13:00", weekdays=[0], priority=5
+    ))
+
+    assert index.resolve(at(MONDAY, "07:59")).schedule is None
+    assert index.resolve(at(MONDAY, "09:00")).schedule.id == weekly.id
+    now = index.resolve(at(MONDAY, "12:30"))
+    assert now.schedule.id == promo.id
+    assert (now.starts_at, now.ends_at) == (at(MONDAY, "12:00"), at(MONDAY, "13:00"))
+    # Tras el bloque de mayor prioridad vuelve el semanal
+    assert index.resolve(at(MONDAY, "13:00")).schedule.id == weekly.id
+    assert index.resolve(at(date(2024, 10, 29), "12:30")).schedule.id == weekly.id
+
+    # Desactivar/borrar invalida solo los días cacheados afectados
+    schedule_crud.toggle_schedule_status(db, promo.id)
+    assert index.resolve(at(MONDAY, "12:30")).schedule.id == weekly.id
+    schedule_crud.update_schedule(db, weekly.id, ScheduleUpdate(daily_end="10:00"))
+    assert index.resolve(at(MONDAY, "12:30")).schedule is None
+    schedule_crud.delete_schedule(db, weekly.id)
+    assert index.resolve(at(MONDAY, "09:00")).schedule is None
+
+
+def test_overnight_and_advanced_schedules(monkeypatch, db):
+    seed(db)
+    index = ScheduleIndex()
+    monkeypatch.setattr(schedule_crud, "schedule_index", index)
+    index.load(db)
+
+    night = schedule_crud.create_schedule(db, ScheduleCreate(
+        playlist_id=1, daily_start="22:00", daily_end="02:00", weekdays=[0]
+    ))
+    campaign = schedule_crud.create_schedule(db, ScheduleCreate(
+        playlist_id=2, schedule_type="advanced", start_date=date(2024, 10, 25), end_date=date(2024, 10, 31),
+        priority=3
+    ))
+    spot = schedule_crud.create_schedule(db, ScheduleCreate(
+        media_id=1, schedule_type="advanced", priority=9,
+        specific_times=["2024-10-31T18:00:00"]
+    ))
+    # Formato de ventana que también entiende el player (no pasa por el schema)
+    window = schedule_crud.create_schedule(db, ScheduleCreate(media_id=1, schedule_type="advanced", priority=9))
+    window.specific_times = [{"date": "2024-11-02", "start_time": "10:00", "end_time": "11:00"}]
+    db.commit()
+    index.upsert(window)
+
+    tuesday = date(2024, 10, 29)
+    assert index.resolve(at(tuesday, "01:30")).schedule.id == campaign.id  # la campaña tiene más prioridad
+    schedule_crud.toggle_schedule_status(db, campaign.id)
+    assert index.resolve(at(tuesday, "01:30")).schedule.id == night.id
+    assert index.resolve(at(tuesday, "02:30")).schedule is None
+    schedule_crud.toggle_schedule_status(db, campaign.id)
+
+    halloween = date(2024, 10, 31)
+    assert index.resolve(at(halloween, "17:00")).schedule.id == campaign.id
+    assert index.resolve(datetime(2024, 10, 31, 18, 0, 20)).schedule.id == spot.id
+    assert index.resolve(at(halloween, "18:01")).schedule.id == campaign.id
+    assert index.resolve(at(date(2024, 11, 1), "12:00")).schedule is None
+    assert index.resolve(at(date(2024, 11, 2), "10:30")).schedule.id == window.id
@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.db.models.playlist_media import PlaylistMedia  # noqa: F401
+from app.db.models.schedule import Schedule
+from app.core.schedule_index import ScheduleIndex
+from app.core.schedule_notifier import ScheduleNotifier
+
+# Lunes
+BASE = datetime(2024, 10, 28, 10, 0, 0)
+
+
+def make_index(db, *schedules):
+    db.add_all(schedules)
+    db.commit()
+    index = ScheduleIndex()
+    index.load(db)
+    return index
+
+
+def test_step_reports_transitions_and_next_boundary(db):
+    index = make_index(
+        db,
+        Schedule(id=1, playlist_id=1, daily_start="08:00", daily_end="20:00", weekdays=[0]),
+        Schedule(id=2, playlist_id=2, daily_start="22:00", daily_end="02:00", weekdays=[0], priority=3),
+    )
+    notifier = ScheduleNotifier(index=index)
+    events, boundary = notifier.step(BASE.replace(hour=7))
+    assert events == [] and boundary == BASE.replace(hour=8)
+
+    events, boundary = notifier.step(BASE.replace(hour=8))
+    assert [(e, d["id"]) for e, d in events] == [("schedule_started", 1)]
+    assert events[0][1]["ends_at"] == "2024-10-28T20:00:00"
+    assert boundary == BASE.replace(hour=20)
+
+    events, _ = notifier.step(BASE.replace(hour=22))
+    assert [(e, d["id"]) for e, d in events] == [("schedule_ended", 1), ("schedule_started", 2)]
+    # La ventana nocturna se anuncia completa y no se corta a medianoche
+    assert events[1][1]["ends_at"] == "2024-10-29T02:00:00"
+    assert events[1][1]["active_schedule_id"] == 2
+    assert notifier.step(BASE.replace(day=29, hour=0))[0] == []
+
+    events, _ = notifier.step(BASE.replace(day=29, hour=2))
+    assert [(e, d["id"], d["active_schedule_id"]) for e, d in events] == [("schedule_ended", 2, None)]
+
+
+def test_timer_sleeps_until_boundaries_and_wakes_on_changes(db):
+    opens, closes = BASE + timedelta(seconds=1), BASE + timedelta(seconds=2)
+    index = make_index(db, Schedule(
+        id=1, media_id=1, weekdays=[0],
+        daily_start=opens.strftime("%H:%M:%S"), daily_end=closes.strftime("%H:%M:%S")
+    ))
+    started = time.monotonic()
+    received = []
+
+    async def emit(event, data, topics=None):
+        received.append((event, data["id"], time.monotonic() - started))
+
+    async def scenario():
+        notifier = ScheduleNotifier(index=index, emit=emit,
+                                    clock=lambda: BASE + timedelta(seconds=time.monotonic() - started))
+        notifier.start()
+        await asyncio.sleep(2.5)
+        # Un schedule nuevo que ya está en su ventana se anuncia sin esperar al temporizador
+        index.upsert(Schedule(id=2, playlist_id=1, is_all_day=True, weekdays=[0], is_active=True))
+        await asyncio.sleep(0.2)
+        await notifier.stop()
+
+    asyncio.run(scenario())
+    assert [(event, schedule_id) for event, schedule_id, _ in received] == [
+        ("schedule_started", 1), ("schedule_ended", 1), ("schedule_started", 2)
+    ]
+    for (_, _, elapsed), expected in zip(received, (1.0, 2.0, 2.5)):
+        assert abs(elapsed - expected) < 0.3
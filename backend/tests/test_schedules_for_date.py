@@ -0,0 +1,74 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from sqlalchemy import text
+
+from app.db.crud import schedule_crud
+from app.db.models.schedule import Schedule, weekdays_to_mask
+from app.db.models.schedule_specific_time import ScheduleSpecificTime
+from app.db.schemas.schedule_schema import ScheduleCreate, ScheduleUpdate
+
+MONDAY = date(2024, 10, 28)
+HALLOWEEN = date(2024, 10, 31)  # jueves
+
+
+def ids_on(db, day):
+    return {s.id for s in schedule_crud.get_schedules_for_date(db, day, day.weekday())}
+
+
+def test_date_lookup_uses_mask_and_specific_time_rows(db):
+    weekdays = schedule_crud.create_schedule(db, ScheduleCreate(playlist_id=1, weekdays=[0, 2], is_all_day=True))
+    every_day = schedule_crud.create_schedule(db, ScheduleCreate(playlist_id=1, daily_start="08:00", daily_end="09:00"))
+    campaign = schedule_crud.create_schedule(db, ScheduleCreate(
+        playlist_id=2, schedule_type="advanced", start_date=date(2024, 10, 25), end_date=HALLOWEEN
+    ))
+    spot = schedule_crud.create_schedule(db, ScheduleCreate(
+        media_id=1, schedule_type="advanced", specific_times=["2024-10-31T18:00:00", "2024-11-02"]
+    ))
+    assert weekdays.weekday_mask == 0b101 and every_day.weekday_mask == weekdays_to_mask(None) == 0b1111111
+    assert spot.has_specific_times and not campaign.has_specific_times
+    assert [(r.day, r.start_seconds, r.end_seconds) for r in spot.specific_dates] == [
+        (HALLOWEEN, 18 * 3600 - 30, 18 * 3600 + 30), (date(2024, 11, 2), 0, 24 * 3600)
+    ]
+
+    assert ids_on(db, MONDAY) == {weekdays.id, every_day.id, campaign.id}
+    assert ids_on(db, HALLOWEEN) == {every_day.id, campaign.id, spot.id}
+    assert ids_on(db, date(2024, 11, 2)) == {every_day.id, spot.id}
+    # Antes, "2024-11-0" coincidía por subcadena con cualquier fecha de ese rango
+    assert spot.id not in ids_on(db, date(2024, 11, 1))
+    in_range = schedule_crud.get_schedules_by_date_range(db, date(2024, 11, 1), date(2024, 11, 30))
+    assert {s.id for s in in_range} == {spot.id}
+
+    # Las ediciones mantienen el bitmask y las filas de fechas
+    schedule_crud.update_schedule(db, weekdays.id, ScheduleUpdate(weekdays=[3]))
+    schedule_crud.update_schedule(db, spot.id, ScheduleUpdate(specific_times=["2024-10-28"]))
+    assert weekdays.id not in ids_on(db, MONDAY) and weekdays.id in ids_on(db, HALLOWEEN)
+    assert spot.id in ids_on(db, MONDAY) and spot.id not in ids_on(db, HALLOWEEN)
+    assert db.query(ScheduleSpecificTime).count() == 1
+    schedule_crud.delete_schedule(db, spot.id)
+    assert db.query(ScheduleSpecificTime).count() == 0
+
+
+def test_backfill_for_schedules_saved_before_the_mask(db):
+    db.execute(text(
+        "INSERT INTO schedules (id, playlist_id, schedule_type, weekdays, specific_times, is_active, priority) "
+        "VALUES (1, 1, 'simple', '[4]', NULL, 1, 1), (2, 1, 'advanced', NULL, '[\"2024-10-28\"]', 1, 1)"
+    ))
+    db.commit()
+    # Sin bitmask la fila simple no aparece en ningún día
+    assert 1 not in ids_on(db, date(2024, 11, 1))
+
+    assert schedule_crud.backfill_schedule_occurrences(db) == 2
+    assert db.get(Schedule, 1).weekday_mask == 0b10000
+    assert ids_on(db, MONDAY) == {2}
+    assert ids_on(db, date(2024, 11, 1)) == {1}
@@ -0,0 +1,81 @@
+import gzip
+import sys
+from pathlib import Path
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from starlette.applications import Starlette
+from starlette.routing import Mount, Route
+from fastapi.testclient import TestClient
+
+from app.core.static_assets import PrecompressedStaticFiles, SpaIndex, accepted_encodings
+from app.utils.precompress import precompress_directory
+
+SCRIPT = b"console.log('signance');\n" * 200
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.3e9580c5.js").write_bytes(SCRIPT)
+    (tmp_path / "index.html").write_bytes(b"<html><body><div id=app></div></body></html>" * 40)
+    (tmp_path / "favicon.ico").write_bytes(b"\0" * 2048)
+    totals = precompress_directory(tmp_path)
+    assert totals["files"] == 3
+
+    spa_index = SpaIndex(str(tmp_path / "index.html"))
+    assert spa_index.load()
+    app = Starlette(routes=[
+        Mount("/js", PrecompressedStaticFiles(directory=str(tmp_path / "js"))),
+        Mount("/static", PrecompressedStaticFiles(directory=str(tmp_path))),
+        Route("/{path:path}", lambda request: spa_index.response(request)),
+    ])
+    return TestClient(app)
+
+
+def test_accept_encoding_parsing():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.8") == {"gzip"}
+    assert accepted_encodings(None) == set()
+
+
+def test_precompressed_variant_is_served(client):
+    response = client.get("/js/app.3e9580c5.js", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("application/javascript") or \
+        response.headers["content-type"].startswith("text/javascript")
+    assert "immutable" in response.headers["cache-control"]
+    assert response.content == SCRIPT  # httpx descomprime el gzip
+
+    identity = client.get("/js/app.3e9580c5.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.content == SCRIPT
+    assert identity.headers["etag"] != response.headers["etag"]
+
+    # Los nombres sin hash se revalidan
+    favicon = client.get("/static/favicon.ico", headers={"Accept-Encoding": "gzip"})
+    assert favicon.headers["cache-control"] == "no-cache"
+
+
+def test_spa_index_from_memory_with_etag(client, tmp_path):
+    response = client.get("/dashboard/screens", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.startswith("<html>")
+    etag = response.headers["etag"]
+
+    # Sin acceso al disco: borrar el archivo no afecta a las respuestas
+    (tmp_path / "index.html").unlink()
+    cached = client.get("/playlists", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
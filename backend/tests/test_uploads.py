@@ -0,0 +1,63 @@
+import hashlib
+import io
+import sys
+from pathlib import Path
+import pytest
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from app.utils.uploads import UploadRejected, discard_staged, place_blob, stream_to_blob_store
+
+
+def test_stream_to_blob_store_copies_in_chunks(tmp_path):
+    payload = b"x" * (256 * 1024 + 17)
+    stored = stream_to_blob_store(io.BytesIO(payload), "promo.MP4", upload_dir=str(tmp_path), chunk_size=4096)
+
+    assert stored.filename.endswith(".mp4")
+    assert stored.size == len(payload)
+    assert Path(stored.staged_path).read_bytes() == payload
+    # Solo el staging, dentro del directorio de uploads (rename/enlace en el mismo disco)
+    assert [p.name for p in tmp_path.iterdir()] == [Path(stored.staged_path).name]
+
+
+def test_stream_to_blob_store_rejects_oversized_file(tmp_path):
+    with pytest.raises(UploadRejected) as exc:
+        stream_to_blob_store(io.BytesIO(b"x" * 10000), "big.mp4", upload_dir=str(tmp_path),
+                             max_size=4096, chunk_size=1024)
+
+    assert exc.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stream_to_blob_store_rejects_extension(tmp_path):
+    with pytest.raises(UploadRejected) as exc:
+        stream_to_blob_store(io.BytesIO(b"MZ"), "payload.exe", upload_dir=str(tmp_path))
+
+    assert exc.value.status_code == 415
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_blob_store_deduplicates_identical_uploads(tmp_path):
+    payload = b"promo" * 5000
+    first = stream_to_blob_store(io.BytesIO(payload), "promo.mp4", upload_dir=str(tmp_path), chunk_size=1000)
+    second = stream_to_blob_store(io.BytesIO(payload), "promo-sucursal-2.mp4", upload_dir=str(tmp_path))
+
+    assert first.sha256 == hashlib.sha256(payload).hexdigest()
+    assert first.filename == second.filename == f"{first.sha256}.mp4"
+    assert first.size == len(payload)
+    # Hasta tener la referencia en la base solo existen los staging
+    assert not (tmp_path / first.filename).exists()
+
+    assert place_blob(first, str(tmp_path))
+    assert not place_blob(second, str(tmp_path))
+    discard_staged(first)
+    discard_staged(second)
+    assert [p.name for p in tmp_path.iterdir()] == [first.filename]
+    assert (tmp_path / first.filename).read_bytes() == payload
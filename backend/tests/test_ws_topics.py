@@ -0,0 +1,190 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Ensure dependencies from the provided virtual environment are available
+VENVPATH = Path(__file__).resolve().parents[1] / "venv" / "lib" / "python3.11" / "site-packages"
+if VENVPATH.exists():
+    sys.path.append(str(VENVPATH))
+
+# Add project root so ``import app`` works
+ROOTPATH = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOTPATH))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routers import ws as ws_router
+from app.core.websocket_manager import (
+    ConnectionManager, MAX_TOPICS_PER_CONNECTION, coalesce_key, media_topics, playlist_topic
+)
+
+
+class FakeSocket:
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+def test_broadcast_only_reaches_subscribed_topics():
+    manager = ConnectionManager()
+    legacy, admin, screen_a, screen_b = (FakeSocket(n) for n in ("legacy", "admin", "a", "b"))
+
+    async def scenario():
+        await manager.connect(legacy)
+        await manager.connect(admin, ["admin"])
+        await manager.connect(screen_a, ["screens", playlist_topic(1)])
+        await manager.connect(screen_b, ["screens", playlist_topic(2)])
+
+        await manager.broadcast({"event": "playlist_updated"}, ["admin", playlist_topic(1)])
+        await manager.broadcast({"event": "media_processed"}, media_topics(7, [2]))
+        await manager.broadcast({"event": "schedule_started"}, ["admin", "screens"])
+        await manager.broadcast({"event": "untargeted"})
+        await manager.flush()
+
+    asyncio.run(scenario())
+    events = lambda ws: [m["event"] for m in ws.sent]
+    # Sin suscripción explícita se recibe todo (clientes anteriores)
+    assert events(legacy) == ["playlist_updated", "media_processed", "schedule_started", "untargeted"]
+    assert events(admin) == ["playlist_updated", "media_processed", "schedule_started", "untargeted"]
+    assert events(screen_a) == ["playlist_updated", "schedule_started", "untargeted"]
+    assert events(screen_b) == ["media_processed", "schedule_started", "untargeted"]
+
+    manager.disconnect(screen_a)
+    assert manager.recipients([playlist_topic(1)]) == [legacy]
+    assert playlist_topic(1) not in manager._topics
+
+
+def test_subscribe_validation():
+    manager = ConnectionManager()
+    socket = FakeSocket("x")
+
+    async def scenario():
+        await manager.connect(socket)
+        await manager.handle_message(socket, {"action": "subscribe", "topics": ["playlist:abc"]})
+        await manager.flush()
+        assert socket.sent[-1]["event"] == "error"
+        # Un error no cambia las suscripciones
+        assert manager.subscriptions(socket) == {"*"}
+
+        too_many = [playlist_topic(i) for i in range(MAX_TOPICS_PER_CONNECTION + 1)]
+        await manager.handle_message(socket, {"action": "subscribe", "topics": too_many})
+        await manager.flush()
+        assert socket.sent[-1]["event"] == "error"
+        assert manager.subscriptions(socket) == {"*"}
+
+        await manager.handle_message(socket, {"action": "subscribe", "topics": "screen:3"})
+        await manager.flush()
+        assert socket.sent[-1] == {"event": "subscribed", "data": {"topics": ["screen:3"]}}
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_does_not_delay_others():
+    manager = ConnectionManager(outbox_size=4, policy="drop_oldest")
+    fast, slow = FakeSocket("fast"), FakeSocket("slow", delay=0.05)
+
+    async def scenario():
+        await manager.connect(fast)
+        await manager.connect(slow)
+        await asyncio.sleep(0)
+        for i in range(10):
+            await broadcast(manager, "tick", {"n": i})
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        # El rápido ya recibió todo mientras el lento sigue en el primer envío
+        assert [m["data"]["n"] for m in fast.sent] == list(range(10))
+        await manager.flush()
+
+    asyncio.run(scenario())
+    # El lento conserva el mensaje en curso y los 4 más nuevos
+    assert [m["data"]["n"] for m in slow.sent] == [0, 6, 7, 8, 9]
+    assert manager.stats()["dropped"] == 5
+
+
+def test_progress_events_coalesce_and_full_outbox_can_disconnect():
+    manager = ConnectionManager(outbox_size=2, policy="disconnect")
+    slow, strict = FakeSocket("slow", delay=0.02), FakeSocket("strict", delay=0.02)
+
+    async def scenario():
+        await manager.connect(slow, ["media:1"])
+        await manager.connect(strict, ["admin"])
+        await asyncio.sleep(0)
+        for progress in (10, 20, 30, 40):
+            await broadcast_event_on(manager, "media_processing_progress",
+                                     {"id": 1, "job_id": 5, "progress": progress}, ["media:1"])
+            await asyncio.sleep(0.001)
+        for i in range(3):
+            await broadcast(manager, "schedule_created", {"id": i}, ["admin"])
+        await manager.flush()
+
+    asyncio.run(scenario())
+    # 10 ya estaba en envío; 20 y 30 se reemplazaron por el último valor
+    assert [m["data"]["progress"] for m in slow.sent] == [10, 40]
+    assert strict.closed and strict not in manager.active_connections
+    assert manager.stats()["evicted"] == 1
+
+
+def test_heartbeat_evicts_peers_that_stop_answering():
+    manager = ConnectionManager(heartbeat_interval=0.01, heartbeat_timeout=0.03)
+    legacy, silent = FakeSocket("legacy"), FakeSocket("silent")
+
+    async def scenario():
+        await manager.connect(legacy)
+        await manager.connect(silent)
+        manager.touch(silent, "pong")
+        manager.start()
+        await asyncio.sleep(0.1)
+        await manager.stop()
+
+    asyncio.run(scenario())
+    # Solo se desconecta a quien respondió alguna vez y dejó de hacerlo
+    assert silent.closed and manager.active_connections == [legacy]
+    assert {m["event"] for m in legacy.sent} == {"ping"}
+
+
+async def broadcast(manager, event, data, topics=None):
+    await manager.broadcast({"event": event, "data": data}, topics)
+
+
+async def broadcast_event_on(manager, event, data, topics):
+    await manager.broadcast({"event": event, "data": data}, topics, coalesce_key(event, data))
+
+
+def test_websocket_endpoint_protocol(monkeypatch):
+    manager = ConnectionManager()
+    monkeypatch.setattr(ws_router, "manager", manager)
+    app = FastAPI()
+    app.include_router(ws_router.router)
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws?topics=screens,playlist:4") as websocket:
+        assert websocket.receive_json() == {
+            "event": "subscribed", "data": {"topics": ["playlist:4", "screens"]}
+        }
+        # Texto que no es JSON se trata como keepalive
+        websocket.send_text("ping")
+        websocket.send_json({"action": "unsubscribe", "topics": ["playlist:4"]})
+        assert websocket.receive_json()["data"]["topics"] == ["screens"]
+        websocket.send_json({"action": "subscribe", "topics": ["playlist:5"]})
+        assert websocket.receive_json()["data"]["topics"] == ["playlist:5", "screens"]
+
+        socket = manager.active_connections[0]
+        assert manager.recipients([playlist_topic(4)]) == []
+        assert manager.recipients([playlist_topic(5)]) == [socket]
+
+    assert manager.active_connections == []
@@ -319,6 +319,12 @@ export const scheduleAPI = {
     return httpMethods.get(url)
   },
   
+  // Plan de emisión precalculado (segmentos ordenados y resueltos por prioridad)
+  getPlayoutPlan: (startDate = null, days = 7, skip = 0, limit = 500) => {
+    const start = startDate ? `&start_date=${startDate}` : ''
+    return httpMethods.get(`/schedules/playout/plan?days=${days}&skip=${skip}&limit=${limit}${start}`)
+  },
+  
   // Crear nueva programación
   create: (scheduleData) => httpMethods.post('/schedules/', scheduleData),
   
@@ -105,6 +105,13 @@ export const playerAPI = {
     return api.get(`/player/playlists/${playlistId}/complete`)
   },
   
+  // Cambios de una playlist desde una versión ({ full: false, changes: [...] })
+  // Si el servidor ya no tiene esa versión responde la playlist completa ({ full: true, medias: [...] })
+  getPlaylistChanges: async (playlistId, sinceVersion) => {
+    const api = await ensurePlayerAPIInitialized()
+    return api.get(`/player/playlists/${playlistId}/complete`, { params: { since_version: sinceVersion } })
+  },
+  
   // Obtener información básica de una playlist
   getPlaylistInfo: async (playlistId) => {
     const api = await ensurePlayerAPIInitialized()
@@ -0,0 +1,110 @@
+/**
+ * Cliente WebSocket compartido
+ * Una sola conexión a /ws por pestaña; los componentes registran handlers por
+ * evento y se suscriben solo a los temas que les interesan
+ * (admin, screens, playlist:{id}, screen:{id}, media:{id}).
+ */
+
+import backendDetector from './backendDetector'
+
+const RECONNECT_DELAY = 3000
+
+let socket = null
+let reconnectTimer = null
+let shouldReconnect = false
+const topics = new Set()
+const handlers = {}
+
+const getSocketUrl = () => {
+  const cached = backendDetector.detectedBaseUrl || backendDetector.getCachedBackend()?.baseUrl
+  const base = new URL(cached || window.location.origin)
+  const protocol = base.protocol === 'https:' ? 'wss:' : 'ws:'
+  const query = topics.size ? `?topics=${encodeURIComponent([...topics].join(','))}` : ''
+  return `${protocol}//${base.host}/ws${query}`
+}
+
+const dispatch = (event, data) => {
+  (handlers[event] || []).forEach(handler => {
+    try {
+      handler(data)
+    } catch (error) {
+      console.error(`Error en handler de ${event}:`, error)
+    }
+  })
+}
+
+const send = (message) => {
+  if (socket && socket.readyState === WebSocket.OPEN) {
+    socket.send(JSON.stringify(message))
+  }
+}
+
+const open = () => {
+  socket = new WebSocket(getSocketUrl())
+  socket.onopen = () => {
+    // Temas agregados mientras la conexión se establecía
+    if (topics.size) send({ action: 'subscribe', topics: [...topics] })
+  }
+  socket.onmessage = (message) => {
+    try {
+      const { event, data } = JSON.parse(message.data)
+      // Heartbeat del servidor: responder para no ser desconectado como pantalla caída
+      if (event === 'ping') {
+        socket.send('pong')
+        return
+      }
+      if (event) dispatch(event, data)
+    } catch (error) {
+      console.warn('Mensaje WebSocket no válido:', message.data)
+    }
+  }
+  socket.onclose = () => {
+    socket = null
+    if (shouldReconnect) {
+      // Al reconectar se vuelven a pedir los temas actuales en la URL
+      reconnectTimer = setTimeout(open, RECONNECT_DELAY)
+    }
+  }
+}
+
+export const useWebSocket = () => {
+  const connect = (initialTopics = []) => {
+    initialTopics.forEach(topic => topics.add(topic))
+    shouldReconnect = true
+    if (!socket) open()
+  }
+
+  const disconnect = () => {
+    shouldReconnect = false
+    clearTimeout(reconnectTimer)
+    topics.clear()
+    if (socket) socket.close()
+    socket = null
+  }
+
+  const subscribe = (newTopics) => {
+    const pending = newTopics.filter(topic => !topics.has(topic))
+    if (!pending.length) return
+    pending.forEach(topic => topics.add(topic))
+    send({ action: 'subscribe', topics: pending })
+  }
+
+  const unsubscribe = (oldTopics) => {
+    const pending = oldTopics.filter(topic => topics.has(topic))
+    if (!pending.length) return
+    pending.forEach(topic => topics.delete(topic))
+    send({ action: 'unsubscribe', topics: pending })
+  }
+
+  const on = (event, handler) => {
+    (handlers[event] = handlers[event] || []).push(handler)
+  }
+
+  const off = (event, handler) => {
+    handlers[event] = (handlers[event] || []).filter(h => h !== handler)
+  }
+
+  return { connect, disconnect, subscribe, unsubscribe, on, off }
+}
+
+export default useWebSocket